@@ -0,0 +1,315 @@
+"""
+Cópias de segurança do cine_filmes.db com o banco em uso.
+
+A cópia usa a API de backup do SQLite em passos de PAGINAS_POR_PASSO páginas.
+Antes do primeiro passo, a conexão de origem abre uma transação de leitura,
+então a cópia é o banco de um único momento: em WAL (o modo de todas as
+conexões de cinefilmesdb), os escritores continuam gravando durante a cópia
+sem esperar por ela, e a cópia não recomeça a cada gravação deles. Cada cópia
+é conferida com PRAGMA integrity_check antes de ser comprimida (gzip, só
+nos trechos que diminuem; ver _comprimir) e só então ganha o nome
+definitivo, com data e hora, no diretório de backups; a rotação apaga as
+mais antigas. AgendadorBackup repete o backup a intervalos
+fixos em uma thread.
+
+Capas guardadas em disco (ArmazenamentoCapas) ficam fora do banco; com
+diretorio_capas, as que ainda não estão no backup são copiadas para
+"<destino>/capas". Como o nome de cada arquivo é o hash do conteúdo, as
+cópias seguintes só levam as capas novas, e a rotação não as apaga.
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from cinefilmesdb import CAMINHO_BANCO
+
+# Páginas copiadas por passo da API de backup (4 MiB com páginas de 4 KiB)
+PAGINAS_POR_PASSO = 1024
+# Pausa entre os passos, que deixa o disco livre para o aplicativo
+PAUSA_ENTRE_PASSOS = 0.0
+# Diretório padrão dos backups, relativo ao diretório corrente
+DIRETORIO_BACKUPS = 'backups'
+# Backups mais recentes mantidos pela rotação
+MANTER_ULTIMOS = 7
+# Nível do gzip nos trechos que comprimem (páginas de texto e índices)
+NIVEL_COMPRESSAO = 6
+# Bytes lidos e gravados por vez na compressão e na restauração
+TAMANHO_BLOCO = 1024 * 1024
+# Trechos do banco comprimidos (ou não) de uma vez, e o começo de cada um
+# que é testado antes; trechos que não ficam abaixo de PROPORCAO_MINIMA do
+# tamanho na amostra (capas em JPEG, PNG) são gravados sem compressão
+TAMANHO_TRECHO = 64 * 1024
+TAMANHO_AMOSTRA = 4096
+PROPORCAO_MINIMA = 0.9
+
+_FORMATO_DATA = '%Y%m%d-%H%M%S'
+_EXTENSOES = ('.db.gz', '.db')
+
+
+class BackupInvalido(Exception):
+    """A cópia não passou no PRAGMA integrity_check."""
+
+
+def _uri_somente_leitura(caminho: str) -> str:
+    return f'{Path(caminho).resolve().as_uri()}?mode=ro'
+
+
+def copiar_banco(origem: str, destino: str, paginas_por_passo: int = PAGINAS_POR_PASSO,
+                 pausa: float = PAUSA_ENTRE_PASSOS, ao_progresso: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Copia o banco `origem` para o arquivo `destino` (substituído) em passos de
+    `paginas_por_passo` páginas, todos vendo o banco do início da cópia.
+    ao_progresso, se informado, recebe (páginas copiadas, total de páginas).
+    Retorna o total de páginas.
+    """
+    # Origem somente leitura: a cópia não aplica migrações nem cria o arquivo se ele não existir
+    con_origem = sqlite3.connect(_uri_somente_leitura(origem), uri=True, isolation_level=None)
+    con_destino = sqlite3.connect(destino)
+    try:
+        # A transação de leitura fixa o momento copiado até o último passo
+        con_origem.execute('BEGIN')
+        con_origem.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        total = 0
+
+        def progresso(status, restantes, paginas):
+            nonlocal total
+            total = paginas
+            if ao_progresso:
+                ao_progresso(paginas - restantes, paginas)
+            if pausa:
+                time.sleep(pausa)
+
+        con_origem.backup(con_destino, pages=paginas_por_passo, progress=progresso)
+        con_origem.execute('COMMIT')
+        # A cópia herda o modo WAL da origem; um arquivo só é mais simples de guardar
+        con_destino.execute('PRAGMA journal_mode = DELETE')
+        return total
+    finally:
+        con_destino.close()
+        con_origem.close()
+
+
+def verificar_integridade(caminho: str, rapida: bool = False) -> List[str]:
+    """Problemas encontrados pelo PRAGMA integrity_check (ou quick_check); lista vazia se o banco está íntegro."""
+    con = sqlite3.connect(_uri_somente_leitura(caminho), uri=True)
+    try:
+        linhas = [linha[0] for linha in con.execute(f'PRAGMA {"quick_check" if rapida else "integrity_check"}')]
+    finally:
+        con.close()
+    return [] if linhas == ['ok'] else linhas
+
+
+def _comprimir(origem: str, destino: str, nivel: int):
+    """
+    Grava um gzip de vários membros, um por trecho de TAMANHO_TRECHO bytes:
+    só os trechos cuja amostra diminui são comprimidos com `nivel`, os outros
+    vão no nível 0. O arquivo continua legível por gzip.open e por gzip -d.
+    """
+    with open(origem, 'rb') as entrada, open(destino, 'wb') as saida:
+        while True:
+            trecho = entrada.read(TAMANHO_TRECHO)
+            if not trecho:
+                break
+            amostra = trecho[:TAMANHO_AMOSTRA]
+            comprime = len(zlib.compress(amostra, 1)) < len(amostra) * PROPORCAO_MINIMA
+            saida.write(gzip.compress(trecho, compresslevel=nivel if comprime else 0, mtime=0))
+
+
+def sincronizar_capas(diretorio_capas: str, destino: str) -> int:
+    """Copia para `destino` os arquivos de capa que ainda não estão lá; retorna quantos foram copiados."""
+    copiados = 0
+    for pasta, _, arquivos in os.walk(diretorio_capas):
+        relativa = os.path.relpath(pasta, diretorio_capas)
+        for nome in arquivos:
+            # Temporários de uma gravação em andamento no ArmazenamentoCapas
+            if nome.endswith('.tmp'):
+                continue
+            alvo = os.path.join(destino, relativa, nome)
+            if not os.path.exists(alvo):
+                os.makedirs(os.path.dirname(alvo), exist_ok=True)
+                shutil.copy2(os.path.join(pasta, nome), f'{alvo}.tmp')
+                os.replace(f'{alvo}.tmp', alvo)
+                copiados += 1
+    return copiados
+
+
+def listar_backups(destino: str = DIRETORIO_BACKUPS) -> List[tuple]:
+    """[(data e hora, caminho)] dos backups do diretório, do mais antigo para o mais recente."""
+    backups = []
+    if not os.path.isdir(destino):
+        return backups
+    for nome in os.listdir(destino):
+        for extensao in _EXTENSOES:
+            if nome.startswith('cine_filmes-') and nome.endswith(extensao):
+                try:
+                    momento = datetime.strptime(nome[len('cine_filmes-'):-len(extensao)], _FORMATO_DATA)
+                except ValueError:
+                    break
+                backups.append((momento, os.path.join(destino, nome)))
+                break
+    backups.sort()
+    return backups
+
+
+def rotacionar(destino: str = DIRETORIO_BACKUPS, manter_ultimos: int = MANTER_ULTIMOS,
+               manter_dias: int = 0, hoje: Optional[date] = None) -> List[str]:
+    """
+    Apaga os backups fora da política: ficam os `manter_ultimos` mais recentes
+    e, dos `manter_dias` dias até hoje, o mais recente de cada dia.
+    Retorna os caminhos apagados.
+    """
+    hoje = hoje or date.today()
+    backups = listar_backups(destino)
+    manter = {caminho for _, caminho in backups[-manter_ultimos:]} if manter_ultimos > 0 else set()
+    ultimo_do_dia: Dict[date, str] = {}
+    for momento, caminho in backups:
+        if (hoje - momento.date()).days < manter_dias:
+            ultimo_do_dia[momento.date()] = caminho
+    manter.update(ultimo_do_dia.values())
+
+    apagados = []
+    for _, caminho in backups:
+        if caminho not in manter:
+            os.remove(caminho)
+            apagados.append(caminho)
+    return apagados
+
+
+def fazer_backup(banco: str = CAMINHO_BANCO, destino: str = DIRETORIO_BACKUPS, comprimir: bool = True,
+                 nivel: int = NIVEL_COMPRESSAO, verificar: bool = True, manter_ultimos: int = MANTER_ULTIMOS,
+                 manter_dias: int = 0, diretorio_capas: Optional[str] = None,
+                 paginas_por_passo: int = PAGINAS_POR_PASSO, pausa: float = PAUSA_ENTRE_PASSOS,
+                 ao_progresso: Optional[Callable[[int, int], None]] = None) -> dict:
+    """
+    Copia o banco para "<destino>/cine_filmes-AAAAMMDD-HHMMSS.db.gz" (ou .db,
+    sem comprimir), conferindo a cópia antes, e aplica a rotação.
+    Se a cópia não estiver íntegra, nada é gravado e BackupInvalido é lançada.
+    Retorna {'arquivo', 'paginas', 'bytes_banco', 'bytes_backup', 'capas_copiadas',
+    'apagados', 'segundos': {'copia', 'verificacao', 'compressao', 'capas', 'total'}}.
+    """
+    inicio = time.perf_counter()
+    os.makedirs(destino, exist_ok=True)
+    momento = datetime.now()
+    final = os.path.join(destino, f'cine_filmes-{momento:{_FORMATO_DATA}}{".db.gz" if comprimir else ".db"}')
+    if os.path.exists(final):
+        raise FileExistsError(f'Já existe um backup deste segundo: {final}')
+    copia = os.path.join(destino, f'.cine_filmes-{momento:{_FORMATO_DATA}}.db.tmp')
+    segundos = {}
+
+    try:
+        paginas = copiar_banco(banco, copia, paginas_por_passo, pausa, ao_progresso)
+        segundos['copia'] = time.perf_counter() - inicio
+
+        if verificar:
+            etapa = time.perf_counter()
+            problemas = verificar_integridade(copia)
+            segundos['verificacao'] = time.perf_counter() - etapa
+            if problemas:
+                raise BackupInvalido(f'integrity_check da cópia: {"; ".join(problemas[:10])}')
+
+        bytes_banco = os.path.getsize(copia)
+        if comprimir:
+            etapa = time.perf_counter()
+            _comprimir(copia, f'{final}.tmp', nivel)
+            os.replace(f'{final}.tmp', final)
+            segundos['compressao'] = time.perf_counter() - etapa
+        else:
+            os.replace(copia, final)
+    finally:
+        for temporario in (copia, f'{final}.tmp'):
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    capas_copiadas = 0
+    if diretorio_capas and os.path.isdir(diretorio_capas):
+        etapa = time.perf_counter()
+        capas_copiadas = sincronizar_capas(diretorio_capas, os.path.join(destino, 'capas'))
+        segundos['capas'] = time.perf_counter() - etapa
+
+    apagados = rotacionar(destino, manter_ultimos, manter_dias)
+    segundos['total'] = time.perf_counter() - inicio
+    return {
+        'arquivo': final,
+        'paginas': paginas,
+        'bytes_banco': bytes_banco,
+        'bytes_backup': os.path.getsize(final),
+        'capas_copiadas': capas_copiadas,
+        'apagados': apagados,
+        'segundos': segundos,
+    }
+
+
+def restaurar(backup: str, banco: str, verificar: bool = True):
+    """
+    Recria o arquivo `banco` a partir de um backup (.db.gz ou .db). O banco
+    não pode estar aberto pelo aplicativo; o arquivo antigo só é substituído
+    depois que a cópia restaurada passa na verificação.
+    """
+    temporario = f'{banco}.restaurando'
+    try:
+        abrir = gzip.open if backup.endswith('.gz') else open
+        with abrir(backup, 'rb') as entrada, open(temporario, 'wb') as saida:
+            shutil.copyfileobj(entrada, saida, TAMANHO_BLOCO)
+        if verificar:
+            problemas = verificar_integridade(temporario)
+            if problemas:
+                raise BackupInvalido(f'integrity_check do backup: {"; ".join(problemas[:10])}')
+        for sufixo in ('-wal', '-shm'):
+            if os.path.exists(banco + sufixo):
+                os.remove(banco + sufixo)
+        os.replace(temporario, banco)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+class AgendadorBackup:
+    """
+    Faz um backup a cada `intervalo` segundos em uma thread daemon, com os
+    mesmos argumentos de fazer_backup. Um backup que falha não para o
+    agendador: o erro vai para ao_erro (se informado) e o próximo é tentado
+    no horário normal. ao_concluir recebe o resumo de cada backup feito.
+    """
+
+    def __init__(self, intervalo: float, ao_concluir: Optional[Callable[[dict], None]] = None,
+                 ao_erro: Optional[Callable[[Exception], None]] = None, **opcoes):
+        self.intervalo = intervalo
+        self.ao_concluir = ao_concluir
+        self.ao_erro = ao_erro
+        self.opcoes = opcoes
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self, imediatamente: bool = False):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._rodar, args=(imediatamente,), name='backup', daemon=True)
+        self._thread.start()
+
+    def parar(self, esperar: bool = True):
+        """Para o agendador; com esperar, aguarda o backup em andamento terminar."""
+        self._parar.set()
+        if esperar and self._thread is not None:
+            self._thread.join()
+
+    def _rodar(self, imediatamente: bool):
+        if not imediatamente and self._parar.wait(self.intervalo):
+            return
+        while True:
+            try:
+                resumo = fazer_backup(**self.opcoes)
+            except Exception as erro:
+                if self.ao_erro:
+                    self.ao_erro(erro)
+            else:
+                if self.ao_concluir:
+                    self.ao_concluir(resumo)
+            if self._parar.wait(self.intervalo):
+                return
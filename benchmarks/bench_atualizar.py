@@ -0,0 +1,109 @@
+"""
+Compara a atualização antiga (apaga e regrava todos os relacionamentos) com
+atualizar_parcial, que grava só a diferença, em filmes com elenco grande.
+Mede tempo, linhas alteradas (gatilhos incluídos) e bytes acrescentados ao WAL.
+
+Uso: python benchmarks/bench_atualizar.py [filmes] [atores por filme]
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Caminho para acessar os módulos da raiz do projeto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# O banco é criado no diretório corrente; usa um diretório temporário
+os.chdir(tempfile.mkdtemp(prefix='bench_atualizar_'))
+
+from cinefilmesdb import CAMINHO_BANCO
+from repository.filmesCRUD import FilmeRepository
+
+
+def dados_filme(i: int, atores: int) -> dict:
+    return {
+        'titulo': f'Filme {i}',
+        'resumo': f'Resumo do filme {i}',
+        'classificacao_indicativa': 12,
+        'classificacao_IMDB': 7.5,
+        'duracao_minutos': 120,
+        'data_de_lancamento': '2020-01-01',
+        'capa': None,
+        'generos': [f'Gênero {i % 20}', f'Gênero {(i + 7) % 20}'],
+        'dublagens': [f'Idioma {i % 10}', f'Idioma {(i + 3) % 10}'],
+        'legendas': [f'Idioma {i % 10}', f'Idioma {(i + 5) % 10}'],
+        'elenco': [{'ator': f'Ator {(i * 31 + k) % 5000}', 'papel': f'Papel {k}'} for k in range(atores)],
+    }
+
+
+def atualizar_substituindo(repositorio: FilmeRepository, filme_id: int, filme_dados: dict):
+    """Comportamento anterior de atualizar: UPDATE de todas as colunas, DELETE e INSERT de todas as ligações."""
+    with repositorio.banco.escrita() as con:
+        cursor = con.cursor()
+        cursor.execute('''
+            UPDATE filmes SET titulo = ?, resumo = ?, classificacao_indicativa = ?,
+                classificacao_IMDB = ?, duracao_minutos = ?, data_de_lancamento = ?, capa = ?
+            WHERE id = ?
+        ''', (filme_dados['titulo'], filme_dados['resumo'], filme_dados['classificacao_indicativa'],
+              filme_dados['classificacao_IMDB'], filme_dados['duracao_minutos'],
+              filme_dados['data_de_lancamento'], filme_dados['capa'], filme_id))
+        repositorio._remover_relacionamentos(cursor, filme_id)
+        repositorio._inserir_relacionamentos(cursor, filme_id, filme_dados)
+
+
+def medir(repositorio: FilmeRepository, nome: str, atualizar, ids: list):
+    """Roda `atualizar(filme_id)` em todos os filmes e mostra tempo, linhas alteradas e WAL."""
+    with repositorio.banco.escrita() as con:
+        pass
+    con.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    alteracoes = con.total_changes
+    inicio = time.perf_counter()
+    for filme_id in ids:
+        atualizar(filme_id)
+    duracao = time.perf_counter() - inicio
+    linhas = con.total_changes - alteracoes
+    wal = os.path.getsize(CAMINHO_BANCO + '-wal')
+    print(f'{nome:>36} {duracao:>10.3f} {linhas / len(ids):>13.1f} {wal / len(ids) / 1024:>14.1f}')
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    atores = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    repositorio = FilmeRepository()
+    dados = {i: dados_filme(i, atores) for i in range(quantidade)}
+    ids = {repositorio.criar(filme): i for i, filme in dados.items()}
+
+    print(f'{quantidade} filmes com {atores} atores cada')
+    print(f'{"atualização":>36} {"tempo (s)":>10} {"linhas/filme":>13} {"WAL/filme KiB":>14}')
+
+    def novo_resumo(filme_id):
+        return {**dados[ids[filme_id]], 'resumo': f'Resumo revisto {filme_id}'}
+
+    def troca_de_atores(filme_id):
+        filme = dados[ids[filme_id]]
+        elenco = filme['elenco'][2:] + [{'ator': f'Novo ator {filme_id}-{k}', 'papel': 'Extra'} for k in (1, 2)]
+        return {**filme, 'elenco': elenco}
+
+    medir(repositorio, 'só resumo: substituindo tudo',
+          lambda filme_id: atualizar_substituindo(repositorio, filme_id, novo_resumo(filme_id)), list(ids))
+    medir(repositorio, 'só resumo: atualizar_parcial',
+          lambda filme_id: repositorio.atualizar_parcial(filme_id, {'resumo': f'Resumo {filme_id}'}), list(ids))
+    medir(repositorio, '2 atores trocados: substituindo tudo',
+          lambda filme_id: atualizar_substituindo(repositorio, filme_id, troca_de_atores(filme_id)), list(ids))
+    # Volta ao elenco original antes de medir a mesma troca pela diferença
+    for filme_id, i in ids.items():
+        repositorio.atualizar_parcial(filme_id, {'elenco': dados[i]['elenco']})
+    medir(repositorio, '2 atores trocados: atualizar_parcial',
+          lambda filme_id: repositorio.atualizar_parcial(filme_id, {'elenco': troca_de_atores(filme_id)['elenco']}),
+          list(ids))
+
+    # Os dois caminhos precisam deixar o filme no mesmo estado
+    filme_id = next(iter(ids))
+    esperado = troca_de_atores(filme_id)
+    gravado = repositorio.buscar_por_id(filme_id)
+    if sorted(m['ator'] for m in gravado['elenco']) != sorted(m['ator'] for m in esperado['elenco']):
+        raise SystemExit('atualizar_parcial deixou um elenco diferente do esperado!')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Mede o backup (backup.py) de um catálogo de vários GB com as capas no banco:
+cópia em passos, integrity_check, compressão e restauração, com o banco
+parado e com uma thread gravando filmes durante a cópia (latência das
+gravações e recomeços da cópia). As capas são bytes aleatórios, que, como
+JPEG ou PNG, quase não comprimem.
+
+Uso: python benchmarks/bench_backup.py [GB] [bytes por capa]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Caminho para acessar os módulos da raiz do projeto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# O banco é criado no diretório corrente; usa um diretório temporário
+os.chdir(tempfile.mkdtemp(prefix='bench_backup_'))
+
+import backup
+from catalogo_sintetico import CatalogoSintetico
+from repository.filmesCRUD import FilmeRepository
+
+
+def latencias(segundos: list) -> str:
+    ordenados = sorted(segundos)
+    if not ordenados:
+        return 'nenhuma gravação'
+    p50 = ordenados[len(ordenados) // 2] * 1000
+    p99 = ordenados[min(len(ordenados) - 1, len(ordenados) * 99 // 100)] * 1000
+    return f'{len(ordenados)} gravações, p50 {p50:.1f} ms, p99 {p99:.1f} ms, máxima {ordenados[-1] * 1000:.1f} ms'
+
+
+class Escritor:
+    """Thread que cria filmes sem parar, guardando a latência de cada criar."""
+
+    def __init__(self, repositorio: FilmeRepository, catalogo: CatalogoSintetico):
+        self.repositorio = repositorio
+        self.catalogo = catalogo
+        self.proximo = catalogo.quantidade
+        self.segundos = []
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._rodar)
+
+    def _rodar(self):
+        while not self._parar.is_set():
+            inicio = time.perf_counter()
+            self.repositorio.criar(self.catalogo.filme(self.proximo))
+            self.segundos.append(time.perf_counter() - inicio)
+            self.proximo += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *erro):
+        self._parar.set()
+        self._thread.join()
+
+
+def medir_backup(nome: str, **opcoes) -> dict:
+    passos = []
+    inicio = time.perf_counter()
+    resumo = backup.fazer_backup(ao_progresso=lambda copiadas, total: passos.append(copiadas), **opcoes)
+    duracao = time.perf_counter() - inicio
+    recomecos = sum(1 for antes, depois in zip(passos, passos[1:]) if depois < antes)
+    mib = resumo['bytes_banco'] / 2 ** 20
+    etapas = ', '.join(f'{etapa} {segundos:.1f}s' for etapa, segundos in resumo['segundos'].items())
+    print(f'{nome}: {mib:.0f} MiB -> {resumo["bytes_backup"] / 2 ** 20:.0f} MiB em {duracao:.1f}s '
+          f'({mib / resumo["segundos"]["copia"]:.0f} MiB/s na cópia), {len(passos)} passos, '
+          f'{recomecos} recomeços; {etapas}')
+    return resumo
+
+
+def main():
+    gigabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    bytes_capa = int(sys.argv[2]) if len(sys.argv) > 2 else 64 * 1024
+    quantidade = int(gigabytes * 2 ** 30 / (bytes_capa + 2048))
+    catalogo = CatalogoSintetico(quantidade, proporcao_capas=1.0, bytes_capa=bytes_capa)
+    repositorio = FilmeRepository()
+
+    inicio = time.perf_counter()
+    repositorio.criar_muitos(catalogo.filmes())
+    print(f'{quantidade} filmes com capas de ~{bytes_capa // 1024} KiB: '
+          f'{os.path.getsize("cine_filmes.db") / 2 ** 30:.2f} GiB, gravados em {time.perf_counter() - inicio:.0f}s')
+
+    with Escritor(repositorio, catalogo) as escritor:
+        time.sleep(5)
+    print(f'gravações sem backup: {latencias(escritor.segundos)}')
+
+    medir_backup('backup gzip, banco parado', destino='backups')
+    medir_backup('backup sem compressão, banco parado', destino='backups', comprimir=False)
+    with Escritor(repositorio, catalogo) as escritor:
+        resumo = medir_backup('backup gzip, gravando em paralelo', destino='backups')
+    print(f'gravações durante o backup: {latencias(escritor.segundos)}')
+
+    inicio = time.perf_counter()
+    backup.restaurar(resumo['arquivo'], 'restaurado.db')
+    print(f'restauração com integrity_check: {time.perf_counter() - inicio:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
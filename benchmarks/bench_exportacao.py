@@ -0,0 +1,112 @@
+"""
+Compara a exportação em fluxo (exportar_filmes) em .csv, .jsonl e .parquet
+com o jeito antigo, listar_todos seguido de json.dump da lista inteira:
+tempo, filmes e linhas de relacionamento por segundo e pico de memória
+(tracemalloc, em uma execução separada da cronometrada). No fim, cada
+arquivo exportado é importado em um banco novo e comparado com o original,
+incluindo filmes com hífen, vírgula e ponto e vírgula nos nomes.
+
+Uso: python benchmarks/bench_exportacao.py [filmes]
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Caminho para acessar os módulos da raiz do projeto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# O banco é criado no diretório corrente; usa um diretório temporário
+os.chdir(tempfile.mkdtemp(prefix='bench_exportacao_'))
+
+from catalogo_sintetico import CatalogoSintetico
+from exportar_filmes import Exportar_filmes
+from importar_filmes import Importar_filmes
+from repository.filmesCRUD import FilmeRepository
+
+# Nomes com os separadores das colunas de lista, que a exportação escapa
+FILMES_DIFICEIS = [
+    {'titulo': 'Kickboxer', 'resumo': 'Um lutador vai à Tailândia.', 'classificacao_indicativa': 16,
+     'classificacao_IMDB': 6.4, 'duracao_minutos': 97, 'data_de_lancamento': '1989-09-08', 'capa': None,
+     'generos': ['Ação', 'Luta, Artes Marciais'], 'dublagens': ['Português'], 'legendas': ['Inglês'],
+     'elenco': [{'ator': 'Jean-Claude Van Damme', 'papel': 'Kurt Sloane'},
+                {'ator': 'Dennis Chan', 'papel': 'Xian Chow - mestre; treinador'},
+                {'ator': 'Ator - com \\ barra; e ponto', 'papel': ''}]},
+    {'titulo': 'Spider-Man', 'resumo': 'Um estudante é picado por uma aranha.', 'classificacao_indicativa': 10,
+     'classificacao_IMDB': 7.4, 'duracao_minutos': 121, 'data_de_lancamento': '2002-05-03', 'capa': None,
+     'generos': ['Sci-Fi'], 'dublagens': ['Português'], 'legendas': ['Inglês'],
+     'elenco': [{'ator': 'Willem Dafoe', 'papel': 'Norman Osborn - Green Goblin'}]},
+]
+
+
+def resumo_catalogo(repositorio: FilmeRepository) -> list:
+    """Os filmes comparáveis depois de exportar e importar (sem id nem capa)."""
+    return sorted((filme['titulo'], filme['data_de_lancamento'], sorted(filme['generos']),
+                   sorted(filme['dublagens']), sorted(filme['legendas']),
+                   sorted((membro['ator'], membro['papel'] or '') for membro in filme['elenco']))
+                  for filme in repositorio.listar_todos())
+
+
+def conferir_ida_e_volta(repositorio: FilmeRepository, arquivos: list):
+    """Importa cada arquivo exportado em um banco novo e compara com o catálogo original."""
+    original = resumo_catalogo(repositorio)
+    raiz = os.getcwd()
+    for arquivo in arquivos:
+        os.chdir(tempfile.mkdtemp(prefix='importado_', dir=raiz))
+        Importar_filmes().importar_arquivo(os.path.join(raiz, arquivo))
+        importado = resumo_catalogo(FilmeRepository())
+        os.chdir(raiz)
+        diferentes = sum(1 for a, b in zip(original, importado) if a != b) + abs(len(original) - len(importado))
+        print(f'ida e volta {arquivo}: {"ok" if not diferentes else f"{diferentes} filmes diferentes"}')
+
+
+def listar_e_gravar(repositorio: FilmeRepository, caminho: str):
+    """O jeito antigo: a lista inteira de dicionários em memória, depois gravada de uma vez."""
+    filmes = repositorio.listar_todos()
+    for filme in filmes:
+        filme['capa'] = None
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(filmes, arquivo, ensure_ascii=False)
+
+
+def medir(nome: str, quantidade: int, relacionamentos: int, exportar):
+    inicio = time.perf_counter()
+    exportar()
+    duracao = time.perf_counter() - inicio
+    gc.collect()
+    tracemalloc.start()
+    exportar()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'{nome:>30} {duracao:>10.2f} {quantidade / duracao:>12.0f} {relacionamentos / duracao:>14.0f} '
+          f'{pico / 2 ** 20:>10.1f}')
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    repositorio = FilmeRepository()
+    repositorio.criar_muitos(CatalogoSintetico(quantidade).filmes())
+    repositorio.criar_muitos(FILMES_DIFICEIS)
+    with repositorio.banco.leitura() as con:
+        relacionamentos = sum(con.execute(f'SELECT COUNT(*) FROM {tabela}').fetchone()[0]
+                              for tabela in ('filmes_generos', 'filmes_dublagens',
+                                             'filmes_legendas_disponiveis', 'elenco'))
+    exportador = Exportar_filmes()
+
+    print(f'{quantidade} filmes, {relacionamentos} linhas de relacionamento')
+    print(f'{"exportação":>30} {"tempo (s)":>10} {"filmes/s":>12} {"relac./s":>14} {"pico MiB":>10}')
+    medir('listar_todos + json.dump', quantidade, relacionamentos,
+          lambda: listar_e_gravar(repositorio, 'antigo.json'))
+    arquivos = ['catalogo.csv', 'catalogo.jsonl', 'catalogo.parquet']
+    for arquivo in arquivos:
+        medir(f'exportar_arquivo {os.path.splitext(arquivo)[1]}', quantidade, relacionamentos,
+              lambda arquivo=arquivo: exportador.exportar_arquivo(arquivo))
+    print()
+    conferir_ida_e_volta(repositorio, arquivos)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Mede o custo da instrumentação das consultas (instrumentacao.py): o execute
+da Conexao desligada comparado ao de sqlite3.Connection, e buscar_por_id e
+listar_todos com a instrumentação desligada e ligada.
+
+Uso: python benchmarks/bench_instrumentacao.py [filmes]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Caminho para acessar os módulos da raiz do projeto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# O banco é criado no diretório corrente; usa um diretório temporário
+os.chdir(tempfile.mkdtemp(prefix='bench_instrumentacao_'))
+
+import instrumentacao
+from catalogo_sintetico import CatalogoSintetico
+from repository.filmesCRUD import FilmeRepository
+
+CONSULTAS = 200_000
+BUSCAS = 5000
+
+
+def cronometrar(nome: str, vezes: int, operacao) -> float:
+    inicio = time.perf_counter()
+    for i in range(vezes):
+        operacao(i)
+    por_chamada = (time.perf_counter() - inicio) / vezes
+    print(f'{nome:>44} {por_chamada * 1e6:>12.2f}')
+    return por_chamada
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repositorio = FilmeRepository()
+    repositorio.criar_muitos(CatalogoSintetico(quantidade).filmes())
+    con = repositorio.banco.conexao_leitura()
+    sql = 'SELECT titulo FROM filmes WHERE id = ?'
+
+    print(f'{quantidade} filmes')
+    print(f'{"operação":>44} {"µs/chamada":>12}')
+    cronometrar('sqlite3.Connection.execute', CONSULTAS,
+                lambda i: sqlite3.Connection.execute(con, sql, (i % quantidade + 1,)).fetchone())
+    cronometrar('Conexao.execute, desligada', CONSULTAS,
+                lambda i: con.execute(sql, (i % quantidade + 1,)).fetchone())
+    instrumentacao.ativar()
+    cronometrar('Conexao.execute, ligada', CONSULTAS,
+                lambda i: con.execute(sql, (i % quantidade + 1,)).fetchone())
+    instrumentacao.desativar()
+
+    cronometrar('buscar_por_id, desligada', BUSCAS, lambda i: repositorio.buscar_por_id(i % quantidade + 1))
+    instrumentacao.ativar()
+    cronometrar('buscar_por_id, ligada', BUSCAS, lambda i: repositorio.buscar_por_id(i % quantidade + 1))
+    instrumentacao.desativar()
+
+    cronometrar('listar_todos, desligada', 3, lambda i: repositorio.listar_todos())
+    instrumentacao.ativar()
+    cronometrar('listar_todos, ligada', 3, lambda i: repositorio.listar_todos())
+    print()
+    print(instrumentacao.relatorio(8))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Compara o listar_todos filme a filme (1 + 4N consultas) com o carregamento
+em lote (1 + 4 consultas por página) para catálogos de tamanhos crescentes.
+
+Uso: python benchmarks/bench_listar_todos.py [tamanho ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Caminho para acessar os módulos da raiz do projeto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# O banco é criado no diretório corrente; usa um diretório temporário
+os.chdir(tempfile.mkdtemp(prefix='bench_listar_'))
+
+from cinefilmesdb import conecta
+from repository.filmesCRUD import FilmeRepository
+
+
+def popular(con, quantidade: int):
+    """Insere `quantidade` filmes com 2 gêneros, 2 dublagens, 2 legendas e 3 atores."""
+    cursor = con.cursor()
+    for tabela in ('elenco', 'filmes_legendas_disponiveis', 'filmes_dublagens',
+                   'filmes_generos', 'filmes', 'generos', 'dublagens',
+                   'legendas_disponiveis', 'atores'):
+        cursor.execute(f'DELETE FROM {tabela}')
+    cursor.executemany('INSERT INTO generos (id, nome) VALUES (?, ?)',
+                       [(i, f'Gênero {i}') for i in range(1, 21)])
+    cursor.executemany('INSERT INTO dublagens (id, idioma) VALUES (?, ?)',
+                       [(i, f'Idioma {i}') for i in range(1, 11)])
+    cursor.executemany('INSERT INTO legendas_disponiveis (id, idioma) VALUES (?, ?)',
+                       [(i, f'Idioma {i}') for i in range(1, 11)])
+    cursor.executemany('INSERT INTO atores (id, nome) VALUES (?, ?)',
+                       [(i, f'Ator {i}') for i in range(1, 1001)])
+    cursor.executemany('''
+        INSERT INTO filmes (id, titulo, resumo, classificacao_indicativa, classificacao_IMDB,
+                            duracao_minutos, data_de_lancamento, capa)
+        VALUES (?, ?, ?, ?, ?, ?, ?, NULL)
+    ''', [(i, f'Filme {i}', 'Resumo', 12, 7.5, 120, '2020-01-01') for i in range(1, quantidade + 1)])
+    for i in range(1, quantidade + 1):
+        cursor.executemany('INSERT INTO filmes_generos VALUES (?, ?)',
+                           [(i, i % 20 + 1), (i, (i + 7) % 20 + 1)])
+        cursor.executemany('INSERT INTO filmes_dublagens VALUES (?, ?)',
+                           [(i, i % 10 + 1), (i, (i + 3) % 10 + 1)])
+        cursor.executemany('INSERT INTO filmes_legendas_disponiveis VALUES (?, ?)',
+                           [(i, i % 10 + 1), (i, (i + 5) % 10 + 1)])
+        cursor.executemany('INSERT INTO elenco VALUES (?, ?, ?)',
+                           [(i, (i + k * 131) % 1000 + 1, f'Papel {k}') for k in (1, 3, 7)])
+    con.commit()
+
+
+def medir(repositorio: FilmeRepository, em_lote: bool):
+    """Retorna (segundos, consultas executadas) de uma chamada a listar_todos."""
+    consultas = 0
+
+    def contar(sql):
+        nonlocal consultas
+        if sql.lstrip().upper().startswith('SELECT'):
+            consultas += 1
+
+    repositorio.banco.conexao_leitura().set_trace_callback(contar)
+    inicio = time.perf_counter()
+    filmes = repositorio.listar_todos(em_lote=em_lote)
+    duracao = time.perf_counter() - inicio
+    repositorio.banco.conexao_leitura().set_trace_callback(None)
+    return duracao, consultas, filmes
+
+
+def main():
+    tamanhos = [int(arg) for arg in sys.argv[1:]] or [1000, 5000, 20000]
+    repositorio = FilmeRepository()
+    con = conecta()
+
+    print(f'{"filmes":>8} {"modo":>12} {"consultas":>10} {"consultas/pág.":>15} {"tempo (s)":>10}')
+    for quantidade in tamanhos:
+        popular(con, quantidade)
+        paginas = -(-quantidade // 500)
+        referencia = None
+        for em_lote in (False, True):
+            duracao, consultas, filmes = medir(repositorio, em_lote)
+            if referencia is None:
+                referencia = filmes
+            elif filmes != referencia:
+                raise SystemExit('Os dois modos retornaram resultados diferentes!')
+            modo = 'em lote' if em_lote else 'filme a filme'
+            por_pagina = (consultas - 1) / paginas
+            print(f'{quantidade:>8} {modo:>12} {consultas:>10} {por_pagina:>15.1f} {duracao:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
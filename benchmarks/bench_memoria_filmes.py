@@ -0,0 +1,84 @@
+"""
+Compara a memória retida por listar_todos com dicionários e com registros
+Filme (como_registro=True), antes e depois de ler os relacionamentos.
+
+Uso: python benchmarks/bench_memoria_filmes.py [filmes]
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Caminho para acessar os módulos da raiz do projeto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# O banco é criado no diretório corrente; usa um diretório temporário
+os.chdir(tempfile.mkdtemp(prefix='bench_memoria_'))
+
+from repository.filmesCRUD import FilmeRepository
+
+
+def popular(repositorio: FilmeRepository, quantidade: int):
+    """Cadastra filmes com 2 gêneros, 2 dublagens, 2 legendas e 8 atores."""
+    repositorio.criar_muitos({
+        'titulo': f'Filme {i}',
+        'resumo': f'Resumo do filme {i}, com algumas palavras a mais para parecer uma sinopse.',
+        'classificacao_indicativa': 12,
+        'classificacao_IMDB': (i % 100) / 10,
+        'duracao_minutos': 90 + i % 60,
+        'data_de_lancamento': '2020-01-01',
+        'capa': None,
+        'generos': [f'Gênero {i % 20}', f'Gênero {(i + 7) % 20}'],
+        'dublagens': [f'Idioma {i % 10}', f'Idioma {(i + 3) % 10}'],
+        'legendas': [f'Idioma {i % 10}', f'Idioma {(i + 5) % 10}'],
+        'elenco': [{'ator': f'Ator {(i * 31 + k) % 20000}', 'papel': f'Papel {k}'} for k in range(8)],
+    } for i in range(quantidade))
+
+
+def medir(nome: str, quantidade: int, carregar):
+    """
+    Mostra o tempo de carregar() e a memória retida pelo resultado; a memória
+    é medida em uma segunda execução, porque o tracemalloc deixa tudo mais lento.
+    """
+    inicio = time.perf_counter()
+    carregar()
+    duracao = time.perf_counter() - inicio
+    gc.collect()
+    tracemalloc.start()
+    resultado = carregar()
+    gc.collect()
+    retida, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{nome:>40} {duracao:>10.3f} {retida / quantidade:>14.0f} {pico / 2 ** 20:>10.1f}')
+    return resultado
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repositorio = FilmeRepository()
+    popular(repositorio, quantidade)
+
+    print(f'{quantidade} filmes')
+    print(f'{"resultado":>40} {"tempo (s)":>10} {"bytes/filme":>14} {"pico MiB":>10}')
+    dicionarios = medir('dicionários', quantidade, repositorio.listar_todos)
+    referencia = dicionarios[0]
+    del dicionarios
+
+    registros = medir('Filme, sem ler relacionamentos', quantidade,
+                      lambda: repositorio.listar_todos(como_registro=True))
+    del registros
+
+    def registros_carregados():
+        filmes = repositorio.listar_todos(como_registro=True)
+        filmes[0].generos
+        return filmes
+    registros = medir('Filme, com relacionamentos', quantidade, registros_carregados)
+
+    if registros[0].para_dict() != referencia:
+        raise SystemExit('para_dict() difere do dicionário de listar_todos!')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Compara criar/atualizar/deletar filme a filme com criar_muitos,
+atualizar_muitos e deletar_muitos, e com a inserção direta por executemany
+(mesmo esquema e gatilhos, sem checagens nem índice de busca aproximada),
+que serve de referência da velocidade do SQLite.
+
+Uso: python benchmarks/bench_operacoes_em_lote.py [filmes]
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Caminho para acessar os módulos da raiz do projeto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# O banco é criado no diretório corrente; usa um diretório temporário
+os.chdir(tempfile.mkdtemp(prefix='bench_lote_'))
+
+from repository.filmesCRUD import FilmeRepository
+
+
+def dados_filme(i: int, rodada: str) -> dict:
+    return {
+        'titulo': f'Filme {rodada} {i}',
+        'resumo': f'Resumo do filme {i}',
+        'classificacao_indicativa': 12,
+        'classificacao_IMDB': (i % 100) / 10,
+        'duracao_minutos': 90 + i % 60,
+        'data_de_lancamento': '2020-01-01',
+        'capa': None,
+        'generos': [f'Gênero {i % 20}', f'Gênero {(i + 7) % 20}'],
+        'dublagens': [f'Idioma {i % 10}'],
+        'legendas': [f'Idioma {(i + 5) % 10}'],
+        'elenco': [{'ator': f'Ator {(i * 31 + k) % 5000}', 'papel': f'Papel {k}'} for k in range(5)],
+    }
+
+
+def inserir_direto(repositorio: FilmeRepository, filmes: list):
+    """Referência: INSERT com executemany de filmes e ligações, ids de valores já conhecidos."""
+    with repositorio.banco.escrita() as con:
+        ids = {tabela: dict(con.execute(f'SELECT {coluna}, id FROM {tabela}'))
+               for tabela, coluna in (('generos', 'nome'), ('dublagens', 'idioma'),
+                                      ('legendas_disponiveis', 'idioma'), ('atores', 'nome'))}
+        inicio = con.execute('SELECT COALESCE(MAX(id), 0) FROM filmes').fetchone()[0] + 1
+        con.executemany('''
+            INSERT INTO filmes (id, titulo, resumo, classificacao_indicativa, classificacao_IMDB,
+                                duracao_minutos, data_de_lancamento, capa)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(inicio + i, f['titulo'], f['resumo'], f['classificacao_indicativa'], f['classificacao_IMDB'],
+               f['duracao_minutos'], f['data_de_lancamento'], f['capa']) for i, f in enumerate(filmes)])
+        con.executemany('INSERT INTO filmes_generos VALUES (?, ?)',
+                        [(inicio + i, ids['generos'][g]) for i, f in enumerate(filmes) for g in f['generos']])
+        con.executemany('INSERT INTO filmes_dublagens VALUES (?, ?)',
+                        [(inicio + i, ids['dublagens'][d]) for i, f in enumerate(filmes) for d in f['dublagens']])
+        con.executemany('INSERT INTO filmes_legendas_disponiveis VALUES (?, ?)',
+                        [(inicio + i, ids['legendas_disponiveis'][l]) for i, f in enumerate(filmes)
+                         for l in f['legendas']])
+        con.executemany('INSERT INTO elenco VALUES (?, ?, ?)',
+                        [(inicio + i, ids['atores'][m['ator']], m['papel']) for i, f in enumerate(filmes)
+                         for m in f['elenco']])
+
+
+def cronometrar(nome: str, quantidade: int, operacao, referencia: float = None) -> float:
+    inicio = time.perf_counter()
+    operacao()
+    duracao = time.perf_counter() - inicio
+    fator = f'{duracao / referencia:>8.1f}x' if referencia else f'{"":>9}'
+    print(f'{nome:>38} {duracao:>10.3f} {quantidade / duracao:>12.0f} {fator}')
+    return duracao
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repositorio = FilmeRepository()
+
+    # Cadastra os valores antes, para a referência não precisar criá-los
+    repositorio.criar_muitos([dados_filme(i, 'aquecimento') for i in range(5000)])
+
+    print(f'{quantidade} filmes')
+    print(f'{"operação":>38} {"tempo (s)":>10} {"filmes/s":>12} {"vs direto":>9}')
+    direto = cronometrar('INSERT direto com executemany', quantidade,
+                         lambda: inserir_direto(repositorio, [dados_filme(i, 'direto') for i in range(quantidade)]))
+
+    criados = []
+    cronometrar('criar filme a filme', quantidade,
+                lambda: criados.extend(repositorio.criar(dados_filme(i, 'um')) for i in range(quantidade)), direto)
+    em_lote = []
+    cronometrar('criar_muitos', quantidade,
+                lambda: em_lote.extend(repositorio.criar_muitos(dados_filme(i, 'lote') for i in range(quantidade))),
+                direto)
+    repetidos = repositorio.criar_muitos(dados_filme(i, 'lote') for i in range(quantidade))
+    if any(repetidos):
+        raise SystemExit('criar_muitos gravou filmes já cadastrados!')
+
+    def alteracao(filme_id):
+        return {'resumo': f'Revisto {filme_id}', 'generos': ['Gênero 1', 'Gênero 2'],
+                'elenco': [{'ator': f'Ator {filme_id % 5000}', 'papel': 'Principal'}]}
+
+    cronometrar('atualizar_parcial filme a filme', quantidade,
+                lambda: [repositorio.atualizar_parcial(filme_id, alteracao(filme_id)) for filme_id in criados], direto)
+    cronometrar('atualizar_muitos', quantidade,
+                lambda: repositorio.atualizar_muitos((filme_id, alteracao(filme_id)) for filme_id in em_lote), direto)
+    cronometrar('deletar filme a filme', quantidade,
+                lambda: [repositorio.deletar(filme_id) for filme_id in criados], direto)
+    cronometrar('deletar_muitos', quantidade, lambda: repositorio.deletar_muitos(em_lote), direto)
+
+
+if __name__ == '__main__':
+    main()
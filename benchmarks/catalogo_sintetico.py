@@ -0,0 +1,209 @@
+"""
+Gera catálogos sintéticos e determinísticos (a mesma semente gera sempre os
+mesmos filmes), com distribuição de gêneros, idiomas e elenco parecida com a
+de um catálogo real: poucos gêneros e idiomas muito comuns, muitos atores que
+aparecem em poucos filmes e alguns que aparecem em muitos. Os filmes saem no
+formato do FilmeRepository (criar/criar_muitos) ou como arquivo de importação
+(.csv, .xlsx ou .jsonl, nas colunas de importar_filmes.COLUNAS_PLANILHA),
+opcionalmente com capas gravadas em arquivos.
+
+Uso: python benchmarks/catalogo_sintetico.py filmes arquivo.(csv|xlsx|jsonl) [--capas 0.1] [--semente 42]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+# Caminho para acessar os módulos da raiz do projeto
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from importar_filmes import COLUNAS_PLANILHA
+
+SEMENTE = 42
+
+GENEROS = ('Drama', 'Comédia', 'Ação', 'Suspense', 'Romance', 'Terror', 'Aventura', 'Crime',
+           'Ficção científica', 'Animação', 'Documentário', 'Fantasia', 'Mistério', 'Família',
+           'Musical', 'Guerra', 'Faroeste', 'Biografia', 'História', 'Esporte')
+IDIOMAS = ('Português', 'Inglês', 'Espanhol', 'Francês', 'Alemão', 'Italiano', 'Japonês',
+           'Coreano', 'Mandarim', 'Russo', 'Hindi', 'Árabe', 'Sueco', 'Polonês', 'Turco')
+PAPEIS = ('Protagonista', 'Antagonista', 'Coadjuvante', 'Narrador', 'Participação especial')
+CLASSIFICACOES = (0, 10, 12, 14, 16, 18)
+
+# Palavras dos títulos; cada filme recebe uma combinação única de três delas
+PALAVRAS_TITULO = 400
+# Atores distintos por filme do catálogo (com no mínimo MINIMO_ATORES)
+ATORES_POR_FILME = 0.4
+MINIMO_ATORES = 200
+# Primeiro dia das datas de lançamento e quantidade de dias possíveis
+PRIMEIRA_DATA = date(1920, 1, 1)
+DIAS_LANCAMENTO = 105 * 365
+
+_SILABAS = ('ba', 'be', 'bi', 'bo', 'ca', 'ce', 'da', 'de', 'do', 'fa', 'fi', 'ga', 'la', 'le', 'li',
+            'lu', 'ma', 'me', 'mi', 'mo', 'na', 'ne', 'no', 'pa', 'pe', 'ra', 're', 'ri', 'ro', 'sa',
+            'se', 'so', 'ta', 'te', 'ti', 'to', 'va', 've', 'vi', 'za', 'lha', 'nho', 'cha', 'tra')
+
+
+def _pesos_zipf(quantidade: int, expoente: float = 1.0) -> List[float]:
+    """Pesos acumulados em que o item k é escolhido com probabilidade proporcional a 1 / k^expoente."""
+    acumulados, total = [], 0.0
+    for k in range(1, quantidade + 1):
+        total += 1 / k ** expoente
+        acumulados.append(total)
+    return acumulados
+
+
+def _palavras(rng: random.Random, quantidade: int, silabas: range) -> List[str]:
+    """Palavras inventadas e distintas, com a primeira letra maiúscula."""
+    palavras = set()
+    while len(palavras) < quantidade:
+        palavras.add(''.join(rng.choice(_SILABAS) for _ in range(rng.choice(silabas))).capitalize())
+    return sorted(palavras)
+
+
+class CatalogoSintetico:
+    """
+    Gera `quantidade` filmes determinísticos a partir da semente. Com
+    proporcao_capas > 0, essa fração dos filmes recebe uma capa de
+    `bytes_capa` bytes (em média), também determinística.
+    """
+
+    def __init__(self, quantidade: int, semente: int = SEMENTE, proporcao_capas: float = 0.0,
+                 bytes_capa: int = 32 * 1024):
+        self.quantidade = quantidade
+        self.semente = semente
+        self.proporcao_capas = proporcao_capas
+        self.bytes_capa = bytes_capa
+
+        rng = random.Random(semente)
+        self.palavras = _palavras(rng, PALAVRAS_TITULO, range(2, 4))
+        nomes = _palavras(rng, 300, range(2, 4))
+        sobrenomes = _palavras(rng, 600, range(2, 5))
+        atores = set()
+        while len(atores) < max(MINIMO_ATORES, int(quantidade * ATORES_POR_FILME)):
+            atores.add(f'{rng.choice(nomes)} {rng.choice(sobrenomes)}')
+        # Ordem embaralhada para os atores mais frequentes não serem os de nome "menor"
+        self.atores = sorted(atores)
+        rng.shuffle(self.atores)
+
+        self._pesos_generos = _pesos_zipf(len(GENEROS), 0.8)
+        self._pesos_idiomas = _pesos_zipf(len(IDIOMAS), 1.2)
+        self._pesos_atores = _pesos_zipf(len(self.atores), 0.9)
+
+    def _escolher(self, rng: random.Random, valores, pesos: List[float], quantidade: int) -> List:
+        """Até `quantidade` valores distintos, sorteados com os pesos acumulados."""
+        escolhidos = rng.choices(valores, cum_weights=pesos, k=quantidade)
+        return list(dict.fromkeys(escolhidos))
+
+    def titulo(self, i: int) -> str:
+        """Título único do filme i: três palavras, definidas por i embaralhado."""
+        base = len(self.palavras)
+        j = (i * 7919 + 104729) % base ** 3
+        return ' '.join(self.palavras[(j // base ** k) % base] for k in range(3))
+
+    def capa(self, i: int) -> Optional[bytes]:
+        """Bytes da capa do filme i, ou None se ele não tem capa."""
+        rng = random.Random(f'{self.semente}:capa:{i}')
+        if rng.random() >= self.proporcao_capas:
+            return None
+        tamanho = rng.randint(self.bytes_capa // 2, self.bytes_capa * 3 // 2)
+        return rng.randbytes(tamanho)
+
+    def filme(self, i: int, com_capa: bool = True) -> Dict[str, Any]:
+        """Filme i no formato do FilmeRepository; sem com_capa, 'capa' é sempre None."""
+        rng = random.Random(f'{self.semente}:{i}')
+        dublagens = self._escolher(rng, IDIOMAS, self._pesos_idiomas, rng.randint(1, 5))
+        legendas = self._escolher(rng, IDIOMAS, self._pesos_idiomas, rng.randint(2, 10))
+        atores = self._escolher(rng, self.atores, self._pesos_atores, rng.randint(4, 20))
+        return {
+            'titulo': self.titulo(i),
+            'resumo': ' '.join(rng.choices(self.palavras, k=rng.randint(15, 60))).capitalize() + '.',
+            'classificacao_indicativa': rng.choice(CLASSIFICACOES),
+            'classificacao_IMDB': round(min(10.0, max(1.0, rng.gauss(6.5, 1.2))), 1),
+            'duracao_minutos': max(60, int(rng.gauss(110, 20))),
+            'data_de_lancamento': (PRIMEIRA_DATA + timedelta(days=rng.randrange(DIAS_LANCAMENTO))).isoformat(),
+            'capa': self.capa(i) if com_capa else None,
+            'generos': self._escolher(rng, GENEROS, self._pesos_generos, rng.randint(1, 3)),
+            'dublagens': dublagens,
+            'legendas': legendas,
+            'elenco': [{'ator': ator, 'papel': rng.choice(PAPEIS)} for ator in atores],
+        }
+
+    def filmes(self, inicio: int = 0, fim: Optional[int] = None, com_capa: bool = True) -> Iterator[Dict[str, Any]]:
+        """Filmes de `inicio` até `fim` (exclusive; por padrão, o catálogo inteiro)."""
+        for i in range(inicio, self.quantidade if fim is None else fim):
+            yield self.filme(i, com_capa)
+
+    def linhas_planilha(self, diretorio_capas: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Filmes no formato das planilhas de importação. As capas são gravadas em
+        diretorio_capas e a coluna capa traz o caminho relativo ao diretório pai
+        dele (onde fica o arquivo de importação); sem diretório, não há capas.
+        """
+        for i in range(self.quantidade):
+            filme = self.filme(i, com_capa=diretorio_capas is not None)
+            capa = filme.pop('capa')
+            if capa is not None:
+                nome = f'{i:07d}.jpg'
+                with open(os.path.join(diretorio_capas, nome), 'wb') as arquivo:
+                    arquivo.write(capa)
+                capa = f'{os.path.basename(diretorio_capas)}/{nome}'
+            filme['capa'] = capa
+            filme['generos'] = ', '.join(filme['generos'])
+            filme['dublagens_disponiveis'] = ', '.join(filme.pop('dublagens'))
+            filme['legendas_disponiveis'] = ', '.join(filme.pop('legendas'))
+            filme['elenco'] = '; '.join(f"{membro['ator']} - {membro['papel']}" for membro in filme['elenco'])
+            yield filme
+
+    def escrever_arquivo(self, caminho: str) -> str:
+        """
+        Grava o catálogo em um arquivo de importação (.csv, .xlsx ou .jsonl). Com
+        capas, elas vão para o diretório "capas" ao lado do arquivo.
+        Retorna o caminho do arquivo.
+        """
+        extensao = os.path.splitext(caminho)[1].lower()
+        diretorio_capas = None
+        if self.proporcao_capas > 0:
+            diretorio_capas = os.path.join(os.path.dirname(os.path.abspath(caminho)), 'capas')
+            os.makedirs(diretorio_capas, exist_ok=True)
+        linhas = self.linhas_planilha(diretorio_capas)
+
+        if extensao == '.csv':
+            with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+                escritor = csv.DictWriter(arquivo, fieldnames=COLUNAS_PLANILHA)
+                escritor.writeheader()
+                escritor.writerows(linhas)
+        elif extensao in ('.jsonl', '.ndjson'):
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                for linha in linhas:
+                    arquivo.write(json.dumps(linha, ensure_ascii=False) + '\n')
+        elif extensao == '.xlsx':
+            from openpyxl import Workbook
+
+            pasta = Workbook(write_only=True)
+            planilha = pasta.create_sheet()
+            planilha.append(COLUNAS_PLANILHA)
+            for linha in linhas:
+                planilha.append([linha[coluna] for coluna in COLUNAS_PLANILHA])
+            pasta.save(caminho)
+        else:
+            raise ValueError(f'Formato de arquivo não suportado: "{extensao}".')
+        return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera um arquivo de importação com filmes sintéticos.')
+    parser.add_argument('filmes', type=int)
+    parser.add_argument('arquivo', help='arquivo .csv, .xlsx ou .jsonl a gravar')
+    parser.add_argument('--capas', type=float, default=0.0, help='fração dos filmes com capa (0 a 1)')
+    parser.add_argument('--bytes-capa', type=int, default=32 * 1024, help='tamanho médio das capas')
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    args = parser.parse_args()
+    CatalogoSintetico(args.filmes, args.semente, args.capas, args.bytes_capa).escrever_arquivo(args.arquivo)
+
+
+if __name__ == '__main__':
+    main()
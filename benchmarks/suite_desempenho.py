@@ -0,0 +1,344 @@
+"""
+Suíte de desempenho repetível: gera catálogos sintéticos (catalogo_sintetico.py),
+importa cada um a partir de arquivos .csv/.xlsx/.jsonl com Importar_filmes e
+mede no banco importado listar_todos, buscar_por_id, criar, atualizar e
+deletar do FilmeRepository. Para cada operação grava em JSON as latências
+(média, p50, p95, p99 e máxima), os comandos SQL executados por operação
+(cada linha de um executemany conta; os comandos dos gatilhos, não) e o pico
+de memória do Python. Contagem de comandos e tracemalloc deixam o código mais
+lento, então são medidos em chamadas à parte, fora das cronometradas. Com
+--comparar, mostra a variação em relação a um JSON de outra execução, para
+comparar commits.
+
+Uso: python benchmarks/suite_desempenho.py [--tamanhos 1000 100000 1000000]
+         [--formatos csv xlsx jsonl] [--capas 0.1] [--saida resultado.json] [--comparar anterior.json]
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Caminho para acessar os módulos da raiz do projeto
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(RAIZ)
+
+from catalogo_sintetico import SEMENTE, CatalogoSintetico
+from cinefilmesdb import gerenciador
+from importar_filmes import Importar_filmes
+from repository.filmesCRUD import FilmeRepository
+
+# Chamadas extras de cada operação, fora das cronometradas, usadas para contar os comandos SQL
+AMOSTRAS_CONTAGEM = 20
+# Chamadas cronometradas de listar_todos, que lê o catálogo inteiro
+REPETICOES_LISTAGEM = 3
+# Acima desta quantidade de filmes, listar_todos com dicionários só roda com --maximo-listar maior
+MAXIMO_LISTAR = 200_000
+
+
+class ContadorComandos:
+    """
+    Callback de set_trace_callback que conta os comandos SQL executados.
+    Os comandos dos gatilhos chegam como comentários ("-- ...") e não contam.
+    """
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, sql: str):
+        if not sql.startswith('--'):
+            self.total += 1
+
+    def observar(self, banco):
+        """Passa a contar os comandos das conexões de leitura (desta thread) e de escrita do banco."""
+        banco.conexao_leitura().set_trace_callback(self)
+        with banco.escrita() as con:
+            con.set_trace_callback(self)
+
+    @staticmethod
+    def parar(banco):
+        banco.conexao_leitura().set_trace_callback(None)
+        with banco.escrita() as con:
+            con.set_trace_callback(None)
+
+
+def percentil(ordenados: List[float], p: float) -> float:
+    """Percentil p (0 a 100) de uma lista ordenada, pelo método do posto mais próximo."""
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def resumir_latencias(segundos: List[float]) -> Dict[str, float]:
+    """Média, p50, p95, p99 e máxima das latências, em milissegundos."""
+    ordenados = sorted(segundos)
+    return {
+        'media_ms': sum(ordenados) / len(ordenados) * 1000,
+        'p50_ms': percentil(ordenados, 50) * 1000,
+        'p95_ms': percentil(ordenados, 95) * 1000,
+        'p99_ms': percentil(ordenados, 99) * 1000,
+        'maximo_ms': ordenados[-1] * 1000,
+    }
+
+
+def pico_memoria(funcao: Callable[[], Any]) -> int:
+    """Pico de memória alocada pelo Python durante a chamada, em bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        funcao()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def medir_chamadas(banco, chamadas: List[Callable[[], Any]], contadas: int = AMOSTRAS_CONTAGEM) -> Dict[str, Any]:
+    """
+    Cronometra as chamadas uma a uma, menos as `contadas` últimas, que só
+    servem para contar os comandos SQL por chamada.
+    """
+    cronometradas, extras = chamadas[:len(chamadas) - contadas], chamadas[len(chamadas) - contadas:]
+    segundos = []
+    for chamada in cronometradas:
+        inicio = time.perf_counter()
+        chamada()
+        segundos.append(time.perf_counter() - inicio)
+
+    contador = ContadorComandos()
+    contador.observar(banco)
+    try:
+        for chamada in extras:
+            chamada()
+    finally:
+        ContadorComandos.parar(banco)
+    return {'amostras': len(cronometradas), **resumir_latencias(segundos),
+            'comandos_por_operacao': contador.total / len(extras)}
+
+
+def medir_importacao(caminho: str, medir_memoria: bool) -> Dict[str, Any]:
+    """
+    Importa o arquivo em um banco novo no diretório corrente e resume a
+    importação. Com medir_memoria, importa de novo em outro banco para medir
+    o pico de memória e contar os comandos SQL.
+    """
+    resumo = Importar_filmes().importar_arquivo(caminho)
+    resultado = {
+        'linhas': resumo['linhas'],
+        'filmes': resumo['filmes'],
+        'duplicados': resumo['duplicados'],
+        'rejeitadas': len(resumo['rejeitadas']),
+        'segundos': resumo['segundos'],
+        'linhas_por_segundo': resumo['linhas_por_segundo'],
+        'etapas': resumo['etapas'],
+    }
+    if medir_memoria:
+        diretorio = os.getcwd()
+        os.chdir(tempfile.mkdtemp(dir=diretorio))
+        try:
+            outro = Importar_filmes()
+            contador = ContadorComandos()
+            contador.observar(outro.banco)
+            resultado['pico_memoria_bytes'] = pico_memoria(lambda: outro.importar_arquivo(caminho))
+            resultado['comandos_por_linha'] = contador.total / max(1, resumo['linhas'])
+            outro.banco.fechar()
+        finally:
+            os.chdir(diretorio)
+    return resultado
+
+
+def medir_repositorio(catalogo: CatalogoSintetico, amostras: int, maximo_listar: int,
+                      medir_memoria: bool) -> Dict[str, Any]:
+    """Mede as operações do FilmeRepository no banco do diretório corrente, já com o catálogo."""
+    repositorio = FilmeRepository()
+    banco = repositorio.banco
+    rng = random.Random(f'{catalogo.semente}:operacoes')
+    with banco.leitura() as con:
+        ids = [linha[0] for linha in con.execute('SELECT id FROM filmes ORDER BY id')]
+    resultado: Dict[str, Any] = {}
+
+    listagens = {'listar_todos': lambda: repositorio.listar_todos(),
+                 'listar_todos_registro': lambda: repositorio.listar_todos(como_registro=True)}
+    for nome, listar in listagens.items():
+        if nome == 'listar_todos' and len(ids) > maximo_listar:
+            resultado[nome] = {'pulado': f'mais de {maximo_listar} filmes (use --maximo-listar)'}
+            continue
+        resultado[nome] = medir_chamadas(banco, [listar] * (REPETICOES_LISTAGEM + 1), contadas=1)
+        if medir_memoria:
+            resultado[nome]['pico_memoria_bytes'] = pico_memoria(listar)
+
+    chamadas = amostras + AMOSTRAS_CONTAGEM
+    buscados = rng.choices(ids, k=chamadas)
+    resultado['buscar_por_id'] = medir_chamadas(
+        banco, [lambda filme_id=filme_id: repositorio.buscar_por_id(filme_id) for filme_id in buscados])
+
+    # Filmes novos vêm depois do fim do catálogo, com títulos que ainda não existem
+    novos = [catalogo.filme(catalogo.quantidade + k) for k in range(chamadas)]
+    criados = []
+    resultado['criar'] = medir_chamadas(
+        banco, [lambda filme=filme: criados.append(repositorio.criar(filme)) for filme in novos])
+    if None in criados:
+        raise RuntimeError('criar recusou um filme novo do catálogo sintético')
+
+    # atualizar recebe o filme inteiro: os dados de outro filme sintético, que mudam todos os campos
+    alterados = rng.sample(ids, min(chamadas, len(ids)))
+    substitutos = [catalogo.filme(catalogo.quantidade + chamadas + k) for k in range(len(alterados))]
+    resultado['atualizar'] = medir_chamadas(
+        banco, [lambda filme_id=filme_id, dados=dados: repositorio.atualizar(filme_id, dados)
+                for filme_id, dados in zip(alterados, substitutos)])
+
+    removidos = rng.sample(ids, min(chamadas, len(ids)))
+    resultado['deletar'] = medir_chamadas(
+        banco, [lambda filme_id=filme_id: repositorio.deletar(filme_id) for filme_id in removidos])
+    return resultado
+
+
+def medir_filmes_crud() -> Dict[str, Any]:
+    """O Filmes_CRUD antigo (filmesCRUD.py da raiz) depende do pacote database, que não existe mais."""
+    try:
+        from filmesCRUD import Filmes_CRUD
+    except ImportError as erro:
+        return {'pulado': f'filmesCRUD.Filmes_CRUD não pode ser importado: {erro}'}
+    crud = Filmes_CRUD()
+    inicio = time.perf_counter()
+    filmes = crud.listar_todos()
+    return {'listar_todos_segundos': time.perf_counter() - inicio, 'filmes': len(filmes)}
+
+
+def medir_cenario(quantidade: int, args) -> Dict[str, Any]:
+    """Gera o catálogo, importa-o em cada formato e mede o repositório no banco do primeiro formato."""
+    catalogo = CatalogoSintetico(quantidade, args.semente, args.capas, args.bytes_capa)
+    cenario: Dict[str, Any] = {'filmes': quantidade, 'importacao': {}}
+    base = tempfile.mkdtemp(prefix=f'suite_{quantidade}_')
+    try:
+        for formato in args.formatos:
+            diretorio = os.path.join(base, formato)
+            os.makedirs(diretorio)
+            os.chdir(diretorio)
+            inicio = time.perf_counter()
+            arquivo = catalogo.escrever_arquivo(os.path.join(diretorio, f'catalogo.{formato}'))
+            geracao = time.perf_counter() - inicio
+            print(f'  {quantidade} filmes: {formato} gerado em {geracao:.1f} s, importando...', flush=True)
+            cenario['importacao'][formato] = medir_importacao(arquivo, not args.sem_memoria)
+            cenario['importacao'][formato]['segundos_geracao_arquivo'] = geracao
+            cenario['importacao'][formato]['bytes_arquivo'] = os.path.getsize(arquivo)
+
+            if formato == args.formatos[0]:
+                print(f'  {quantidade} filmes: medindo o repositório...', flush=True)
+                cenario['repositorio'] = medir_repositorio(catalogo, args.amostras, args.maximo_listar,
+                                                           not args.sem_memoria)
+                cenario['bytes_banco'] = os.path.getsize('cine_filmes.db')
+            gerenciador().fechar()
+    finally:
+        os.chdir(RAIZ)
+        if args.manter:
+            print(f'  arquivos mantidos em {base}')
+        else:
+            shutil.rmtree(base, ignore_errors=True)
+    return cenario
+
+
+def metadados(args) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'plataforma': platform.platform(),
+        'processadores': os.cpu_count(),
+        'argumentos': {chave: valor for chave, valor in vars(args).items() if chave not in ('saida', 'comparar')},
+    }
+
+
+def _operacoes(resultado: dict) -> Dict[tuple, dict]:
+    """{(filmes, operação): medidas} das operações do repositório de um resultado da suíte."""
+    return {(cenario['filmes'], nome): medidas
+            for cenario in resultado['cenarios']
+            for nome, medidas in cenario.get('repositorio', {}).items() if 'pulado' not in medidas}
+
+
+def comparar(anterior: dict, atual: dict):
+    """Mostra p50 e p95 de cada operação e a velocidade de importação, antes e agora."""
+    print(f'\ncomparação com o commit {(anterior["metadados"]["commit"] or "?")[:10]}')
+    print(f'{"filmes":>9} {"operação":>24} {"p50 antes":>10} {"p50 agora":>10} {"p95 antes":>10} '
+          f'{"p95 agora":>10} {"p95 agora/antes":>16}')
+    antes = _operacoes(anterior)
+    for chave, medidas in _operacoes(atual).items():
+        if chave not in antes:
+            continue
+        velho = antes[chave]
+        print(f'{chave[0]:>9} {chave[1]:>24} {velho["p50_ms"]:>10.2f} {medidas["p50_ms"]:>10.2f} '
+              f'{velho["p95_ms"]:>10.2f} {medidas["p95_ms"]:>10.2f} {medidas["p95_ms"] / velho["p95_ms"]:>15.2f}x')
+
+    importacoes = {(cenario['filmes'], formato): medidas['linhas_por_segundo']
+                   for cenario in anterior['cenarios'] for formato, medidas in cenario['importacao'].items()}
+    for cenario in atual['cenarios']:
+        for formato, medidas in cenario['importacao'].items():
+            velho = importacoes.get((cenario['filmes'], formato))
+            if velho:
+                print(f'{cenario["filmes"]:>9} {"importar " + formato:>24} {velho:>10.0f} linhas/s -> '
+                      f'{medidas["linhas_por_segundo"]:.0f} linhas/s ({medidas["linhas_por_segundo"] / velho:.2f}x)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede o repositório e a importação com catálogos sintéticos.')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 100_000],
+                        help='filmes de cada catálogo (por exemplo 1000 100000 1000000)')
+    parser.add_argument('--formatos', nargs='+', default=['csv'], choices=['csv', 'xlsx', 'jsonl'],
+                        help='arquivos de importação gerados; o banco do primeiro é usado nas operações')
+    parser.add_argument('--capas', type=float, default=0.0, help='fração dos filmes com capa (0 a 1)')
+    parser.add_argument('--bytes-capa', type=int, default=32 * 1024, help='tamanho médio das capas')
+    parser.add_argument('--amostras', type=int, default=500, help='chamadas medidas por operação')
+    parser.add_argument('--maximo-listar', type=int, default=MAXIMO_LISTAR,
+                        help='maior catálogo em que listar_todos (dicionários) é medido')
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    parser.add_argument('--sem-memoria', action='store_true', help='não mede o pico de memória')
+    parser.add_argument('--manter', action='store_true', help='mantém os arquivos e bancos gerados')
+    parser.add_argument('--saida', help='arquivo JSON do resultado (padrão: suite_<commit>_<data>.json)')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparar')
+    args = parser.parse_args()
+
+    resultado = {'metadados': metadados(args), 'cenarios': []}
+    for quantidade in args.tamanhos:
+        print(f'catálogo de {quantidade} filmes', flush=True)
+        resultado['cenarios'].append(medir_cenario(quantidade, args))
+    resultado['filmes_crud_antigo'] = medir_filmes_crud()
+
+    commit = (resultado['metadados']['commit'] or 'sem_commit')[:10]
+    saida = args.saida or f'suite_{commit}_{datetime.now():%Y%m%d_%H%M%S}.json'
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    print(f'resultado gravado em {saida}')
+
+    for cenario in resultado['cenarios']:
+        print(f'\n{cenario["filmes"]} filmes')
+        for formato, medidas in cenario['importacao'].items():
+            print(f'{"importar " + formato:>24} {medidas["segundos"]:>9.2f} s {medidas["linhas_por_segundo"]:>10.0f} '
+                  f'linhas/s')
+        for nome, medidas in cenario['repositorio'].items():
+            if 'pulado' in medidas:
+                print(f'{nome:>24} pulado: {medidas["pulado"]}')
+            else:
+                print(f'{nome:>24} p50 {medidas["p50_ms"]:>9.2f} ms  p95 {medidas["p95_ms"]:>9.2f} ms  '
+                      f'{medidas["comandos_por_operacao"]:>7.1f} comandos')
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            comparar(json.load(arquivo), resultado)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,86 +1,155 @@
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
+import instrumentacao
+from repository.cache_ids import transacao
+from migracoes import migrar
 
-#cria o banco cine_filmes
-def conecta():
-    return sqlite3.connect('cine_filmes.db')
+#arquivo do banco, relativo ao diretório corrente
+CAMINHO_BANCO = 'cine_filmes.db'
+#cache de páginas por conexão, em KiB (64 MiB)
+CACHE_PAGINAS_KIB = 64 * 1024
+#trecho do arquivo lido por mmap, em bytes (256 MiB)
+MMAP_BYTES = 256 * 1024 * 1024
+#tempo que uma conexão espera pela trava de escrita de outra antes de falhar
+ESPERA_TRAVA_MS = 5000
 
-#Cria as tabelas do banco cine_filmes.db
+#conexão que guarda o caminho do arquivo do banco (usado pelo cache de ids)
+#e que, com a instrumentação ligada (instrumentacao.ativar), mede os comandos
+class Conexao(sqlite3.Connection):
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.caminho = os.path.abspath(database)
+
+    def cursor(self, factory=sqlite3.Cursor):
+        if factory is sqlite3.Cursor and instrumentacao.ativa():
+            factory = instrumentacao.CursorInstrumentado
+        return super().cursor(factory)
+
+    #o execute da conexão não passa por cursor(), então também é desviado
+    def execute(self, sql, parametros=()):
+        if instrumentacao.ativa():
+            return self.cursor().execute(sql, parametros)
+        return super().execute(sql, parametros)
+
+    def executemany(self, sql, sequencia):
+        if instrumentacao.ativa():
+            return self.cursor().executemany(sql, sequencia)
+        return super().executemany(sql, sequencia)
+
+#aplica os pragmas usados por todas as conexões: WAL (leitores não esperam
+#pelo escritor), chaves estrangeiras, cache de páginas e leitura por mmap
+def configurar(con):
+    con.execute('PRAGMA journal_mode = WAL')
+    con.execute('PRAGMA synchronous = NORMAL')
+    con.execute('PRAGMA foreign_keys = ON')
+    con.execute(f'PRAGMA cache_size = -{CACHE_PAGINAS_KIB}')
+    con.execute(f'PRAGMA mmap_size = {MMAP_BYTES}')
+    con.execute(f'PRAGMA busy_timeout = {ESPERA_TRAVA_MS}')
+    return con
+
+_migrados = set()
+_trava_migracao = threading.Lock()
+
+#abre o banco cine_filmes; a primeira conexão do processo a cada arquivo
+#aplica as migrações pendentes do esquema (migracoes.py)
+def conecta(caminho=CAMINHO_BANCO, **opcoes):
+    con = configurar(sqlite3.connect(caminho, factory=Conexao, **opcoes))
+    #bancos em memória são novos a cada conexão
+    if caminho == ':memory:':
+        migrar(con)
+    elif con.caminho not in _migrados:
+        with _trava_migracao:
+            if con.caminho not in _migrados:
+                migrar(con)
+                _migrados.add(con.caminho)
+    return con
+
+#gerencia as conexões de um banco: uma conexão de leitura por thread e
+#uma única conexão de escrita, usada por uma thread de cada vez
+class GerenciadorConexoes:
+    def __init__(self, caminho=CAMINHO_BANCO):
+        self.caminho = os.path.abspath(caminho)
+        self._local = threading.local()
+        self._trava = threading.Lock()
+        self._trava_escrita = threading.RLock()
+        self._escritor = None
+        self._profundidade_escrita = 0
+        self._leitores = []
+
+    #conexão de leitura da thread atual, criada no primeiro uso
+    def conexao_leitura(self):
+        con = getattr(self._local, 'conexao', None)
+        if con is None:
+            #só a thread dona usa a conexão; check_same_thread=False permite fechá-la em fechar()
+            con = conecta(self.caminho, isolation_level=None, check_same_thread=False)
+            con.execute('PRAGMA query_only = ON')
+            self._local.conexao = con
+            self._local.profundidade = 0
+            with self._trava:
+                self._leitores.append(con)
+        return con
+
+    #todas as consultas dentro do bloco enxergam o mesmo estado do banco
+    @contextmanager
+    def leitura(self):
+        con = self.conexao_leitura()
+        if self._local.profundidade == 0:
+            con.execute('BEGIN')
+        self._local.profundidade += 1
+        try:
+            yield con
+        finally:
+            self._local.profundidade -= 1
+            if self._local.profundidade == 0:
+                con.execute('COMMIT')
+
+    #transação de escrita; as threads escrevem uma de cada vez e um bloco
+    #dentro de outro na mesma thread faz parte da mesma transação
+    @contextmanager
+    def escrita(self):
+        with self._trava_escrita:
+            if self._escritor is None:
+                self._escritor = conecta(self.caminho, check_same_thread=False)
+            if self._profundidade_escrita:
+                self._profundidade_escrita += 1
+                try:
+                    yield self._escritor
+                finally:
+                    self._profundidade_escrita -= 1
+                return
+
+            self._profundidade_escrita = 1
+            try:
+                with transacao(self._escritor) as con:
+                    yield con
+            finally:
+                self._profundidade_escrita = 0
+
+    #fecha todas as conexões abertas pelo gerenciador
+    def fechar(self):
+        with self._trava_escrita, self._trava:
+            for con in self._leitores:
+                con.close()
+            self._leitores.clear()
+            self._local = threading.local()
+            if self._escritor is not None:
+                self._escritor.close()
+                self._escritor = None
+
+_gerenciadores = {}
+_trava_gerenciadores = threading.Lock()
+
+#gerenciador de conexões compartilhado pelo processo para o arquivo do banco
+def gerenciador(caminho=CAMINHO_BANCO):
+    caminho = os.path.abspath(caminho)
+    with _trava_gerenciadores:
+        if caminho not in _gerenciadores:
+            _gerenciadores[caminho] = GerenciadorConexoes(caminho)
+        return _gerenciadores[caminho]
+
+#aplica as migrações pendentes ao banco padrão (o mesmo que a primeira conexão faz)
 def criar_tabelas():
-    #cria conexao
     con = conecta()
-    #cria cursor
-    cursor = con.cursor()
-
-    #cria a tabela de filmes
-    cursor.execute('''CREATE TABLE IF NOT EXISTS filmes (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        titulo TEXT NOT NULL,
-                        resumo TEXT NOT NULL,
-                        classificacao_indicativa INTEGER,
-                        classificacao_IMDB REAL,
-                        duracao_minutos INTEGER,
-                        data_de_lancamento NUMERIC,
-                        capa BLOB )''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS generos (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        nome TEXT NOT NULL UNIQUE )''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS filmes_generos (
-                        filme_id INTEGER,
-                        genero_id INTEGER,
-                        FOREIGN KEY(filme_id) REFERENCES filmes(id) ON DELETE CASCADE,
-                        FOREIGN KEY(genero_id) REFERENCES generos(id) ON DELETE CASCADE,
-                        PRIMARY KEY (filme_id, genero_id))''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS diretores (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        nome TEXT NOT NULL UNIQUE )''')
-
-    cursor.execute('''CREATE TABLE IF NOT EXISTS filmes_diretores (
-                        filme_id INTEGER,
-                        diretor_id INTEGER,
-                        FOREIGN KEY(filme_id) REFERENCES filmes(id) ON DELETE CASCADE,
-                        FOREIGN KEY(diretor_id) REFERENCES diretores(id) ON DELETE CASCADE,
-                        PRIMARY KEY (filme_id, diretor_id))''')
-
-    cursor.execute('''CREATE TABLE IF NOT EXISTS dublagens (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        idioma TEXT NOT NULL UNIQUE )''')
-
-    cursor.execute('''CREATE TABLE IF NOT EXISTS filmes_dublagens (
-                        filme_id INTEGER,
-                        dublagem_id INTEGER,
-                        FOREIGN KEY(filme_id) REFERENCES filmes(id) ON DELETE CASCADE,
-                        FOREIGN KEY(dublagem_id) REFERENCES dublagens(id) ON DELETE CASCADE,
-                        PRIMARY KEY (filme_id, dublagem_id))''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS legendas_disponiveis (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        idioma TEXT NOT NULL UNIQUE )''')
-
-    cursor.execute('''CREATE TABLE IF NOT EXISTS filmes_legendas_disponiveis (
-                        filme_id INTEGER,
-                        legendas_disponiveis_id INTEGER,
-                        FOREIGN KEY(filme_id) REFERENCES filmes(id) ON DELETE CASCADE,
-                        FOREIGN KEY(legendas_disponiveis_id) REFERENCES legendas_disponiveis(id) ON DELETE CASCADE,
-                        PRIMARY KEY (filme_id, legendas_disponiveis_id))''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS atores (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        nome TEXT NOT NULL UNIQUE)''')
-
-    cursor.execute('''CREATE TABLE IF NOT EXISTS elenco (
-                        filme_id INTEGER,
-                        ator_id INTEGER,
-                        papel TEXT,
-                        FOREIGN KEY(filme_id) REFERENCES filmes(id) ON DELETE CASCADE,
-                        FOREIGN KEY(ator_id) REFERENCES atores(id) ON DELETE CASCADE,
-                        PRIMARY KEY (filme_id, ator_id))''')
-    
-    #salva as alterações
-    con.commit()
-    #fecha a conexão
     con.close()
-
-criar_tabelas()
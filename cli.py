@@ -0,0 +1,243 @@
+"""
+Linha de comando do catálogo, para uso em servidores sem interface gráfica.
+
+Uso: python -m cli import ARQUIVO [ARQUIVO ...] [--banco cine_filmes.db] [--lote 1000] [--processos 1]
+                                  [--resumo resumo_importacao.json] [--silencioso]
+     python -m cli export ARQUIVO [--banco cine_filmes.db] [--capas omitir|arquivos|incluir] [--lote 10000]
+                                  [--silencioso]
+     python -m cli migrate [--banco cine_filmes.db] [--silencioso]
+     python -m cli backup [--banco cine_filmes.db] [--destino backups] [--manter 7] [--dias 0]
+                          [--nivel 6 | --sem-compressao] [--capas capas] [--intervalo SEGUNDOS] [--silencioso]
+     python -m cli restore BACKUP [--banco cine_filmes.db]
+
+Com --perfil-sql ARQUIVO antes do comando, as consultas são medidas
+(instrumentacao.py) e o resultado é gravado em JSON no fim.
+"""
+import argparse
+import json
+import sys
+import time
+import sqlite3
+import backup
+import instrumentacao
+from cinefilmesdb import CAMINHO_BANCO, Conexao, configurar, gerenciador
+from importar_filmes import Importar_filmes, LINHAS_POR_COMMIT, ETAPAS
+from exportar_filmes import Exportar_filmes, CAPAS, LINHAS_POR_BLOCO
+from migracoes import migrar, versao_esquema
+
+
+def _mostrar_progresso(arquivo: str):
+    def ao_progresso(linhas: int):
+        print(f'\r{arquivo}: {linhas} linhas gravadas', end='', file=sys.stderr, flush=True)
+    return ao_progresso
+
+
+def importar(args) -> int:
+    """Importa os arquivos em sequência e grava o resumo em JSON; retorna o código de saída."""
+    importador = Importar_filmes(gerenciador(args.banco))
+    inicio = time.perf_counter()
+    arquivos = []
+    for arquivo in args.arquivos:
+        ao_progresso = None if args.silencioso else _mostrar_progresso(arquivo)
+        try:
+            resumo = importador.importar_arquivo(arquivo, args.lote, ao_progresso, args.processos)
+        except Exception as erro:
+            if not args.silencioso:
+                print(f'\r{arquivo}: erro - {erro}', file=sys.stderr)
+            arquivos.append({'arquivo': arquivo, 'erro': str(erro)})
+            continue
+
+        # Linhas rejeitadas numeradas a partir de 1, sem contar o cabeçalho
+        resumo['rejeitadas'] = [{'linha': linha + 1, 'motivo': motivo} for linha, motivo in resumo['rejeitadas']]
+        arquivos.append({'arquivo': arquivo, **resumo})
+        if not args.silencioso:
+            print(f"\r{arquivo}: {resumo['linhas']} linhas, {resumo['filmes']} filmes gravados, "
+                  f"{resumo['duplicados']} duplicados, {len(resumo['rejeitadas'])} rejeitadas, "
+                  f"{resumo['linhas_por_segundo']:.0f} linhas/s", file=sys.stderr)
+
+    importados = [item for item in arquivos if 'erro' not in item]
+    segundos = time.perf_counter() - inicio
+    linhas = sum(item['linhas'] for item in importados)
+    total = {
+        'arquivos': len(arquivos),
+        'com_erro': len(arquivos) - len(importados),
+        'linhas': linhas,
+        'filmes': sum(item['filmes'] for item in importados),
+        'duplicados': sum(item['duplicados'] for item in importados),
+        'rejeitadas': sum(len(item['rejeitadas']) for item in importados),
+        'segundos': segundos,
+        'linhas_por_segundo': linhas / segundos if segundos else 0.0,
+        'etapas': {etapa: sum(item['etapas'][etapa] for item in importados) for etapa in ETAPAS},
+    }
+
+    with open(args.resumo, 'w', encoding='utf-8') as arquivo:
+        json.dump({'total': total, 'arquivos': arquivos}, arquivo, ensure_ascii=False, indent=2)
+
+    if not args.silencioso:
+        etapas = ', '.join(f'{etapa} {segundos:.1f}s' for etapa, segundos in total['etapas'].items())
+        print(f"Total: {total['linhas']} linhas em {total['segundos']:.1f}s "
+              f"({total['linhas_por_segundo']:.0f} linhas/s); {etapas}. Resumo em {args.resumo}.",
+              file=sys.stderr)
+    return 1 if total['com_erro'] else 0
+
+
+def exportar(args) -> int:
+    """Exporta o catálogo para um arquivo .csv, .jsonl ou .parquet; retorna o código de saída."""
+    ao_progresso = None
+    if not args.silencioso:
+        def ao_progresso(filmes: int):
+            print(f'\r{args.arquivo}: {filmes} filmes exportados', end='', file=sys.stderr, flush=True)
+    try:
+        resumo = Exportar_filmes(banco=gerenciador(args.banco)).exportar_arquivo(args.arquivo, args.capas, args.lote, ao_progresso)
+    except ValueError as erro:
+        print(f'{args.arquivo}: {erro}', file=sys.stderr)
+        return 2
+    if not args.silencioso:
+        print(f"\r{args.arquivo}: {resumo['filmes']} filmes, {resumo['capas']} capas, "
+              f"{resumo['bytes'] / 2 ** 20:.1f} MiB em {resumo['segundos']:.1f}s "
+              f"({resumo['linhas_por_segundo']:.0f} linhas/s)", file=sys.stderr)
+    return 0
+
+
+def migrar_banco(args) -> int:
+    """Aplica as migrações pendentes mostrando o andamento dos passos em lote."""
+    # Conexão sem a migração automática de conecta(), para acompanhar o andamento
+    con = configurar(sqlite3.connect(args.banco, factory=Conexao))
+    try:
+        inicial = versao_esquema(con)
+
+        def ao_progresso(versao: int, descricao: str, lotes: int):
+            if not args.silencioso:
+                print(f'\r{versao}: {descricao} ({lotes} transações)', end='', file=sys.stderr, flush=True)
+
+        final = migrar(con, ao_progresso)
+    finally:
+        con.close()
+    if not args.silencioso:
+        print(f'\rEsquema na versão {final} (era {inicial}).', file=sys.stderr)
+    return 0
+
+
+def _resumo_backup(resumo: dict) -> str:
+    etapas = ', '.join(f'{etapa} {segundos:.1f}s' for etapa, segundos in resumo['segundos'].items())
+    return (f"{resumo['arquivo']}: {resumo['bytes_banco'] / 2 ** 20:.1f} MiB -> "
+            f"{resumo['bytes_backup'] / 2 ** 20:.1f} MiB, {resumo['capas_copiadas']} capas novas, "
+            f"{len(resumo['apagados'])} backups antigos apagados; {etapas}")
+
+
+def fazer_backup(args) -> int:
+    """Faz um backup agora ou, com --intervalo, um a cada intervalo até Ctrl+C."""
+    opcoes = dict(banco=args.banco, destino=args.destino, comprimir=not args.sem_compressao, nivel=args.nivel,
+                  manter_ultimos=args.manter, manter_dias=args.dias, diretorio_capas=args.capas)
+
+    def ao_progresso(copiadas: int, total: int):
+        print(f'\rcopiando: {copiadas}/{total} páginas', end='', file=sys.stderr, flush=True)
+
+    if not args.intervalo:
+        try:
+            resumo = backup.fazer_backup(**opcoes, ao_progresso=None if args.silencioso else ao_progresso)
+        except backup.BackupInvalido as erro:
+            print(f'\r{erro}', file=sys.stderr)
+            return 1
+        if not args.silencioso:
+            print(f'\r{_resumo_backup(resumo)}', file=sys.stderr)
+        return 0
+
+    def ao_concluir(resumo: dict):
+        if not args.silencioso:
+            print(_resumo_backup(resumo), file=sys.stderr)
+
+    def ao_erro(erro: Exception):
+        print(f'backup falhou: {erro}', file=sys.stderr)
+
+    agendador = backup.AgendadorBackup(args.intervalo, ao_concluir, ao_erro, **opcoes)
+    agendador.iniciar(imediatamente=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        agendador.parar()
+    return 0
+
+
+def restaurar_backup(args) -> int:
+    """Recria o banco a partir de um backup; o aplicativo precisa estar fechado."""
+    try:
+        backup.restaurar(args.backup, args.banco)
+    except backup.BackupInvalido as erro:
+        print(erro, file=sys.stderr)
+        return 1
+    if not args.silencioso:
+        print(f'{args.banco} restaurado de {args.backup}.', file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cli', description='Ferramentas do catálogo cine_filmes.db.')
+    parser.add_argument('--perfil-sql', metavar='ARQUIVO',
+                        help='mede as consultas e grava em ARQUIVO (JSON) as estatísticas e as lentas')
+    parser.add_argument('--lenta-ms', type=float, default=instrumentacao.LIMITE_LENTA_MS,
+                        help='duração a partir da qual a consulta entra no registro de lentas')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    importacao = comandos.add_parser('import', help='importa filmes de arquivos .xlsx, .csv, .jsonl ou .parquet')
+    importacao.add_argument('arquivos', nargs='+', metavar='ARQUIVO')
+    importacao.add_argument('--banco', default=CAMINHO_BANCO, help='arquivo do banco')
+    importacao.add_argument('--lote', type=int, default=LINHAS_POR_COMMIT, help='linhas por transação')
+    importacao.add_argument('--processos', type=int, default=1,
+                            help='processos para validar e preparar os blocos (1 = sem paralelismo)')
+    importacao.add_argument('--resumo', default='resumo_importacao.json',
+                            help='arquivo JSON com o resumo da importação')
+    importacao.add_argument('--silencioso', action='store_true', help='não mostra o progresso')
+    importacao.set_defaults(executar=importar)
+
+    exportacao = comandos.add_parser('export', help='exporta o catálogo para .csv, .jsonl ou .parquet')
+    exportacao.add_argument('arquivo', metavar='ARQUIVO')
+    exportacao.add_argument('--banco', default=CAMINHO_BANCO, help='arquivo do banco')
+    exportacao.add_argument('--capas', choices=CAPAS, default='omitir',
+                            help='omitir, gravar em arquivos ao lado do exportado ou incluir os bytes (só .parquet)')
+    exportacao.add_argument('--lote', type=int, default=LINHAS_POR_BLOCO, help='filmes lidos e gravados por vez')
+    exportacao.add_argument('--silencioso', action='store_true', help='não mostra o progresso')
+    exportacao.set_defaults(executar=exportar)
+
+    migracao = comandos.add_parser('migrate', help='aplica as migrações pendentes do esquema')
+    migracao.add_argument('--banco', default=CAMINHO_BANCO, help='arquivo do banco')
+    migracao.add_argument('--silencioso', action='store_true', help='não mostra o progresso')
+    migracao.set_defaults(executar=migrar_banco)
+
+    copia = comandos.add_parser('backup', help='copia o banco em uso para um backup comprimido e conferido')
+    copia.add_argument('--banco', default=CAMINHO_BANCO, help='arquivo do banco')
+    copia.add_argument('--destino', default=backup.DIRETORIO_BACKUPS, help='diretório dos backups')
+    copia.add_argument('--manter', type=int, default=backup.MANTER_ULTIMOS, help='backups mais recentes mantidos')
+    copia.add_argument('--dias', type=int, default=0,
+                       help='mantém também o último backup de cada um destes dias até hoje')
+    copia.add_argument('--nivel', type=int, default=backup.NIVEL_COMPRESSAO, help='nível do gzip (1 a 9)')
+    copia.add_argument('--sem-compressao', action='store_true', help='grava o .db sem comprimir')
+    copia.add_argument('--capas', help='diretório do ArmazenamentoCapas, copiado para <destino>/capas')
+    copia.add_argument('--intervalo', type=float, help='repete o backup a cada INTERVALO segundos, até Ctrl+C')
+    copia.add_argument('--silencioso', action='store_true', help='não mostra o progresso')
+    copia.set_defaults(executar=fazer_backup)
+
+    restauracao = comandos.add_parser('restore', help='recria o banco a partir de um backup (aplicativo fechado)')
+    restauracao.add_argument('backup', metavar='BACKUP')
+    restauracao.add_argument('--banco', default=CAMINHO_BANCO, help='arquivo do banco a recriar')
+    restauracao.add_argument('--silencioso', action='store_true', help='não mostra mensagens')
+    restauracao.set_defaults(executar=restaurar_backup)
+
+    args = parser.parse_args(argv)
+    if not args.perfil_sql:
+        return args.executar(args)
+
+    instrumentacao.ativar(args.lenta_ms)
+    try:
+        return args.executar(args)
+    finally:
+        instrumentacao.exportar(args.perfil_sql)
+        if not args.silencioso:
+            print(instrumentacao.relatorio(10), file=sys.stderr)
+            print(f'Perfil das consultas em {args.perfil_sql}.', file=sys.stderr)
+        instrumentacao.desativar()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
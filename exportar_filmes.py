@@ -0,0 +1,200 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Iterator, List, Optional
+from cinefilmesdb import gerenciador, GerenciadorConexoes
+from importar_filmes import COLUNAS_PLANILHA
+from repository.armazenamento_capas import ArmazenamentoCapas
+
+# Linhas lidas do banco e gravadas no arquivo por vez
+LINHAS_POR_BLOCO = 10000
+
+# O que fazer com a capa: deixar a coluna vazia, gravar cada capa em um arquivo
+# (a coluna traz o caminho, como na importação) ou gravar os bytes (só Parquet)
+CAPAS = ('omitir', 'arquivos', 'incluir')
+
+
+def _escapar_sql(expressao: str, *trechos: str) -> str:
+    """
+    Expressão SQL que escapa com barra invertida a própria barra e cada trecho,
+    como a importação espera (um nome com vírgula não vira dois itens).
+    """
+    expressao = f"replace({expressao}, '\\', '\\\\')"
+    for trecho in trechos:
+        escapado = trecho[:-1] + '\\' + trecho[-1]
+        expressao = f"replace({expressao}, '{trecho}', '{escapado}')"
+    return expressao
+
+
+# Uma linha por filme, já no formato das planilhas de importação: as listas
+# separadas por vírgula e o elenco como "ator - papel; ator - papel", com os
+# separadores que aparecem dentro dos nomes escapados por _escapar_sql
+SQL_EXPORTACAO = f'''
+    SELECT f.titulo, f.resumo, f.classificacao_indicativa, f.classificacao_IMDB,
+           f.duracao_minutos, f.data_de_lancamento, {{capa}},
+           (SELECT group_concat({_escapar_sql('g.nome', ',')}, ', ') FROM filmes_generos fg
+            JOIN generos g ON g.id = fg.genero_id WHERE fg.filme_id = f.id),
+           (SELECT group_concat({_escapar_sql('d.idioma', ',')}, ', ') FROM filmes_dublagens fd
+            JOIN dublagens d ON d.id = fd.dublagem_id WHERE fd.filme_id = f.id),
+           (SELECT group_concat({_escapar_sql('l.idioma', ',')}, ', ') FROM filmes_legendas_disponiveis fl
+            JOIN legendas_disponiveis l ON l.id = fl.legendas_disponiveis_id WHERE fl.filme_id = f.id),
+           (SELECT group_concat({_escapar_sql('a.nome', ';', ' -')} || ' - ' ||
+                                {_escapar_sql("COALESCE(e.papel, '')", ';')}, '; ') FROM elenco e
+            JOIN atores a ON a.id = e.ator_id WHERE e.filme_id = f.id)
+    FROM filmes f ORDER BY f.id
+'''
+
+# Posição da coluna capa nas linhas de SQL_EXPORTACAO (e em COLUNAS_PLANILHA)
+_CAPA = COLUNAS_PLANILHA.index('capa')
+
+
+class Exportar_filmes:
+    def __init__(self, armazenamento_capas: Optional[ArmazenamentoCapas] = None,
+                 banco: Optional[GerenciadorConexoes] = None):
+        self.banco = banco or gerenciador()
+        # Onde estão as capas gravadas só pelo hash (capa_hash)
+        self.armazenamento_capas = armazenamento_capas or ArmazenamentoCapas(caminho_banco=self.banco.caminho)
+
+    def ler_blocos(self, tamanho_bloco: int = LINHAS_POR_BLOCO, com_capa: bool = False) -> Iterator[List[tuple]]:
+        """
+        Lê o catálogo em blocos de até `tamanho_bloco` tuplas na ordem de
+        COLUNAS_PLANILHA, todas da mesma transação de leitura (o catálogo
+        exportado é o de um único momento, mesmo com gravações em paralelo).
+        Com com_capa, a coluna capa traz (bytes ou None, capa_hash ou None).
+        """
+        capa = "f.capa, f.capa_hash" if com_capa else 'NULL'
+        with self.banco.leitura() as con:
+            cursor = con.cursor()
+            cursor.execute(SQL_EXPORTACAO.format(capa=capa))
+            while True:
+                linhas = cursor.fetchmany(tamanho_bloco)
+                if not linhas:
+                    break
+                if com_capa:
+                    linhas = [linha[:_CAPA] + ((linha[_CAPA], linha[_CAPA + 1]),) + linha[_CAPA + 2:]
+                              for linha in linhas]
+                yield linhas
+
+    def exportar_arquivo(self, file_path: str, capas: str = 'omitir', linhas_por_bloco: int = LINHAS_POR_BLOCO,
+                         ao_progresso=None) -> dict:
+        """
+        Exporta o catálogo em fluxo, com memória constante, para um arquivo .csv,
+        .jsonl ou .parquet nas colunas que Importar_filmes.importar_arquivo lê,
+        então o arquivo exportado pode ser importado de volta.
+        Com capas='arquivos', cada capa vai para o diretório "<nome>_capas" ao
+        lado do arquivo, com o SHA-256 como nome (capas iguais viram um arquivo só).
+        ao_progresso, se informado, recebe o total de filmes já exportados.
+        Retorna {'filmes', 'capas', 'segundos', 'linhas_por_segundo', 'bytes'}.
+        """
+        extensao = os.path.splitext(file_path)[1].lower()
+        if capas not in CAPAS:
+            raise ValueError(f'capas deve ser um de {", ".join(CAPAS)}.')
+        if capas == 'incluir' and extensao != '.parquet':
+            raise ValueError('Os bytes das capas só podem ser incluídos em arquivos .parquet.')
+        if extensao == '.csv':
+            escritor = _EscritorCsv(file_path)
+        elif extensao in ('.jsonl', '.ndjson'):
+            escritor = _EscritorJsonl(file_path)
+        elif extensao == '.parquet':
+            escritor = _EscritorParquet(file_path, capas == 'incluir')
+        else:
+            raise ValueError(f'Formato de arquivo não suportado: "{extensao}".')
+
+        diretorio_capas = None
+        if capas == 'arquivos':
+            diretorio_capas = f'{os.path.splitext(file_path)[0]}_capas'
+            os.makedirs(diretorio_capas, exist_ok=True)
+
+        inicio = time.perf_counter()
+        resumo = {'filmes': 0, 'capas': 0}
+        try:
+            for linhas in self.ler_blocos(linhas_por_bloco, com_capa=capas != 'omitir'):
+                if capas != 'omitir':
+                    linhas = [self._converter_capa(linha, diretorio_capas, resumo) for linha in linhas]
+                escritor.escrever(linhas)
+                resumo['filmes'] += len(linhas)
+                if ao_progresso:
+                    ao_progresso(resumo['filmes'])
+        finally:
+            escritor.fechar()
+
+        segundos = time.perf_counter() - inicio
+        resumo['segundos'] = segundos
+        resumo['linhas_por_segundo'] = resumo['filmes'] / segundos if segundos else 0.0
+        resumo['bytes'] = os.path.getsize(file_path)
+        return resumo
+
+    def _converter_capa(self, linha: tuple, diretorio_capas: Optional[str], resumo: dict) -> tuple:
+        """Troca (bytes, capa_hash) da coluna capa pelos bytes ou, com diretório, pelo caminho do arquivo gravado."""
+        dados, digest = linha[_CAPA]
+        if dados is None and digest is None:
+            return linha[:_CAPA] + (None,) + linha[_CAPA + 1:]
+        resumo['capas'] += 1
+
+        if diretorio_capas is None:
+            if dados is None:
+                with open(self.armazenamento_capas.caminho(digest), 'rb') as arquivo:
+                    dados = arquivo.read()
+            return linha[:_CAPA] + (dados,) + linha[_CAPA + 1:]
+
+        digest = digest or hashlib.sha256(dados).hexdigest()
+        destino = os.path.join(diretorio_capas, digest)
+        if not os.path.exists(destino):
+            if dados is None:
+                shutil.copyfile(self.armazenamento_capas.caminho(digest), destino)
+            else:
+                with open(destino, 'wb') as arquivo:
+                    arquivo.write(dados)
+        # Caminho relativo ao diretório do arquivo exportado, como a importação espera
+        caminho = f'{os.path.basename(diretorio_capas)}/{digest}'
+        return linha[:_CAPA] + (caminho,) + linha[_CAPA + 1:]
+
+
+class _EscritorCsv:
+    def __init__(self, caminho: str):
+        self._arquivo = open(caminho, 'w', newline='', encoding='utf-8')
+        self._escritor = csv.writer(self._arquivo)
+        self._escritor.writerow(COLUNAS_PLANILHA)
+
+    def escrever(self, linhas: List[tuple]):
+        self._escritor.writerows(linhas)
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+class _EscritorJsonl:
+    def __init__(self, caminho: str):
+        self._arquivo = open(caminho, 'w', encoding='utf-8')
+        self._codificar = json.JSONEncoder(ensure_ascii=False).encode
+
+    def escrever(self, linhas: List[tuple]):
+        codificar = self._codificar
+        self._arquivo.write(''.join(codificar(dict(zip(COLUNAS_PLANILHA, linha))) + '\n' for linha in linhas))
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+class _EscritorParquet:
+    """Grava cada bloco como um grupo de linhas do Parquet, com uma coluna tipada por campo."""
+
+    def __init__(self, caminho: str, capa_em_bytes: bool):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        tipos = {'classificacao_indicativa': pa.int64(), 'classificacao_IMDB': pa.float64(),
+                 'duracao_minutos': pa.int64(), 'capa': pa.binary() if capa_em_bytes else pa.string()}
+        self._esquema = pa.schema([(coluna, tipos.get(coluna, pa.string())) for coluna in COLUNAS_PLANILHA])
+        self._escritor = pq.ParquetWriter(caminho, self._esquema)
+
+    def escrever(self, linhas: List[tuple]):
+        colunas = [self._pa.array(valores, tipo) for valores, tipo in zip(zip(*linhas), self._esquema.types)]
+        self._escritor.write_table(self._pa.Table.from_arrays(colunas, schema=self._esquema))
+
+    def fechar(self):
+        self._escritor.close()
@@ -1,13 +1,26 @@
 from database.conecta_banco import conecta_banco
+from repository.carregamento_em_lote import montar_filmes_em_lote, TAMANHO_LOTE_IDS
+from repository.cache_ids import cache_ids
 
 class Filmes_CRUD:
     def __init__(self):
         self.conecta_banco = conecta_banco()
 
-    def listar_todos(self):
+    def listar_todos(self, em_lote=True, tamanho_pagina=TAMANHO_LOTE_IDS):
         with self.conecta_banco as con:
             cursor = con.cursor()
             cursor.execute('SELECT * FROM filmes')
+
+            if em_lote:
+                cursor_relacionamentos = con.cursor()
+                lista_filmes = []
+                while True:
+                    pagina = cursor.fetchmany(tamanho_pagina)
+                    if not pagina:
+                        break
+                    lista_filmes.extend(montar_filmes_em_lote(cursor_relacionamentos, pagina))
+                return lista_filmes
+
             filmes = cursor.fetchall()
             
             lista_filmes = []
@@ -64,12 +77,7 @@ class Filmes_CRUD:
         return [{'ator': nome, 'papel': papel} for nome, papel in cursor.fetchall()]
 
     def verificar_ou_gravar_id(self, cursor, table, column, value):
-        cursor.execute(f'SELECT id FROM {table} WHERE {column} = ?', (value,))
-        row = cursor.fetchone()
-        if row:
-            return row[0]
-        cursor.execute(f'INSERT INTO {table} ({column}) VALUES (?)', (value,))
-        return cursor.lastrowid
+        return cache_ids.obter_id(cursor, table, column, value)
 
     def incluir_filme(self, cursor, titulo, resumo, classificacao_indicativa,
                      classificacao_IMDB, duracao_minutos, data_de_lancamento,
@@ -1,15 +1,305 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from typing import Iterator, Optional
 import pandas as pd
-from tkinter import Tk, filedialog
-from repository.filmesCRUD import Filmes_CRUD
+from cinefilmesdb import gerenciador, GerenciadorConexoes
+from repository.gravacao_em_lote import COLUNAS_FILME, gravar_lote, _somar_tempo
+from repository import eventos
+
+# Colunas de lista da planilha: (coluna, separador, chave do lote)
+COLUNAS_LISTA = (('generos', ',', 'generos'),
+                 ('dublagens_disponiveis', ',', 'dublagens'),
+                 ('legendas_disponiveis', ',', 'legendas'))
+
+# Nas colunas de lista, uma barra invertida escapa o caractere seguinte: "\,"
+# e "\;" fazem parte do nome e "\\" é a própria barra (como exportar_filmes grava)
+_ESCAPADO = re.compile(r'\\(.)')
+
+# Item do elenco: "ator - papel", separados no primeiro " - " (ou " -" no fim,
+# papel vazio) fora de escape; sem ele, no primeiro "-", como nas planilhas antigas
+_ATOR_PAPEL = r'^((?:\\.|[^\\])*?) -(?: (.*))?$'
+_ATOR_PAPEL_ANTIGO = r'^((?:\\.|[^\\-])*)-(.*)$'
+
+# Todas as colunas esperadas na planilha (e nos arquivos CSV, JSON Lines e Parquet)
+COLUNAS_PLANILHA = COLUNAS_FILME + ('generos', 'dublagens_disponiveis', 'legendas_disponiveis', 'elenco')
+
+# Linhas gravadas por transação na importação em fluxo
+LINHAS_POR_COMMIT = 1000
+
+# Etapas cronometradas na importação em fluxo
+ETAPAS = ('leitura', 'preparo', 'resolucao', 'insercao', 'commit')
+
+# Blocos já lidos aguardando o gravador na importação em paralelo, além dos em preparação
+FILA_MAXIMA = 4
+
+
+def _explodir(coluna: pd.Series, separador: str) -> pd.Series:
+    """
+    Separa uma coluna de lista em uma linha por item, sem espaços nem itens vazios.
+    Um separador precedido de barra invertida faz parte do item; as barras de
+    escape continuam nos itens, para _desescapar tirar depois.
+    """
+    item = rf'(?:\\.?|[^{re.escape(separador)}\\])+'
+    itens = coluna.fillna('').astype(str).str.findall(item).explode().str.strip()
+    return itens[itens.notna() & (itens != '')]
+
+
+def _desescapar(itens: pd.Series) -> pd.Series:
+    """Tira as barras de escape dos itens de _explodir."""
+    return itens.str.replace(_ESCAPADO, r'\1', regex=True)
+
+
+def _ler_capa(valor, diretorio_base: str):
+    """
+    Converte a célula capa em bytes: caminhos de arquivo (relativos ao arquivo
+    importado) são lidos do disco. Retorna (bytes ou None, motivo da rejeição ou None).
+    """
+    if valor is None or isinstance(valor, bytes):
+        return valor, None
+    caminho = os.path.join(diretorio_base, str(valor))
+    try:
+        with open(caminho, 'rb') as arquivo:
+            return arquivo.read(), None
+    except OSError:
+        return None, f'capa não encontrada: {valor}'
+
+
+def preparar_lote(df: pd.DataFrame, diretorio_base: str = '.') -> dict:
+    """
+    Valida e normaliza um bloco da planilha com operações vetorizadas do pandas
+    e devolve o lote:
+    {'filmes': [(linha, titulo, ...)], 'generos': [(linha, nome)], 'dublagens': [...],
+     'legendas': [...], 'elenco': [(linha, ator, papel)], 'rejeitadas': [(linha, motivo)],
+     'linhas': linhas do bloco, 'ultima_linha': índice da última linha},
+    onde `linha` é o índice no df. As capas indicadas por caminho já vêm lidas.
+    Roda nos processos de preparação, então só devolve tipos simples;
+    'segundos_preparo' é o tempo gasto aqui.
+    """
+    inicio = time.perf_counter()
+    df = df.reindex(columns=COLUNAS_PLANILHA)
+    filmes = df.reindex(columns=COLUNAS_FILME)
+
+    # Validação: cada linha fica com o primeiro motivo de rejeição encontrado
+    motivos = pd.Series(None, index=df.index, dtype=object)
+    for coluna in ('titulo', 'resumo'):
+        vazia = filmes[coluna].isna() | (filmes[coluna].astype(str).str.strip() == '')
+        motivos = motivos.where(motivos.notna() | ~vazia, f'{coluna} vazio')
+    for coluna in ('classificacao_IMDB', 'duracao_minutos'):
+        numeros = pd.to_numeric(filmes[coluna], errors='coerce')
+        motivos = motivos.where(motivos.notna() | ~(numeros.isna() & filmes[coluna].notna()), f'{coluna} inválido')
+        filmes[coluna] = numeros
+    with warnings.catch_warnings():
+        # Datas em formatos variados são lidas uma a uma, como antes; o aviso do pandas só polui a saída
+        warnings.simplefilter('ignore', UserWarning)
+        datas = pd.to_datetime(filmes['data_de_lancamento'], errors='coerce')
+    invalidas = datas.isna() & filmes['data_de_lancamento'].notna()
+    motivos = motivos.where(motivos.notna() | ~invalidas, 'data_de_lancamento inválida')
+    filmes['data_de_lancamento'] = datas.dt.strftime('%Y-%m-%d')
+    filmes = filmes.astype(object).where(filmes.notna(), None)
+
+    capas = [_ler_capa(valor, diretorio_base) for valor in filmes['capa']]
+    filmes['capa'] = [capa for capa, _ in capas]
+    motivos = motivos.where(motivos.notna(), pd.Series([motivo for _, motivo in capas], index=df.index))
+
+    rejeitadas = motivos.dropna()
+    lote = {
+        'filmes': list(filmes.drop(index=rejeitadas.index).itertuples(name=None)),
+        'rejeitadas': list(rejeitadas.items()),
+        'linhas': len(df),
+        'ultima_linha': int(df.index[-1]) if len(df) else -1,
+    }
+    for coluna, separador, chave in COLUNAS_LISTA:
+        itens = _desescapar(_explodir(df[coluna], separador))
+        lote[chave] = list(itens.items())
+
+    # Elenco no formato "nome - papel; nome - papel"
+    elenco = _explodir(df['elenco'], ';')
+    partes = elenco.str.extract(_ATOR_PAPEL)
+    partes = partes.where(partes[0].notna(), elenco.str.extract(_ATOR_PAPEL_ANTIGO))
+    partes = partes.dropna(subset=[0]).fillna('')
+    if partes.empty:
+        lote['elenco'] = []
+    else:
+        lote['elenco'] = list(zip(partes.index, _desescapar(partes[0].str.strip()),
+                                  _desescapar(partes[1].str.strip())))
+    lote['segundos_preparo'] = time.perf_counter() - inicio
+    return lote
+
+
+def hash_arquivo(caminho: str) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos."""
+    resumo = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def _blocos_xlsx(caminho: str, tamanho_bloco: int, pular: int) -> Iterator[pd.DataFrame]:
+    """Lê a primeira planilha da pasta de trabalho em modo somente leitura, linha a linha."""
+    from openpyxl import load_workbook
+
+    pasta = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        planilha = pasta.worksheets[0]
+        cabecalho = next(planilha.iter_rows(max_row=1, values_only=True), ())
+        bloco = []
+        for linha in planilha.iter_rows(min_row=2 + pular, values_only=True):
+            bloco.append(linha)
+            if len(bloco) == tamanho_bloco:
+                yield pd.DataFrame(bloco, columns=cabecalho)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame(bloco, columns=cabecalho)
+    finally:
+        pasta.close()
+
+
+def _blocos_jsonl(caminho: str, tamanho_bloco: int, pular: int) -> Iterator[pd.DataFrame]:
+    """Lê um arquivo JSON Lines (um objeto por linha), ignorando as linhas em branco."""
+    with open(caminho, encoding='utf-8') as arquivo:
+        registros = (json.loads(linha) for linha in arquivo if linha.strip())
+        bloco = []
+        for numero, registro in enumerate(registros):
+            if numero < pular:
+                continue
+            bloco.append(registro)
+            if len(bloco) == tamanho_bloco:
+                yield pd.DataFrame.from_records(bloco)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame.from_records(bloco)
+
+
+def _blocos_parquet(caminho: str, tamanho_bloco: int, pular: int) -> Iterator[pd.DataFrame]:
+    """Lê um arquivo Parquet (como os de exportar_filmes) em lotes, sem carregá-lo inteiro."""
+    import pyarrow.parquet as pq
+
+    with pq.ParquetFile(caminho) as arquivo:
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco):
+            if pular >= lote.num_rows:
+                pular -= lote.num_rows
+                continue
+            yield lote.slice(pular).to_pandas()
+            pular = 0
+
+
+def _cronometrar(iterador, tempos: dict, etapa: str):
+    """Repassa os itens do iterador somando em tempos[etapa] o tempo gasto para obtê-los."""
+    iterador = iter(iterador)
+    while True:
+        inicio = time.perf_counter()
+        try:
+            item = next(iterador)
+        except StopIteration:
+            return
+        finally:
+            _somar_tempo(tempos, etapa, inicio)
+        yield item
+
+
+def ler_blocos(caminho: str, tamanho_bloco: int = LINHAS_POR_COMMIT, pular: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Lê um arquivo .xlsx, .csv, .jsonl ou .parquet em DataFrames de até `tamanho_bloco` linhas,
+    começando depois das `pular` primeiras linhas de dados. O índice de cada
+    DataFrame é a posição da linha no arquivo (a primeira linha de dados é 0),
+    então a memória usada não depende do tamanho do arquivo.
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.xlsx':
+        blocos = _blocos_xlsx(caminho, tamanho_bloco, pular)
+    elif extensao == '.csv':
+        blocos = pd.read_csv(caminho, chunksize=tamanho_bloco, skiprows=range(1, pular + 1))
+    elif extensao in ('.jsonl', '.ndjson'):
+        blocos = _blocos_jsonl(caminho, tamanho_bloco, pular)
+    elif extensao == '.parquet':
+        blocos = _blocos_parquet(caminho, tamanho_bloco, pular)
+    else:
+        raise ValueError(f'Formato de arquivo não suportado: "{extensao}".')
+
+    inicio = pular
+    for df in blocos:
+        df.index = range(inicio, inicio + len(df))
+        inicio += len(df)
+        yield df
+
+
+def _colocar(fila: queue.Queue, item, parar: threading.Event) -> bool:
+    """Coloca o item na fila limitada, desistindo se `parar` for sinalizado."""
+    while not parar.is_set():
+        try:
+            fila.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def preparar_em_paralelo(blocos: Iterator[pd.DataFrame], processos: Optional[int] = None,
+                         fila_maxima: int = FILA_MAXIMA, diretorio_base: str = '.') -> Iterator[dict]:
+    """
+    Prepara os blocos (preparar_lote) em um pool de processos e devolve os lotes
+    na ordem de leitura. Uma thread lê o arquivo e envia os blocos ao pool; a
+    fila guarda os lotes enviados, limitada a um por processo (os em preparação)
+    mais `fila_maxima` (os prontos esperando o gravador), então a leitura espera
+    quando o gravador (quem consome este iterador) fica para trás.
+    """
+    processos = processos or os.cpu_count() or 1
+    fila = queue.Queue(maxsize=processos + fila_maxima)
+    parar = threading.Event()
+
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        def produzir():
+            try:
+                for df in blocos:
+                    if not _colocar(fila, pool.submit(preparar_lote, df, diretorio_base), parar):
+                        return
+            except Exception as erro:
+                _colocar(fila, erro, parar)
+            finally:
+                _colocar(fila, None, parar)
+
+        leitor = threading.Thread(target=produzir, name='leitor-importacao', daemon=True)
+        leitor.start()
+        try:
+            while True:
+                item = fila.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item.result()
+        finally:
+            # Se o gravador parou antes do fim, libera a thread leitora e descarta o que sobrou
+            parar.set()
+            leitor.join()
+            while not fila.empty():
+                item = fila.get_nowait()
+                if item is not None and not isinstance(item, Exception):
+                    item.cancel()
+
 
 class Importar_filmes:
-    def __init__(self):
-        self.repository = Filmes_CRUD()
+    def __init__(self, banco: Optional[GerenciadorConexoes] = None):
+        self.banco = banco or gerenciador()
 
     def importar_excel(self):
+        # Importado aqui para o restante do módulo funcionar em servidores sem interface gráfica
+        from tkinter import Tk, filedialog
+
         Tk().withdraw()
         file_path = filedialog.askopenfilename(
-            filetypes=[("Planilhas Excel", "*.xlsx")],
+            filetypes=[("Planilhas Excel", "*.xlsx"), ("CSV", "*.csv"), ("JSON Lines", "*.jsonl"),
+                       ("Parquet", "*.parquet")],
             title="Selecione a planilha de filmes"
         )
         if not file_path:
@@ -17,62 +307,100 @@ class Importar_filmes:
             return
 
         try:
-            df = pd.read_excel(file_path)
-            with self.repository.conecta_banco as con:
-                cursor = con.cursor()
-
-                for i in range(len(df)):
-                    # Processa gêneros
-                    generos = []
-                    for nome in str(df['generos'][i]).split(','):
-                        nome = nome.strip()
-                        if nome:
-                            genero_id = self.repository.verificar_ou_gravar_id(cursor, 'generos', 'nome', nome)
-                            generos.append(genero_id)
-
-                    # Processa dublagens
-                    dublagens = []
-                    for idioma in str(df['dublagens_disponiveis'][i]).split(','):
-                        idioma = idioma.strip()
-                        if idioma:
-                            dublagem_id = self.repository.verificar_ou_gravar_id(cursor, 'dublagens', 'idioma', idioma)
-                            dublagens.append(dublagem_id)
-
-                    # Processa legendas
-                    legendas = []
-                    for idioma in str(df['legendas_disponiveis'][i]).split(','):
-                        idioma = idioma.strip()
-                        if idioma:
-                            legenda_id = self.repository.verificar_ou_gravar_id(cursor, 'legendas_disponiveis', 'idioma', idioma)
-                            legendas.append(legenda_id)
-
-                    # Processa elenco
-                    elenco = []
-                    for ator_papel in str(df['elenco'][i]).split(';'):
-                        if '-' in ator_papel:
-                            nome, papel = ator_papel.split('-', 1)
-                            nome = nome.strip()
-                            papel = papel.strip()
-                            ator_id = self.repository.verificar_ou_gravar_id(cursor, 'atores', 'nome', nome)
-                            elenco.append((ator_id, papel))
-
-                    self.repository.incluir_filme(
-                        cursor,
-                        df['titulo'][i],
-                        df['resumo'][i],
-                        df['classificacao_indicativa'][i],
-                        df['classificacao_IMDB'][i],
-                        df['duracao_minutos'][i],
-                        pd.to_datetime(df['data_de_lancamento'][i]).date(),
-                        df['capa'][i],
-                        generos,
-                        dublagens,
-                        legendas,
-                        elenco
-                    )
-
-                con.commit()
-                print("Importação concluída com sucesso!")
-
+            resumo = self.importar_arquivo(file_path)
+            print(f"Importação concluída com sucesso! {resumo['filmes']} filmes gravados, "
+                  f"{resumo['duplicados']} já cadastrados, {len(resumo['rejeitadas'])} rejeitados, "
+                  f"{resumo['linhas_por_segundo']:.0f} linhas/s.")
         except Exception as e:
-            print("Erro ao importar filmes:", e) 
\ No newline at end of file
+            print("Erro ao importar filmes:", e)
+
+    def importar_planilha(self, file_path: str) -> dict:
+        """
+        Importa a planilha inteira em uma única transação.
+        Retorna o resumo de gravar_lote com 'rejeitadas', 'linhas', 'segundos' e 'linhas_por_segundo'.
+        """
+        inicio = time.perf_counter()
+        df = pd.read_excel(file_path)
+        lote = preparar_lote(df, os.path.dirname(os.path.abspath(file_path)))
+        with self.banco.escrita() as con:
+            resumo = gravar_lote(con.cursor(), lote)
+        del resumo['ids']
+        if resumo['filmes']:
+            eventos.publicar(eventos.CRIADO, None)
+
+        resumo['rejeitadas'] = lote['rejeitadas']
+        segundos = time.perf_counter() - inicio
+        resumo['linhas'] = len(df)
+        resumo['segundos'] = segundos
+        resumo['linhas_por_segundo'] = len(df) / segundos if segundos else 0.0
+        return resumo
+
+    def importar_arquivo(self, file_path: str, linhas_por_commit: int = LINHAS_POR_COMMIT,
+                         ao_progresso=None, processos: int = 1) -> dict:
+        """
+        Importa um arquivo .xlsx, .csv, .jsonl ou .parquet em fluxo, com memória constante.
+        Cada bloco de `linhas_por_commit` linhas é gravado em uma transação própria
+        junto com o ponto de retomada (hash do arquivo e linhas já gravadas); se a
+        importação for interrompida, executá-la de novo continua de onde parou.
+        Com processos > 1, a validação e a leitura das capas rodam em paralelo
+        (preparar_em_paralelo) e só esta thread grava no banco.
+        ao_progresso, se informado, recebe o total de linhas já gravadas.
+        Em 'etapas' o resumo traz os segundos de leitura, preparo, resolucao,
+        insercao e commit; no modo paralelo, leitura e preparo correm junto da gravação.
+        """
+        inicio = time.perf_counter()
+        tempos = dict.fromkeys(ETAPAS, 0.0)
+        hash_conteudo = hash_arquivo(file_path)
+        with self.banco.leitura() as con:
+            ponto = con.execute('SELECT linhas_gravadas, concluida FROM importacoes WHERE hash_arquivo = ?',
+                                (hash_conteudo,)).fetchone()
+        retomada = ponto[0] if ponto else 0
+
+        resumo = {'filmes': 0, 'duplicados': 0, 'rejeitadas': [], 'linhas': 0, 'retomada_da_linha': retomada}
+        if not (ponto and ponto[1]):
+            diretorio_base = os.path.dirname(os.path.abspath(file_path))
+            blocos = _cronometrar(ler_blocos(file_path, linhas_por_commit, retomada), tempos, 'leitura')
+            if processos > 1:
+                lotes = preparar_em_paralelo(blocos, processos, diretorio_base=diretorio_base)
+            else:
+                lotes = (preparar_lote(df, diretorio_base) for df in blocos)
+
+            gravadas = retomada
+            with closing(lotes):
+                for lote in lotes:
+                    gravadas = lote['ultima_linha'] + 1
+                    tempos['preparo'] += lote['segundos_preparo']
+                    with self.banco.escrita() as con:
+                        parcial = gravar_lote(con.cursor(), lote, tempos)
+                        self._gravar_ponto(con, hash_conteudo, file_path, gravadas, concluida=False)
+                        inicio_commit = time.perf_counter()
+                    _somar_tempo(tempos, 'commit', inicio_commit)
+                    # Avisa os caches de uma vez pelo bloco, sem um evento por filme
+                    if parcial['filmes']:
+                        eventos.publicar(eventos.CRIADO, None)
+                    resumo['filmes'] += parcial['filmes']
+                    resumo['duplicados'] += parcial['duplicados']
+                    resumo['rejeitadas'].extend(lote['rejeitadas'])
+                    resumo['linhas'] += lote['linhas']
+                    if ao_progresso:
+                        ao_progresso(gravadas)
+            with self.banco.escrita() as con:
+                self._gravar_ponto(con, hash_conteudo, file_path, gravadas, concluida=True)
+
+        segundos = time.perf_counter() - inicio
+        resumo['segundos'] = segundos
+        resumo['linhas_por_segundo'] = resumo['linhas'] / segundos if segundos else 0.0
+        resumo['etapas'] = tempos
+        return resumo
+
+    def _gravar_ponto(self, con, hash_conteudo: str, file_path: str, linhas_gravadas: int, concluida: bool):
+        con.execute('''
+            INSERT INTO importacoes (hash_arquivo, arquivo, linhas_gravadas, concluida, atualizada_em)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (hash_arquivo) DO UPDATE SET
+                arquivo = excluded.arquivo,
+                linhas_gravadas = excluded.linhas_gravadas,
+                concluida = excluded.concluida,
+                atualizada_em = excluded.atualizada_em
+        ''', (hash_conteudo, file_path, linhas_gravadas, int(concluida),
+              datetime.now().isoformat(timespec='seconds')))
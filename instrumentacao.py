@@ -0,0 +1,289 @@
+"""
+Instrumentação das consultas ao banco, ligada e desligada em tempo de execução.
+
+Com ativar(), os cursores das conexões de cinefilmesdb (Conexao.cursor,
+Conexao.execute e Conexao.executemany) passam a ser CursorInstrumentado, que
+mede cada comando do execute até a última linha lida. As medidas são somadas
+por modelo de comando (o SQL sem espaços extras e com as listas "IN (?, ?, ...)"
+de qualquer tamanho resumidas): chamadas, tempo total, p95, linhas lidas e
+linhas alteradas. Comandos mais lentos que o limite entram no registro de
+lentas junto com o EXPLAIN QUERY PLAN, capturado uma vez por modelo.
+Desligada, o custo é só conferir a flag a cada cursor ou execute da conexão.
+
+instantaneo() devolve as medidas atuais e exportar() as grava em JSON.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+# Comandos mais lentos que isto vão para o registro de lentas
+LIMITE_LENTA_MS = 50.0
+# Entradas guardadas no registro de lentas (as mais antigas saem primeiro)
+MAXIMO_LENTAS = 200
+# Durações recentes guardadas por modelo para calcular o p95
+AMOSTRAS_P95 = 1024
+
+_ESPACOS = re.compile(r'\s+')
+_LISTA_IN = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def modelo_comando(sql: str) -> str:
+    """SQL em uma linha, com as listas "IN (?, ?, ...)" de qualquer tamanho iguais a "IN (?, ...)"."""
+    return _LISTA_IN.sub('IN (?, ...)', _ESPACOS.sub(' ', sql).strip())
+
+
+class _Estatistica:
+    __slots__ = ('chamadas', 'total', 'maximo', 'linhas', 'alteradas', 'duracoes')
+
+    def __init__(self):
+        self.chamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.linhas = 0
+        self.alteradas = 0
+        self.duracoes = deque(maxlen=AMOSTRAS_P95)
+
+    def resumo(self, modelo: str) -> Dict[str, Any]:
+        duracoes = sorted(self.duracoes)
+        p95 = duracoes[max(0, -(-len(duracoes) * 95 // 100) - 1)] if duracoes else 0.0
+        return {
+            'modelo': modelo,
+            'chamadas': self.chamadas,
+            'total_ms': self.total * 1000,
+            'media_ms': self.total / self.chamadas * 1000,
+            'p95_ms': p95 * 1000,
+            'maximo_ms': self.maximo * 1000,
+            'linhas': self.linhas,
+            'alteradas': self.alteradas,
+        }
+
+
+class _Registro:
+    """Medidas acumuladas desde ativar() ou zerar(); compartilhado por todas as threads."""
+
+    def __init__(self, limite_lenta_ms: float, maximo_lentas: int):
+        self.limite_lenta = limite_lenta_ms / 1000
+        self.desde = datetime.now().isoformat(timespec='seconds')
+        self.estatisticas: Dict[str, _Estatistica] = {}
+        self.lentas = deque(maxlen=maximo_lentas)
+        self.planos: Dict[str, List[str]] = {}
+        self.trava = threading.Lock()
+
+    def anotar(self, con, sql: str, parametros, duracao: float, linhas: int, alteradas: int):
+        modelo = modelo_comando(sql)
+        with self.trava:
+            estatistica = self.estatisticas.get(modelo)
+            if estatistica is None:
+                estatistica = self.estatisticas[modelo] = _Estatistica()
+            estatistica.chamadas += 1
+            estatistica.total += duracao
+            estatistica.maximo = max(estatistica.maximo, duracao)
+            estatistica.linhas += linhas
+            estatistica.alteradas += alteradas
+            estatistica.duracoes.append(duracao)
+            if duracao < self.limite_lenta:
+                return
+            plano = self.planos.get(modelo)
+
+        if plano is None:
+            plano = _plano(con, sql, parametros)
+            with self.trava:
+                plano = self.planos.setdefault(modelo, plano)
+        with self.trava:
+            self.lentas.append({
+                'quando': datetime.now().isoformat(timespec='milliseconds'),
+                'modelo': modelo,
+                'duracao_ms': duracao * 1000,
+                'linhas': linhas,
+                'alteradas': alteradas,
+                'plano': plano,
+            })
+
+
+def _plano(con, sql: str, parametros) -> List[str]:
+    """Linhas do EXPLAIN QUERY PLAN do comando, recuadas pela profundidade, ou o erro que impediu lê-lo."""
+    try:
+        # Cursor comum, para o EXPLAIN não ser medido
+        linhas = sqlite3.Cursor(con).execute(f'EXPLAIN QUERY PLAN {sql}', parametros).fetchall()
+    except (sqlite3.Error, ValueError) as erro:
+        return [f'(sem plano: {erro})']
+    profundidade = {0: -1}
+    plano = []
+    for no, pai, _, detalhe in linhas:
+        profundidade[no] = profundidade.get(pai, -1) + 1
+        plano.append('  ' * profundidade[no] + detalhe)
+    return plano
+
+
+_registro: Optional[_Registro] = None
+
+
+def ativar(limite_lenta_ms: float = LIMITE_LENTA_MS, maximo_lentas: int = MAXIMO_LENTAS):
+    """Liga a instrumentação, começando medidas novas; vale para conexões já abertas."""
+    global _registro
+    _registro = _Registro(limite_lenta_ms, maximo_lentas)
+
+
+def desativar():
+    """Desliga a instrumentação; cursores já criados continuam medindo até serem descartados."""
+    global _registro
+    _registro = None
+
+
+def ativa() -> bool:
+    return _registro is not None
+
+
+def zerar():
+    """Descarta as medidas e o registro de lentas, mantendo a instrumentação ligada."""
+    if _registro is not None:
+        ativar(_registro.limite_lenta * 1000, _registro.lentas.maxlen)
+
+
+def instantaneo(ordenar_por: str = 'total_ms') -> Dict[str, Any]:
+    """
+    Medidas atuais: {'ativa', 'desde', 'limite_lenta_ms', 'consultas': [por modelo,
+    da maior para a menor em `ordenar_por`], 'lentas': [mais recentes por último]}.
+    """
+    registro = _registro
+    if registro is None:
+        return {'ativa': False, 'consultas': [], 'lentas': []}
+    with registro.trava:
+        consultas = [estatistica.resumo(modelo) for modelo, estatistica in registro.estatisticas.items()]
+        lentas = list(registro.lentas)
+    consultas.sort(key=lambda consulta: -consulta[ordenar_por])
+    return {
+        'ativa': True,
+        'desde': registro.desde,
+        'limite_lenta_ms': registro.limite_lenta * 1000,
+        'consultas': consultas,
+        'lentas': lentas,
+    }
+
+
+def exportar(caminho: str, ordenar_por: str = 'total_ms') -> Dict[str, Any]:
+    """Grava o instantâneo em JSON e o devolve."""
+    dados = instantaneo(ordenar_por)
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False, indent=2)
+    return dados
+
+
+def relatorio(limite: int = 20, ordenar_por: str = 'total_ms') -> str:
+    """Tabela em texto dos `limite` modelos com maior `ordenar_por`."""
+    linhas = [f'{"chamadas":>9} {"total ms":>10} {"p95 ms":>8} {"linhas":>9}  comando']
+    for consulta in instantaneo(ordenar_por)['consultas'][:limite]:
+        linhas.append(f'{consulta["chamadas"]:>9} {consulta["total_ms"]:>10.1f} {consulta["p95_ms"]:>8.2f} '
+                      f'{consulta["linhas"]:>9}  {consulta["modelo"][:120]}')
+    return '\n'.join(linhas)
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """
+    Cursor que mede cada comando: o tempo do execute somado ao das leituras,
+    até a última linha, o próximo execute ou o fechamento do cursor.
+    """
+
+    def __init__(self, con):
+        super().__init__(con)
+        self._medicao = None
+
+    def execute(self, sql, parametros=()):
+        self._concluir()
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            self._medicao = [sql, parametros, time.perf_counter() - inicio, 0]
+            if self.description is None:
+                self._concluir()
+
+    def executemany(self, sql, sequencia):
+        self._concluir()
+        primeiros = []
+
+        def guardar_primeiros(linhas):
+            # Os parâmetros da primeira linha servem para o EXPLAIN QUERY PLAN
+            for linha in linhas:
+                if not primeiros:
+                    primeiros.append(linha)
+                yield linha
+
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, guardar_primeiros(sequencia))
+        finally:
+            self._medicao = [sql, primeiros[0] if primeiros else (), time.perf_counter() - inicio, 0]
+            self._concluir()
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        linha = super().fetchone()
+        if self._medicao is not None:
+            self._medicao[2] += time.perf_counter() - inicio
+            if linha is None:
+                self._concluir()
+            else:
+                self._medicao[3] += 1
+        return linha
+
+    def fetchmany(self, size=None):
+        tamanho = self.arraysize if size is None else size
+        inicio = time.perf_counter()
+        linhas = super().fetchmany(tamanho)
+        if self._medicao is not None:
+            self._medicao[2] += time.perf_counter() - inicio
+            self._medicao[3] += len(linhas)
+            if len(linhas) < tamanho:
+                self._concluir()
+        return linhas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        linhas = super().fetchall()
+        if self._medicao is not None:
+            self._medicao[2] += time.perf_counter() - inicio
+            self._medicao[3] += len(linhas)
+            self._concluir()
+        return linhas
+
+    def __next__(self):
+        inicio = time.perf_counter()
+        try:
+            linha = super().__next__()
+        except StopIteration:
+            if self._medicao is not None:
+                self._medicao[2] += time.perf_counter() - inicio
+                self._concluir()
+            raise
+        if self._medicao is not None:
+            self._medicao[2] += time.perf_counter() - inicio
+            self._medicao[3] += 1
+        return linha
+
+    def close(self):
+        self._concluir()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._concluir()
+        except Exception:
+            # Conexão já fechada ou interpretador encerrando: a medida se perde
+            pass
+
+    def _concluir(self):
+        medicao, self._medicao = self._medicao, None
+        registro = _registro
+        if medicao is None or registro is None:
+            return
+        sql, parametros, duracao, linhas = medicao
+        alteradas = max(self.rowcount, 0) if self.description is None else 0
+        registro.anotar(self.connection, sql, parametros, duracao, linhas, alteradas)
@@ -0,0 +1,327 @@
+"""
+Migrações do esquema do banco cine_filmes.db, numeradas pela versão gravada
+em PRAGMA user_version.
+
+Cada passo recebe um cursor e roda dentro de uma transação BEGIN IMMEDIATE,
+que termina gravando a sua versão. Um passo que é um gerador confirma o que
+já fez a cada `yield` e abre uma nova transação, para soltar a trava de
+escrita entre os lotes de um preenchimento demorado em um catálogo grande;
+esses passos precisam poder ser repetidos, caso o processo pare no meio.
+
+Os passos usam IF NOT EXISTS porque bancos criados antes das migrações
+(user_version 0) já têm parte do esquema.
+"""
+import inspect
+from typing import Callable, Optional
+from repository.busca import indexar_trigramas_em_lote
+from repository.facetas import reconstruir_contagem_facetas
+
+# Filmes indexados por transação nos preenchimentos em lote
+LINHAS_POR_LOTE = 2000
+
+
+def _tabela_existe(cursor, nome: str) -> bool:
+    cursor.execute('SELECT 1 FROM sqlite_master WHERE name = ?', (nome,))
+    return cursor.fetchone() is not None
+
+
+def _esquema_inicial(cursor):
+    """Tabelas de filmes e de valores (gêneros, diretores, idiomas, atores) com as junções."""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS filmes (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        titulo TEXT NOT NULL,
+                        resumo TEXT NOT NULL,
+                        classificacao_indicativa INTEGER,
+                        classificacao_IMDB REAL,
+                        duracao_minutos INTEGER,
+                        data_de_lancamento NUMERIC,
+                        capa BLOB )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS generos (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        nome TEXT NOT NULL UNIQUE )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS filmes_generos (
+                        filme_id INTEGER,
+                        genero_id INTEGER,
+                        FOREIGN KEY(filme_id) REFERENCES filmes(id) ON DELETE CASCADE,
+                        FOREIGN KEY(genero_id) REFERENCES generos(id) ON DELETE CASCADE,
+                        PRIMARY KEY (filme_id, genero_id))''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS diretores (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        nome TEXT NOT NULL UNIQUE )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS filmes_diretores (
+                        filme_id INTEGER,
+                        diretor_id INTEGER,
+                        FOREIGN KEY(filme_id) REFERENCES filmes(id) ON DELETE CASCADE,
+                        FOREIGN KEY(diretor_id) REFERENCES diretores(id) ON DELETE CASCADE,
+                        PRIMARY KEY (filme_id, diretor_id))''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS dublagens (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        idioma TEXT NOT NULL UNIQUE )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS filmes_dublagens (
+                        filme_id INTEGER,
+                        dublagem_id INTEGER,
+                        FOREIGN KEY(filme_id) REFERENCES filmes(id) ON DELETE CASCADE,
+                        FOREIGN KEY(dublagem_id) REFERENCES dublagens(id) ON DELETE CASCADE,
+                        PRIMARY KEY (filme_id, dublagem_id))''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS legendas_disponiveis (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        idioma TEXT NOT NULL UNIQUE )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS filmes_legendas_disponiveis (
+                        filme_id INTEGER,
+                        legendas_disponiveis_id INTEGER,
+                        FOREIGN KEY(filme_id) REFERENCES filmes(id) ON DELETE CASCADE,
+                        FOREIGN KEY(legendas_disponiveis_id) REFERENCES legendas_disponiveis(id) ON DELETE CASCADE,
+                        PRIMARY KEY (filme_id, legendas_disponiveis_id))''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS atores (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        nome TEXT NOT NULL UNIQUE)''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS elenco (
+                        filme_id INTEGER,
+                        ator_id INTEGER,
+                        papel TEXT,
+                        FOREIGN KEY(filme_id) REFERENCES filmes(id) ON DELETE CASCADE,
+                        FOREIGN KEY(ator_id) REFERENCES atores(id) ON DELETE CASCADE,
+                        PRIMARY KEY (filme_id, ator_id))''')
+
+
+def _coluna_capa_hash(cursor):
+    """Coluna com o hash da capa guardada em disco (ArmazenamentoCapas)."""
+    colunas = [coluna[1] for coluna in cursor.execute('PRAGMA table_info(filmes)')]
+    if 'capa_hash' not in colunas:
+        cursor.execute('ALTER TABLE filmes ADD COLUMN capa_hash TEXT')
+
+
+# Índices da paginação ordenada, do filtro por facetas (valor, filme) e do
+# reconhecimento de filmes já cadastrados (mesmo título e data)
+INDICES = (
+    'idx_filmes_classificacao_imdb ON filmes (classificacao_IMDB)',
+    'idx_filmes_data_de_lancamento ON filmes (data_de_lancamento)',
+    'idx_filmes_generos_genero ON filmes_generos (genero_id, filme_id)',
+    'idx_filmes_dublagens_dublagem ON filmes_dublagens (dublagem_id, filme_id)',
+    'idx_filmes_legendas_legenda ON filmes_legendas_disponiveis (legendas_disponiveis_id, filme_id)',
+    'idx_elenco_ator ON elenco (ator_id, filme_id)',
+    'idx_filmes_duracao ON filmes (duracao_minutos)',
+    'idx_filmes_titulo_data ON filmes (titulo, data_de_lancamento)',
+)
+
+
+def _indices(cursor):
+    """Cria um índice por transação, para não segurar a trava de escrita durante todos."""
+    for indice in INDICES:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {indice}')
+        yield
+
+
+def _importacoes(cursor):
+    """Pontos de retomada das importações: hash do arquivo e linhas já gravadas."""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS importacoes (
+                        hash_arquivo TEXT PRIMARY KEY,
+                        arquivo TEXT NOT NULL,
+                        linhas_gravadas INTEGER NOT NULL,
+                        concluida INTEGER NOT NULL DEFAULT 0,
+                        atualizada_em TEXT NOT NULL)''')
+
+
+def _texto_completo(cursor):
+    """
+    Índice de texto completo sobre titulo e resumo, sem diferenciar acentos.
+    O 'rebuild' fica na mesma transação dos gatilhos: um índice preenchido
+    aos poucos ficaria inconsistente com filmes alterados entre os lotes.
+    """
+    fts_existia = _tabela_existe(cursor, 'filmes_fts')
+    cursor.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS filmes_fts USING fts5(
+                        titulo, resumo,
+                        content='filmes', content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2')''')
+
+    # Mantém o índice de texto sincronizado com a tabela filmes
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS filmes_fts_insercao AFTER INSERT ON filmes BEGIN
+                        INSERT INTO filmes_fts (rowid, titulo, resumo)
+                        VALUES (new.id, new.titulo, new.resumo);
+                      END''')
+
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS filmes_fts_remocao AFTER DELETE ON filmes BEGIN
+                        INSERT INTO filmes_fts (filmes_fts, rowid, titulo, resumo)
+                        VALUES ('delete', old.id, old.titulo, old.resumo);
+                      END''')
+
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS filmes_fts_atualizacao
+                      AFTER UPDATE OF titulo, resumo ON filmes BEGIN
+                        INSERT INTO filmes_fts (filmes_fts, rowid, titulo, resumo)
+                        VALUES ('delete', old.id, old.titulo, old.resumo);
+                        INSERT INTO filmes_fts (rowid, titulo, resumo)
+                        VALUES (new.id, new.titulo, new.resumo);
+                      END''')
+
+    if not fts_existia:
+        cursor.execute("INSERT INTO filmes_fts (filmes_fts) VALUES ('rebuild')")
+
+
+def _busca_aproximada(cursor):
+    """
+    Índice de busca aproximada: vocabulário das palavras dos títulos, os
+    trigramas de cada palavra e as palavras de cada filme. Os títulos já
+    cadastrados são indexados em lotes de LINHAS_POR_LOTE filmes; o
+    repositório indexa os filmes gravados entre um lote e outro, que por
+    isso são pulados.
+    """
+    cursor.execute('''CREATE TABLE IF NOT EXISTS palavras_titulos (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        palavra TEXT NOT NULL UNIQUE,
+                        trigramas INTEGER NOT NULL,
+                        filmes INTEGER NOT NULL)''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS palavras_trigramas (
+                        trigrama TEXT NOT NULL,
+                        palavra_id INTEGER NOT NULL,
+                        PRIMARY KEY (trigrama, palavra_id)) WITHOUT ROWID''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS titulos_palavras (
+                        palavra_id INTEGER NOT NULL,
+                        filme_id INTEGER NOT NULL,
+                        PRIMARY KEY (palavra_id, filme_id)) WITHOUT ROWID''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_titulos_palavras_filme ON titulos_palavras (filme_id)')
+    yield
+
+    ultimo_id = 0
+    while True:
+        cursor.execute('SELECT id, titulo FROM filmes WHERE id > ? ORDER BY id LIMIT ?',
+                       (ultimo_id, LINHAS_POR_LOTE))
+        lote = cursor.fetchall()
+        if not lote:
+            return
+        ultimo_id = lote[-1][0]
+        cursor.execute('SELECT DISTINCT filme_id FROM titulos_palavras WHERE filme_id BETWEEN ? AND ?',
+                       (lote[0][0], ultimo_id))
+        indexados = {linha[0] for linha in cursor.fetchall()}
+        indexar_trigramas_em_lote(cursor, [(filme_id, titulo) for filme_id, titulo in lote
+                                           if filme_id not in indexados])
+        yield
+
+
+def _contagem_facetas(cursor):
+    """
+    Contagem de filmes por valor de faceta (gênero, idioma e faixa do IMDB),
+    mantida por gatilhos para a tela do catálogo não precisar de GROUP BY.
+    """
+    contagem_existia = _tabela_existe(cursor, 'contagem_facetas')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS contagem_facetas (
+                        faceta TEXT NOT NULL,
+                        valor_id INTEGER NOT NULL,
+                        total INTEGER NOT NULL,
+                        PRIMARY KEY (faceta, valor_id)) WITHOUT ROWID''')
+
+    for faceta, tabela, coluna in (('generos', 'filmes_generos', 'genero_id'),
+                                   ('dublagens', 'filmes_dublagens', 'dublagem_id'),
+                                   ('legendas', 'filmes_legendas_disponiveis', 'legendas_disponiveis_id')):
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS {tabela}_contagem_insercao
+                          AFTER INSERT ON {tabela} BEGIN
+                            INSERT INTO contagem_facetas (faceta, valor_id, total)
+                            VALUES ('{faceta}', new.{coluna}, 1)
+                            ON CONFLICT (faceta, valor_id) DO UPDATE SET total = total + 1;
+                          END''')
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS {tabela}_contagem_remocao
+                          AFTER DELETE ON {tabela} BEGIN
+                            UPDATE contagem_facetas SET total = total - 1
+                            WHERE faceta = '{faceta}' AND valor_id = old.{coluna};
+                          END''')
+
+    # A faixa do IMDB é a parte inteira da nota (7.8 conta na faixa 7)
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS filmes_contagem_insercao
+                      AFTER INSERT ON filmes WHEN new.classificacao_IMDB IS NOT NULL BEGIN
+                        INSERT INTO contagem_facetas (faceta, valor_id, total)
+                        VALUES ('imdb', CAST(new.classificacao_IMDB AS INTEGER), 1)
+                        ON CONFLICT (faceta, valor_id) DO UPDATE SET total = total + 1;
+                      END''')
+
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS filmes_contagem_remocao
+                      AFTER DELETE ON filmes WHEN old.classificacao_IMDB IS NOT NULL BEGIN
+                        UPDATE contagem_facetas SET total = total - 1
+                        WHERE faceta = 'imdb' AND valor_id = CAST(old.classificacao_IMDB AS INTEGER);
+                      END''')
+
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS filmes_contagem_atualizacao
+                      AFTER UPDATE OF classificacao_IMDB ON filmes BEGIN
+                        UPDATE contagem_facetas SET total = total - 1
+                        WHERE old.classificacao_IMDB IS NOT NULL
+                          AND faceta = 'imdb' AND valor_id = CAST(old.classificacao_IMDB AS INTEGER);
+                        INSERT INTO contagem_facetas (faceta, valor_id, total)
+                        SELECT 'imdb', CAST(new.classificacao_IMDB AS INTEGER), 1
+                        WHERE new.classificacao_IMDB IS NOT NULL
+                        ON CONFLICT (faceta, valor_id) DO UPDATE SET total = total + 1;
+                      END''')
+
+    # Conta os filmes que já estavam cadastrados antes da tabela existir
+    if not contagem_existia:
+        reconstruir_contagem_facetas(cursor)
+
+
+# Passos em ordem: (versão gravada em user_version ao terminar, descrição, função)
+MIGRACOES = (
+    (1, 'esquema inicial', _esquema_inicial),
+    (2, 'coluna capa_hash', _coluna_capa_hash),
+    (3, 'índices de ordenação e de facetas', _indices),
+    (4, 'pontos de retomada das importações', _importacoes),
+    (5, 'índice de texto completo', _texto_completo),
+    (6, 'índice de busca aproximada', _busca_aproximada),
+    (7, 'contagem de facetas', _contagem_facetas),
+)
+
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+
+def versao_esquema(con) -> int:
+    """Versão do esquema gravada no banco (0 em um banco novo ou anterior às migrações)."""
+    return con.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrar(con, ao_progresso: Optional[Callable[[int, str, int], None]] = None) -> int:
+    """
+    Aplica ao banco da conexão os passos com versão maior que a gravada e
+    retorna a versão final. ao_progresso(versao, descricao, lotes) é chamado
+    a cada transação confirmada. Vários processos podem migrar o mesmo banco
+    ao mesmo tempo: a versão é relida depois de obtida a trava de escrita.
+    """
+    if versao_esquema(con) >= VERSAO_ATUAL:
+        return versao_esquema(con)
+
+    isolamento = con.isolation_level
+    con.isolation_level = None
+    cursor = con.cursor()
+    try:
+        for versao, descricao, passo in MIGRACOES:
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                if versao_esquema(con) >= versao:
+                    cursor.execute('COMMIT')
+                    continue
+                resultado = passo(cursor)
+                lotes = 0
+                if inspect.isgenerator(resultado):
+                    for _ in resultado:
+                        cursor.execute('COMMIT')
+                        lotes += 1
+                        if ao_progresso:
+                            ao_progresso(versao, descricao, lotes)
+                        cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute(f'PRAGMA user_version = {versao}')
+                cursor.execute('COMMIT')
+            except BaseException:
+                if con.in_transaction:
+                    cursor.execute('ROLLBACK')
+                raise
+            if ao_progresso:
+                ao_progresso(versao, descricao, lotes + 1)
+    finally:
+        con.isolation_level = isolamento
+    return versao_esquema(con)
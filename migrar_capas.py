@@ -0,0 +1,105 @@
+"""
+Move as capas guardadas na coluna filmes.capa para o ArmazenamentoCapas.
+
+Uso: python migrar_capas.py [--diretorio capas] [--lote 50] [--limpar] [--vacuum]
+"""
+import argparse
+import time
+from cinefilmesdb import conecta, gerenciador
+from repository.armazenamento_capas import ArmazenamentoCapas
+from repository.capa import TAMANHO_BLOCO
+
+
+def _ler_blocos(blob):
+    """Lê o BLOB aberto em blocos de TAMANHO_BLOCO bytes."""
+    while True:
+        bloco = blob.read(TAMANHO_BLOCO)
+        if not bloco:
+            break
+        yield bloco
+
+
+def migrar_capas(con, armazenamento: ArmazenamentoCapas, tamanho_lote: int = 50,
+                 ao_progresso=None) -> int:
+    """
+    Copia as capas para o disco em lotes, cada capa lida por E/S incremental,
+    e troca a coluna capa pelo hash. Cada lote é gravado em uma transação própria,
+    então a migração pode ser interrompida e executada de novo.
+    Retorna o número de capas migradas.
+    """
+    migradas = 0
+    ultimo_id = 0
+    cursor = con.cursor()
+    while True:
+        cursor.execute('''
+            SELECT id FROM filmes
+            WHERE id > ? AND length(capa) > 0
+            ORDER BY id LIMIT ?
+        ''', (ultimo_id, tamanho_lote))
+        ids = [linha[0] for linha in cursor.fetchall()]
+        if not ids:
+            break
+
+        atualizacoes = []
+        for filme_id in ids:
+            with con.blobopen('filmes', 'capa', filme_id, readonly=True) as blob:
+                digest = armazenamento.gravar_fluxo(_ler_blocos(blob))
+            atualizacoes.append((digest, filme_id))
+
+        with con:
+            con.executemany('UPDATE filmes SET capa = NULL, capa_hash = ? WHERE id = ?', atualizacoes)
+
+        migradas += len(ids)
+        ultimo_id = ids[-1]
+        if ao_progresso:
+            ao_progresso(migradas)
+    return migradas
+
+
+def limpar_capas(armazenamento: ArmazenamentoCapas, banco=None) -> int:
+    """
+    Remove do armazenamento as capas que nenhum filme usa. A leitura dos hashes
+    em uso e a remoção acontecem com o banco travado para escrita, então nenhuma
+    gravação confirma um hash novo no meio delas; as capas gravadas no disco
+    antes de uma transação ainda aberta são protegidas pela idade mínima.
+    Retorna quantas capas foram removidas.
+    """
+    banco = banco or gerenciador()
+    with banco.escrita() as con:
+        if not con.in_transaction:
+            # Trava também os outros processos até o fim da remoção
+            con.execute('BEGIN IMMEDIATE')
+        em_uso = {linha[0] for linha in con.execute(
+            'SELECT DISTINCT capa_hash FROM filmes WHERE capa_hash IS NOT NULL')}
+        return armazenamento.remover_nao_referenciados(em_uso)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move as capas do cine_filmes.db para o disco.')
+    parser.add_argument('--diretorio',
+                        help='diretório do armazenamento de capas (padrão: capas, ao lado do banco)')
+    parser.add_argument('--lote', type=int, default=50, help='capas por transação')
+    parser.add_argument('--limpar', action='store_true',
+                        help='remove do diretório as capas que nenhum filme usa mais')
+    parser.add_argument('--vacuum', action='store_true',
+                        help='executa VACUUM no fim para devolver o espaço liberado')
+    args = parser.parse_args()
+
+    con = conecta()
+    armazenamento = ArmazenamentoCapas(args.diretorio)
+    inicio = time.perf_counter()
+    total = migrar_capas(con, armazenamento, args.lote,
+                         ao_progresso=lambda n: print(f'{n} capas migradas...', end='\r'))
+    print(f'{total} capas migradas em {time.perf_counter() - inicio:.1f}s.')
+
+    if args.limpar:
+        print(f'{limpar_capas(armazenamento)} capas sem uso removidas.')
+
+    if args.vacuum:
+        con.execute('VACUUM')
+        print('VACUUM concluído.')
+    con.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import glob
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from PIL import Image, ImageTk
+from repository import eventos
+
+# Tamanho padrão das miniaturas de capa (largura, altura)
+TAMANHO_PADRAO = (120, 180)
+
+
+class ServicoMiniaturas:
+    """
+    Gera e guarda miniaturas das capas por (filme_id, tamanho).
+    Mantém em memória um LRU de imagens prontas para o Tk e, por trás dele,
+    um cache em disco limitado pelo total de bytes. As entradas de um filme
+    são descartadas quando a capa é alterada por FilmeRepository.atualizar
+    ou quando o filme é deletado.
+    """
+
+    def __init__(self, repositorio, diretorio_cache: str = 'miniaturas',
+                 max_itens_memoria: int = 256, max_bytes_disco: int = 64 * 1024 * 1024):
+        self.repositorio = repositorio
+        self.diretorio_cache = diretorio_cache
+        self.max_itens_memoria = max_itens_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self._memoria = OrderedDict()
+        self._trava = threading.RLock()
+        # Invalidações de cada filme; uma miniatura gerada enquanto o número
+        # mudou é de uma capa antiga e não entra nos caches
+        self._geracoes: Dict[int, int] = {}
+
+        os.makedirs(diretorio_cache, exist_ok=True)
+        self._bytes_disco = sum(os.path.getsize(caminho) for caminho in self._arquivos_disco())
+
+        eventos.inscrever(self.ao_alterar_filme)
+
+    def obter(self, filme_id: int, tamanho: Tuple[int, int] = TAMANHO_PADRAO) -> Optional[ImageTk.PhotoImage]:
+        """Retorna a miniatura pronta para o Tk, ou None se o filme não tem capa."""
+        chave = (filme_id, tamanho)
+        with self._trava:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                return self._memoria[chave]
+            geracao = self._geracoes.get(filme_id, 0)
+
+        imagem = self.obter_imagem(filme_id, tamanho)
+        foto = ImageTk.PhotoImage(imagem) if imagem is not None else None
+
+        with self._trava:
+            if self._geracoes.get(filme_id, 0) != geracao:
+                return foto
+            self._memoria[chave] = foto
+            self._memoria.move_to_end(chave)
+            while len(self._memoria) > self.max_itens_memoria:
+                self._memoria.popitem(last=False)
+        return foto
+
+    def obter_imagem(self, filme_id: int, tamanho: Tuple[int, int] = TAMANHO_PADRAO) -> Optional[Image.Image]:
+        """Retorna a miniatura como imagem PIL, lendo do disco ou gerando a partir da capa."""
+        caminho = self._caminho_disco(filme_id, tamanho)
+        with self._trava:
+            geracao = self._geracoes.get(filme_id, 0)
+        if os.path.exists(caminho):
+            # Atualiza a data de modificação, usada como ordem de uso no cache em disco
+            os.utime(caminho)
+            with Image.open(caminho) as imagem:
+                imagem.load()
+                return imagem
+
+        capa = self.repositorio.obter_capa(filme_id)
+        if capa is None:
+            return None
+
+        with capa.abrir() as arquivo:
+            with Image.open(arquivo) as original:
+                # Em JPEG, draft decodifica já reduzido, sem montar a imagem inteira
+                original.draft('RGB', tamanho)
+                miniatura = original.convert('RGBA' if 'A' in original.getbands() else 'RGB')
+        miniatura.thumbnail(tamanho)
+
+        self._gravar_disco(caminho, miniatura, filme_id, geracao)
+        return miniatura
+
+    def invalidar(self, filme_id: int):
+        """Descarta as miniaturas de um filme, em memória e em disco."""
+        with self._trava:
+            self._geracoes[filme_id] = self._geracoes.get(filme_id, 0) + 1
+            for chave in [chave for chave in self._memoria if chave[0] == filme_id]:
+                del self._memoria[chave]
+            for caminho in glob.glob(os.path.join(self.diretorio_cache, f'{filme_id}_*.png')):
+                self._remover_disco(caminho)
+
+    def ao_alterar_filme(self, evento: str, filme_id: Optional[int], campos):
+        """Observador de repository.eventos."""
+        if filme_id is None:
+            return
+        if evento == eventos.DELETADO or (evento == eventos.ATUALIZADO and 'capa' in campos):
+            self.invalidar(filme_id)
+
+    def fechar(self):
+        """Para de observar as alterações de filmes e libera as imagens em memória."""
+        eventos.cancelar_inscricao(self.ao_alterar_filme)
+        with self._trava:
+            self._memoria.clear()
+
+    # Métodos auxiliares do cache em disco
+    def _caminho_disco(self, filme_id: int, tamanho: Tuple[int, int]) -> str:
+        return os.path.join(self.diretorio_cache, f'{filme_id}_{tamanho[0]}x{tamanho[1]}.png')
+
+    def _arquivos_disco(self):
+        return glob.glob(os.path.join(self.diretorio_cache, '*.png'))
+
+    def _gravar_disco(self, caminho: str, imagem: Image.Image, filme_id: int, geracao: int):
+        temporario = f'{caminho}.{threading.get_ident()}.tmp'
+        imagem.save(temporario, format='PNG', optimize=True)
+        with self._trava:
+            if self._geracoes.get(filme_id, 0) != geracao:
+                # A capa mudou durante a geração: a miniatura já é antiga
+                os.remove(temporario)
+                return
+            if os.path.exists(caminho):
+                self._bytes_disco -= os.path.getsize(caminho)
+            os.replace(temporario, caminho)
+            self._bytes_disco += os.path.getsize(caminho)
+            self._reduzir_disco()
+
+    def _remover_disco(self, caminho: str):
+        try:
+            tamanho = os.path.getsize(caminho)
+            os.remove(caminho)
+        except FileNotFoundError:
+            return
+        self._bytes_disco -= tamanho
+
+    def _reduzir_disco(self):
+        """Remove as miniaturas usadas há mais tempo até caber no limite de bytes."""
+        if self._bytes_disco <= self.max_bytes_disco:
+            return
+        for caminho in sorted(self._arquivos_disco(), key=os.path.getmtime):
+            if self._bytes_disco <= self.max_bytes_disco:
+                break
+            self._remover_disco(caminho)
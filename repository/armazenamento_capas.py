@@ -0,0 +1,101 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from typing import Iterable, Optional, Set
+from cinefilmesdb import CAMINHO_BANCO
+
+# Diretório padrão das capas, ao lado do arquivo do banco
+DIRETORIO_CAPAS_PADRAO = 'capas'
+# Arquivos mais novos que isto (segundos) não são removidos por remover_nao_referenciados:
+# as capas são gravadas antes da transação que grava o hash no banco
+IDADE_MINIMA_REMOCAO = 3600
+
+
+def diretorio_padrao(caminho_banco: str = CAMINHO_BANCO) -> str:
+    """Diretório DIRETORIO_CAPAS_PADRAO ao lado do arquivo do banco, em caminho absoluto."""
+    return os.path.join(os.path.dirname(os.path.abspath(caminho_banco)), DIRETORIO_CAPAS_PADRAO)
+
+
+class ArmazenamentoCapas:
+    """
+    Armazena as capas em disco endereçadas pelo conteúdo: cada arquivo tem como
+    nome o SHA-256 dos seus bytes, e a tabela filmes guarda só esse hash.
+    Capas iguais ocupam um único arquivo, já que geram o mesmo hash.
+    """
+
+    def __init__(self, diretorio: Optional[str] = None, caminho_banco: str = CAMINHO_BANCO):
+        # Sem diretório, usa o "capas" ao lado do banco, qualquer que seja o diretório corrente
+        self.diretorio = diretorio or diretorio_padrao(caminho_banco)
+
+    def caminho(self, digest: str) -> str:
+        """Caminho do arquivo da capa; usa os dois primeiros caracteres como subpasta."""
+        return os.path.join(self.diretorio, digest[:2], digest[2:])
+
+    def existe(self, digest: str) -> bool:
+        return os.path.exists(self.caminho(digest))
+
+    def gravar(self, dados: bytes) -> str:
+        """Grava a capa, se ainda não existir, e retorna seu hash."""
+        return self.gravar_fluxo([dados])
+
+    def gravar_fluxo(self, blocos: Iterable[bytes]) -> str:
+        """
+        Grava a capa a partir de uma sequência de blocos, calculando o hash
+        durante a escrita, sem precisar da capa inteira em memória.
+        """
+        os.makedirs(self.diretorio, exist_ok=True)
+        sha256 = hashlib.sha256()
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                for bloco in blocos:
+                    sha256.update(bloco)
+                    arquivo.write(bloco)
+
+            digest = sha256.hexdigest()
+            destino = self.caminho(digest)
+            if os.path.exists(destino):
+                # Capa duplicada: mantém o arquivo existente, renovando a data de
+                # modificação para remover_nao_referenciados não apagá-lo antes do commit
+                os.remove(temporario)
+                os.utime(destino)
+            else:
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                os.replace(temporario, destino)
+            return digest
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    def abrir(self, digest: str) -> mmap.mmap:
+        """Mapeia o arquivo da capa em memória, somente leitura."""
+        with open(self.caminho(digest), 'rb') as arquivo:
+            return mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def tamanho(self, digest: str) -> int:
+        return os.path.getsize(self.caminho(digest))
+
+    def remover_nao_referenciados(self, digests_em_uso: Set[str],
+                                  idade_minima: float = IDADE_MINIMA_REMOCAO) -> int:
+        """
+        Remove os arquivos cujo hash não está mais em uso e retorna quantos foram removidos.
+        Arquivos modificados há menos de `idade_minima` segundos ficam: podem ser
+        de uma gravação cujo hash ainda não foi confirmado no banco.
+        """
+        removidos = 0
+        if not os.path.isdir(self.diretorio):
+            return removidos
+        limite = time.time() - idade_minima
+        for subpasta in os.listdir(self.diretorio):
+            caminho_subpasta = os.path.join(self.diretorio, subpasta)
+            if not os.path.isdir(caminho_subpasta):
+                continue
+            for nome in os.listdir(caminho_subpasta):
+                caminho = os.path.join(caminho_subpasta, nome)
+                if subpasta + nome not in digests_em_uso and os.path.getmtime(caminho) < limite:
+                    os.remove(caminho)
+                    removidos += 1
+        return removidos
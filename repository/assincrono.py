@@ -0,0 +1,195 @@
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from repository.filmesCRUD import FilmeRepository
+
+# Threads que executam as consultas; cada uma tem a sua conexão de leitura
+TRABALHADORES = 2
+# Intervalo, em milissegundos, entre as entregas dos resultados na thread do Tk
+INTERVALO_ENTREGA_MS = 30
+
+
+class Cancelado(Exception):
+    """Levantada dentro de uma operação longa cancelada, no próximo aviso de progresso."""
+
+
+class _Pedido:
+    __slots__ = ('chave', 'cancelado', 'ao_concluir', 'ao_erro', 'ao_progresso', 'progresso', 'futuro')
+
+    def __init__(self, chave, ao_concluir, ao_erro, ao_progresso):
+        self.chave = chave
+        self.cancelado = threading.Event()
+        self.ao_concluir = ao_concluir
+        self.ao_erro = ao_erro
+        self.ao_progresso = ao_progresso
+        # Último progresso ainda não entregue; avisos mais antigos são descartados
+        self.progresso = None
+        self.futuro: Optional[Future] = None
+
+
+class RepositorioAssincrono:
+    """
+    Fachada do FilmeRepository para as telas Tk: os métodos do repositório
+    rodam em um ThreadPoolExecutor e retornam um Future (em código asyncio,
+    use asyncio.wrap_future para aguardá-lo).
+
+    ao_concluir(resultado), ao_erro(excecao) e ao_progresso(valor) são
+    chamados na thread do Tk: as threads de trabalho só colocam os avisos em
+    uma fila, que a raiz Tk esvazia a cada INTERVALO_ENTREGA_MS com after().
+    Sem raiz, quem usa a fachada chama entregar_pendentes().
+
+    Um pedido com `chave` cancela o pedido anterior com a mesma chave (por
+    exemplo, a busca enquanto o usuário digita): se ele ainda não começou,
+    nem chega a rodar; se já está rodando, o resultado é descartado e, nas
+    operações que avisam progresso, o próximo aviso levanta Cancelado.
+
+        assincrono = RepositorioAssincrono(raiz=janela)
+        assincrono.buscar_texto(termo, chave='busca', ao_concluir=mostrar_resultados)
+    """
+
+    def __init__(self, repositorio: Optional[FilmeRepository] = None, raiz=None,
+                 trabalhadores: int = TRABALHADORES, intervalo_ms: int = INTERVALO_ENTREGA_MS):
+        self.repositorio = repositorio or FilmeRepository()
+        self.raiz = raiz
+        self.intervalo_ms = intervalo_ms
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='repositorio')
+        self._avisos: 'queue.SimpleQueue[tuple]' = queue.SimpleQueue()
+        self._por_chave: Dict[Any, _Pedido] = {}
+        self._trava = threading.Lock()
+        self._agendamento = None
+        if raiz is not None:
+            self._agendamento = raiz.after(intervalo_ms, self._entregar_periodicamente)
+
+    def executar(self, funcao: Callable, *args, chave=None,
+                 ao_concluir: Optional[Callable[[Any], None]] = None,
+                 ao_erro: Optional[Callable[[BaseException], None]] = None,
+                 ao_progresso: Optional[Callable[[Any], None]] = None, **kwargs) -> Future:
+        """
+        Executa funcao(*args, **kwargs) em uma thread de trabalho.
+        Com ao_progresso, a função recebe o argumento ao_progresso (como em
+        Importar_filmes.importar_arquivo) e seus avisos chegam à thread do Tk.
+        """
+        pedido = _Pedido(chave, ao_concluir, ao_erro, ao_progresso)
+        if ao_progresso is not None:
+            kwargs['ao_progresso'] = lambda valor: self._avisar_progresso(pedido, valor)
+
+        with self._trava:
+            anterior = self._por_chave.get(chave) if chave is not None else None
+            if chave is not None:
+                self._por_chave[chave] = pedido
+        if anterior is not None:
+            self._cancelar_pedido(anterior)
+
+        futuro = self._executor.submit(self._rodar, pedido, funcao, args, kwargs)
+        futuro.add_done_callback(lambda futuro: self._ao_terminar(pedido, futuro))
+        pedido.futuro = futuro
+        return futuro
+
+    def cancelar(self, chave) -> bool:
+        """Cancela o pedido em andamento com a chave; retorna False se não houver."""
+        with self._trava:
+            pedido = self._por_chave.pop(chave, None)
+        if pedido is None:
+            return False
+        self._cancelar_pedido(pedido)
+        return True
+
+    def entregar_pendentes(self):
+        """Chama, na thread atual, os retornos dos pedidos já terminados e os avisos de progresso."""
+        while True:
+            try:
+                tipo, pedido, valor = self._avisos.get_nowait()
+            except queue.Empty:
+                return
+            if pedido.cancelado.is_set():
+                continue
+            if tipo == 'progresso':
+                with self._trava:
+                    valor, pedido.progresso = pedido.progresso, None
+                pedido.ao_progresso(valor[0])
+            elif tipo == 'resultado' and pedido.ao_concluir:
+                pedido.ao_concluir(valor)
+            elif tipo == 'erro' and pedido.ao_erro:
+                pedido.ao_erro(valor)
+
+    def fechar(self, esperar: bool = True):
+        """Cancela os pedidos que ainda não começaram e para as entregas na raiz Tk."""
+        if self._agendamento is not None:
+            self.raiz.after_cancel(self._agendamento)
+            self._agendamento = None
+        with self._trava:
+            pedidos = list(self._por_chave.values())
+            self._por_chave.clear()
+        for pedido in pedidos:
+            pedido.cancelado.set()
+        self._executor.shutdown(wait=esperar, cancel_futures=True)
+
+    def importar_arquivo(self, caminho: str, *args, chave='importacao', **kwargs) -> Future:
+        """
+        Importar_filmes.importar_arquivo em segundo plano. Cancelar a importação
+        a interrompe depois do bloco em gravação (se houver ao_progresso); o
+        ponto de retomada fica gravado e a próxima importação continua dali.
+        Importa no mesmo banco do repositório.
+        """
+        # Importado aqui para quem só consulta não carregar o pandas
+        from importar_filmes import Importar_filmes
+        return self.executar(Importar_filmes(self.repositorio.banco).importar_arquivo, caminho, *args, chave=chave, **kwargs)
+
+    def __getattr__(self, nome: str):
+        """Expõe os métodos do repositório: fachada.filtrar(..., chave=..., ao_concluir=...)."""
+        if nome == 'repositorio':
+            raise AttributeError(nome)
+        metodo = getattr(self.repositorio, nome)
+        if not callable(metodo) or nome.startswith('_'):
+            raise AttributeError(nome)
+
+        def executar_metodo(*args, **kwargs) -> Future:
+            return self.executar(metodo, *args, **kwargs)
+        executar_metodo.__name__ = nome
+        executar_metodo.__doc__ = metodo.__doc__
+        return executar_metodo
+
+    # Métodos auxiliares
+    def _rodar(self, pedido: _Pedido, funcao: Callable, args: tuple, kwargs: dict):
+        if pedido.cancelado.is_set():
+            raise Cancelado()
+        return funcao(*args, **kwargs)
+
+    def _avisar_progresso(self, pedido: _Pedido, valor):
+        if pedido.cancelado.is_set():
+            raise Cancelado()
+        # Só o aviso mais recente é entregue; a fila guarda um por vez
+        with self._trava:
+            if pedido.progresso is None:
+                self._avisos.put(('progresso', pedido, None))
+            pedido.progresso = (valor,)
+
+    def _ao_terminar(self, pedido: _Pedido, futuro: Future):
+        if pedido.chave is not None:
+            with self._trava:
+                if self._por_chave.get(pedido.chave) is pedido:
+                    del self._por_chave[pedido.chave]
+        if futuro.cancelled() or pedido.cancelado.is_set():
+            return
+        erro = futuro.exception()
+        if erro is None:
+            self._avisos.put(('resultado', pedido, futuro.result()))
+        else:
+            self._avisos.put(('erro', pedido, erro))
+
+    def _cancelar_pedido(self, pedido: _Pedido):
+        pedido.cancelado.set()
+        # Tira da fila do executor o pedido que ainda não começou
+        if pedido.futuro is not None:
+            pedido.futuro.cancel()
+
+    def _entregar_periodicamente(self):
+        # Um retorno que levanta exceção não pode parar as entregas seguintes: o Tk
+        # mostra a exceção (report_callback_exception) e os avisos que ficaram na
+        # fila saem na próxima rodada. Depois de fechar(), não reagenda.
+        try:
+            self.entregar_pendentes()
+        finally:
+            if self._agendamento is not None:
+                self._agendamento = self.raiz.after(self.intervalo_ms, self._entregar_periodicamente)
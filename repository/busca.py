@@ -0,0 +1,253 @@
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+# Palavras do texto digitado (letras, dígitos e sublinhado, com acentos)
+_PALAVRA = re.compile(r'\w+')
+
+# Similaridade mínima entre uma palavra digitada e uma palavra dos títulos
+SIMILARIDADE_PALAVRA = 0.4
+# Palavras dos títulos aproveitadas para cada palavra digitada
+MAXIMO_VARIANTES = 8
+# Quantidade de ocorrências (palavra, filme) lidas para montar os candidatos
+ORCAMENTO_CANDIDATOS = 2000
+# Candidatos pontuados também pelas palavras comuns que ficaram fora do orçamento
+MAXIMO_REPONTUADOS = 200
+# Candidatos que passam para o cálculo exato da similaridade do título
+MAXIMO_CONFERIDOS = 50
+
+
+def montar_consulta_fts(termo: str) -> str:
+    """
+    Converte o texto digitado pelo usuário em uma consulta FTS5 segura.
+    Cada palavra vira um termo entre aspas (sem operadores do FTS5) e a última
+    é tratada como prefixo, para a busca funcionar enquanto o usuário digita.
+    Retorna '' quando não há palavras.
+    """
+    palavras = _PALAVRA.findall(termo)
+    if not palavras:
+        return ''
+    termos = [f'"{palavra}"' for palavra in palavras]
+    termos[-1] += '*'
+    return ' '.join(termos)
+
+
+def normalizar_titulo(texto: str) -> str:
+    """Remove acentos e pontuação e passa para minúsculas."""
+    sem_acentos = unicodedata.normalize('NFKD', texto)
+    sem_acentos = ''.join(c for c in sem_acentos if not unicodedata.combining(c))
+    return ' '.join(_PALAVRA.findall(sem_acentos.casefold()))
+
+
+def trigramas_palavra(palavra: str) -> Set[str]:
+    """
+    Trigramas de uma palavra normalizada, com dois espaços antes e um depois
+    (como o pg_trgm), para que o início da palavra pese mais na similaridade.
+    """
+    palavra = f'  {palavra} '
+    return {palavra[i:i + 3] for i in range(len(palavra) - 2)}
+
+
+def gerar_trigramas(texto: str) -> Set[str]:
+    """Gera os trigramas de todas as palavras do texto normalizado."""
+    trigramas = set()
+    for palavra in normalizar_titulo(texto).split():
+        trigramas |= trigramas_palavra(palavra)
+    return trigramas
+
+
+def similaridade(a: Set[str], b: Set[str]) -> float:
+    """Similaridade de Jaccard entre dois conjuntos de trigramas."""
+    if not a or not b:
+        return 0.0
+    comuns = len(a & b)
+    return comuns / (len(a) + len(b) - comuns)
+
+
+def indexar_trigramas(cursor, filme_id: int, titulo: str):
+    """
+    Grava as palavras do título no índice de busca aproximada.
+    Cada palavra nova do vocabulário tem seus trigramas indexados uma única vez;
+    o título só guarda a ligação palavra -> filme.
+    """
+    for palavra in set(normalizar_titulo(titulo).split()):
+        cursor.execute('SELECT id FROM palavras_titulos WHERE palavra = ?', (palavra,))
+        linha = cursor.fetchone()
+        if linha:
+            palavra_id = linha[0]
+        else:
+            trigramas = trigramas_palavra(palavra)
+            cursor.execute(
+                'INSERT INTO palavras_titulos (palavra, trigramas, filmes) VALUES (?, ?, 0)',
+                (palavra, len(trigramas))
+            )
+            palavra_id = cursor.lastrowid
+            cursor.executemany(
+                'INSERT INTO palavras_trigramas (trigrama, palavra_id) VALUES (?, ?)',
+                [(trigrama, palavra_id) for trigrama in trigramas]
+            )
+        cursor.execute('INSERT OR IGNORE INTO titulos_palavras (palavra_id, filme_id) VALUES (?, ?)',
+                       (palavra_id, filme_id))
+        if cursor.rowcount:
+            cursor.execute('UPDATE palavras_titulos SET filmes = filmes + 1 WHERE id = ?', (palavra_id,))
+
+
+def indexar_trigramas_em_lote(cursor, titulos: List[Tuple[int, str]]):
+    """
+    Versão de indexar_trigramas para muitos títulos [(filme_id, titulo)] de uma vez:
+    lê o vocabulário uma vez e grava palavras, trigramas e ligações com executemany.
+    """
+    palavras_por_filme = [(filme_id, set(normalizar_titulo(titulo).split())) for filme_id, titulo in titulos]
+    palavras = sorted({palavra for _, palavras in palavras_por_filme for palavra in palavras})
+    vocabulario = _ids_palavras(cursor, palavras)
+
+    novas = [palavra for palavra in palavras if palavra not in vocabulario]
+    cursor.executemany(
+        'INSERT INTO palavras_titulos (palavra, trigramas, filmes) VALUES (?, ?, 0)',
+        [(palavra, len(trigramas_palavra(palavra))) for palavra in novas]
+    )
+    if novas:
+        vocabulario.update(_ids_palavras(cursor, novas))
+        cursor.executemany(
+            'INSERT INTO palavras_trigramas (trigrama, palavra_id) VALUES (?, ?)',
+            [(trigrama, vocabulario[palavra]) for palavra in novas for trigrama in trigramas_palavra(palavra)]
+        )
+
+    ligacoes = [(vocabulario[palavra], filme_id) for filme_id, palavras in palavras_por_filme for palavra in palavras]
+    cursor.executemany('INSERT OR IGNORE INTO titulos_palavras (palavra_id, filme_id) VALUES (?, ?)', ligacoes)
+    filmes_por_palavra: Dict[int, int] = defaultdict(int)
+    for palavra_id, _ in ligacoes:
+        filmes_por_palavra[palavra_id] += 1
+    cursor.executemany('UPDATE palavras_titulos SET filmes = filmes + ? WHERE id = ?',
+                       [(total, palavra_id) for palavra_id, total in filmes_por_palavra.items()])
+
+
+def _ids_palavras(cursor, palavras: List[str]) -> Dict[str, int]:
+    """Retorna {palavra: id} das palavras que já estão no vocabulário."""
+    ids = {}
+    for inicio in range(0, len(palavras), 500):
+        fatia = palavras[inicio:inicio + 500]
+        cursor.execute(f'SELECT palavra, id FROM palavras_titulos WHERE palavra IN ({_marcadores(fatia)})', fatia)
+        ids.update(cursor.fetchall())
+    return ids
+
+
+def remover_trigramas(cursor, filme_id: int):
+    """Remove o título do filme do índice de busca aproximada."""
+    cursor.execute('''
+        UPDATE palavras_titulos SET filmes = filmes - 1
+        WHERE id IN (SELECT palavra_id FROM titulos_palavras WHERE filme_id = ?)
+    ''', (filme_id,))
+    cursor.execute('DELETE FROM titulos_palavras WHERE filme_id = ?', (filme_id,))
+
+
+def remover_trigramas_em_lote(cursor, filme_ids: List[int]):
+    """Versão de remover_trigramas para muitos filmes, com um UPDATE e um DELETE por fatia de ids."""
+    for inicio in range(0, len(filme_ids), 500):
+        fatia = filme_ids[inicio:inicio + 500]
+        cursor.execute(f'''
+            UPDATE palavras_titulos SET filmes = filmes - removidos.total
+            FROM (SELECT palavra_id, COUNT(*) AS total FROM titulos_palavras
+                  WHERE filme_id IN ({_marcadores(fatia)}) GROUP BY palavra_id) AS removidos
+            WHERE palavras_titulos.id = removidos.palavra_id
+        ''', fatia)
+        cursor.execute(f'DELETE FROM titulos_palavras WHERE filme_id IN ({_marcadores(fatia)})', fatia)
+
+
+def _variantes(cursor, palavra: str) -> List[Tuple[int, float, int]]:
+    """
+    Retorna [(palavra_id, similaridade, filmes)] das palavras do vocabulário dos
+    títulos parecidas com a palavra digitada, as mais parecidas primeiro.
+    """
+    trigramas = trigramas_palavra(palavra)
+    cursor.execute(f'''
+        SELECT p.id, COUNT(*), p.trigramas, p.filmes
+        FROM palavras_trigramas pt
+        JOIN palavras_titulos p ON p.id = pt.palavra_id
+        WHERE pt.trigrama IN ({_marcadores(trigramas)}) AND p.filmes > 0
+        GROUP BY p.id
+    ''', list(trigramas))
+    variantes = []
+    for palavra_id, comuns, total, filmes in cursor.fetchall():
+        valor = comuns / (len(trigramas) + total - comuns)
+        if valor >= SIMILARIDADE_PALAVRA:
+            variantes.append((palavra_id, valor, filmes))
+    variantes.sort(key=lambda variante: -variante[1])
+    return variantes[:MAXIMO_VARIANTES]
+
+
+def _pontuar(cursor, variantes: List[Tuple[int, float, int]], pontuacao: Dict[int, float],
+             restricao: str, parametros: list):
+    """Soma a cada filme a similaridade da melhor variante da palavra que ele contém."""
+    similaridades = {palavra_id: valor for palavra_id, valor, _ in variantes}
+    cursor.execute(f'''
+        SELECT palavra_id, filme_id FROM titulos_palavras
+        WHERE palavra_id IN ({_marcadores(similaridades)}) {restricao}
+    ''', (*similaridades, *parametros))
+    melhor_por_filme: Dict[int, float] = {}
+    for palavra_id, filme_id in cursor.fetchall():
+        melhor_por_filme[filme_id] = max(melhor_por_filme.get(filme_id, 0.0), similaridades[palavra_id])
+    for filme_id, valor in melhor_por_filme.items():
+        pontuacao[filme_id] += valor
+
+
+def buscar_similares(cursor, termo: str, limite: int,
+                     similaridade_minima: float) -> List[Tuple[int, float]]:
+    """
+    Retorna [(filme_id, similaridade)] dos títulos mais parecidos com o termo,
+    pela similaridade de Jaccard entre os trigramas do termo e os do título.
+
+    Cada palavra digitada é comparada por trigramas com o vocabulário dos
+    títulos (bem menor que o catálogo), o que tolera erros de digitação.
+    Os candidatos vêm dos filmes que contêm as variantes das palavras mais
+    raras, até ORCAMENTO_CANDIDATOS ocorrências. As palavras comuns ("the",
+    "de") que não cabem no orçamento só são conferidas, por chave, nos
+    melhores candidatos. Por fim, os MAXIMO_CONFERIDOS melhores têm a
+    similaridade do título inteiro calculada.
+    """
+    palavras = list(dict.fromkeys(normalizar_titulo(termo).split()))
+    if not palavras:
+        return []
+
+    # Variantes de cada palavra, das palavras mais raras para as mais comuns
+    variantes_por_palavra = [v for v in (_variantes(cursor, palavra) for palavra in palavras) if v]
+    variantes_por_palavra.sort(key=lambda variantes: sum(v[2] for v in variantes))
+
+    pontuacao: Dict[int, float] = defaultdict(float)
+    lidas = 0
+    restantes = []
+    for variantes in variantes_por_palavra:
+        ocorrencias = sum(v[2] for v in variantes)
+        if pontuacao and lidas + ocorrencias > ORCAMENTO_CANDIDATOS:
+            restantes.append(variantes)
+            continue
+        lidas += ocorrencias
+        _pontuar(cursor, variantes, pontuacao, 'LIMIT ?', [ORCAMENTO_CANDIDATOS])
+
+    if not pontuacao:
+        return []
+
+    # Palavras comuns só somam pontos aos melhores candidatos já encontrados
+    if restantes:
+        melhores = sorted(pontuacao, key=lambda filme_id: -pontuacao[filme_id])[:MAXIMO_REPONTUADOS]
+        for variantes in restantes:
+            _pontuar(cursor, variantes, pontuacao,
+                     f'AND filme_id IN ({_marcadores(melhores)})', melhores)
+
+    # Cálculo exato nos candidatos com mais palavras parecidas
+    conferidos = sorted(pontuacao, key=lambda filme_id: -pontuacao[filme_id])[:MAXIMO_CONFERIDOS]
+    cursor.execute(f'SELECT id, titulo FROM filmes WHERE id IN ({_marcadores(conferidos)})', conferidos)
+    trigramas_termo = gerar_trigramas(termo)
+    resultado = []
+    for filme_id, titulo in cursor.fetchall():
+        valor = similaridade(trigramas_termo, gerar_trigramas(titulo))
+        if valor >= similaridade_minima:
+            resultado.append((filme_id, valor))
+
+    resultado.sort(key=lambda item: (-item[1], item[0]))
+    return resultado[:limite]
+
+
+def _marcadores(valores) -> str:
+    return ', '.join('?' * len(valores))
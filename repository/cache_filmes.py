@@ -0,0 +1,153 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from repository import eventos
+from repository.filmesCRUD import FilmeRepository
+
+# Memória máxima estimada das entradas guardadas, em bytes (32 MiB)
+MAXIMO_BYTES = 32 * 1024 * 1024
+# Tempo de vida de uma entrada, em segundos
+TTL_SEGUNDOS = 300.0
+# Custo estimado de cada entrada além dos seus textos (dicionário, listas e chave)
+_CUSTO_ENTRADA = 600
+
+
+def _copiar(filme: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Cópia que o chamador pode alterar sem mexer na entrada guardada."""
+    if filme is None:
+        return None
+    copia = dict(filme)
+    for campo in ('generos', 'dublagens', 'legendas'):
+        copia[campo] = list(filme[campo])
+    copia['elenco'] = [dict(membro) for membro in filme['elenco']]
+    return copia
+
+
+def _tamanho(filme: Optional[Dict[str, Any]]) -> int:
+    """Estimativa dos bytes ocupados pelo dicionário do filme (capa incluída, se carregada)."""
+    if filme is None:
+        return _CUSTO_ENTRADA
+    tamanho = _CUSTO_ENTRADA
+    for valor in filme.values():
+        if isinstance(valor, (str, bytes)):
+            tamanho += sys.getsizeof(valor)
+        elif isinstance(valor, list):
+            tamanho += sys.getsizeof(valor)
+            for item in valor:
+                textos = item.values() if isinstance(item, dict) else (item,)
+                tamanho += sum(sys.getsizeof(texto) for texto in textos)
+    return tamanho
+
+
+class RepositorioComCache:
+    """
+    Cache de leitura (read-through) de FilmeRepository.buscar_por_id, com
+    despejo LRU, tempo de vida (TTL) e limite de memória estimada. Os demais
+    métodos vão direto ao repositório, então esta classe pode substituí-lo.
+
+    Entradas de um filme são descartadas pelos eventos de criar, atualizar e
+    deletar (repository.eventos); a importação em massa publica CRIADO sem
+    filme_id, que descarta só os "não encontrado" guardados. Uma leitura
+    que começou antes de uma alteração não é guardada.
+    """
+
+    def __init__(self, repositorio: Optional[FilmeRepository] = None,
+                 maximo_bytes: int = MAXIMO_BYTES, ttl_segundos: float = TTL_SEGUNDOS):
+        self.repositorio = repositorio or FilmeRepository()
+        self.maximo_bytes = maximo_bytes
+        self.ttl_segundos = ttl_segundos
+        # (filme_id, incluir_capa) -> (filme, bytes estimados, expira_em)
+        self._entradas: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._geracao = 0
+        self._trava = threading.RLock()
+        self._contadores = dict.fromkeys(('acertos', 'falhas', 'expiradas', 'despejos', 'invalidacoes'), 0)
+
+        eventos.inscrever(self.ao_alterar_filme)
+
+    def buscar_por_id(self, filme_id: int, incluir_capa: bool = True) -> Optional[Dict[str, Any]]:
+        """Como FilmeRepository.buscar_por_id, consultando o banco só quando a entrada não está guardada."""
+        chave = (filme_id, incluir_capa)
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                if entrada[2] > time.monotonic():
+                    self._entradas.move_to_end(chave)
+                    self._contadores['acertos'] += 1
+                    return _copiar(entrada[0])
+                self._remover(chave)
+                self._contadores['expiradas'] += 1
+            self._contadores['falhas'] += 1
+            geracao = self._geracao
+
+        filme = self.repositorio.buscar_por_id(filme_id, incluir_capa)
+
+        tamanho = _tamanho(filme)
+        with self._trava:
+            # Um filme alterado durante a consulta pode ter sido lido antes do commit
+            if geracao == self._geracao and tamanho <= self.maximo_bytes:
+                self._remover(chave)
+                self._entradas[chave] = (filme, tamanho, time.monotonic() + self.ttl_segundos)
+                self._bytes += tamanho
+                while self._bytes > self.maximo_bytes:
+                    self._remover(next(iter(self._entradas)))
+                    self._contadores['despejos'] += 1
+        return _copiar(filme)
+
+    def invalidar(self, filme_id: Optional[int] = None):
+        """Descarta as entradas de um filme, ou todas sem filme_id."""
+        with self._trava:
+            self._geracao += 1
+            chaves = list(self._entradas) if filme_id is None else [
+                (filme_id, incluir_capa) for incluir_capa in (True, False)]
+            for chave in chaves:
+                if self._remover(chave):
+                    self._contadores['invalidacoes'] += 1
+
+    def ao_alterar_filme(self, evento: str, filme_id: Optional[int], campos):
+        """Observador de repository.eventos."""
+        if filme_id is not None:
+            self.invalidar(filme_id)
+        elif evento == eventos.CRIADO:
+            # Filmes novos em massa: só os "não encontrado" guardados ficam errados
+            with self._trava:
+                self._geracao += 1
+                for chave in [chave for chave, entrada in self._entradas.items() if entrada[0] is None]:
+                    self._remover(chave)
+                    self._contadores['invalidacoes'] += 1
+        else:
+            self.invalidar()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores de acertos, falhas, expiradas, despejos e invalidações, com ocupação atual."""
+        with self._trava:
+            consultas = self._contadores['acertos'] + self._contadores['falhas']
+            return {
+                **self._contadores,
+                'taxa_acerto': self._contadores['acertos'] / consultas if consultas else 0.0,
+                'itens': len(self._entradas),
+                'bytes': self._bytes,
+                'maximo_bytes': self.maximo_bytes,
+            }
+
+    def fechar(self):
+        """Para de observar as alterações de filmes e esvazia o cache."""
+        eventos.cancelar_inscricao(self.ao_alterar_filme)
+        with self._trava:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def __getattr__(self, nome: str):
+        if nome == 'repositorio':
+            raise AttributeError(nome)
+        return getattr(self.repositorio, nome)
+
+    # Métodos auxiliares
+    def _remover(self, chave) -> bool:
+        entrada = self._entradas.pop(chave, None)
+        if entrada is None:
+            return False
+        self._bytes -= entrada[1]
+        return True
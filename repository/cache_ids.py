@@ -0,0 +1,157 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable
+
+# Tabelas grandes demais para carregar inteiras: guardam só os nomes usados recentemente (LRU)
+TABELAS_LRU = frozenset(('atores',))
+# Nomes guardados por tabela com LRU
+MAXIMO_LRU = 50_000
+# Nomes enviados em um único IN (...), abaixo do limite de variáveis do SQLite
+TAMANHO_FATIA = 500
+
+
+def _banco(con) -> str:
+    """Identifica o arquivo do banco da conexão, para não misturar ids de bancos diferentes."""
+    caminho = getattr(con, 'caminho', None)
+    if caminho is None:
+        caminho = next((linha[2] for linha in con.execute('PRAGMA database_list') if linha[1] == 'main'), '')
+    # Bancos em memória são exclusivos de cada conexão
+    return caminho or f':memory:{id(con)}'
+
+
+class CacheIds:
+    """
+    Cache dos ids das tabelas de valores (generos, dublagens, legendas_disponiveis, atores),
+    compartilhado por todos os repositórios do processo.
+
+    As tabelas pequenas são carregadas inteiras no primeiro uso; atores guarda só
+    os MAXIMO_LRU nomes usados mais recentemente. Nomes novos são gravados com
+    INSERT ... ON CONFLICT DO NOTHING RETURNING id. Os ids gravados dentro de
+    transacao() ficam à parte até o commit e são descartados se a transação falhar;
+    fora de transacao(), ids gravados em uma transação aberta não são guardados.
+    """
+
+    def __init__(self, maximo_lru: int = MAXIMO_LRU):
+        self.maximo_lru = maximo_lru
+        self._ids: Dict[tuple, OrderedDict] = {}
+        self._trava = threading.Lock()
+        self._local = threading.local()
+
+    def obter_id(self, cursor, tabela: str, coluna: str, valor: str) -> int:
+        """Retorna o id do valor na tabela, gravando-o se ainda não existir."""
+        return self.obter_ids(cursor, tabela, coluna, (valor,))[valor]
+
+    def obter_ids(self, cursor, tabela: str, coluna: str, valores: Iterable[str]) -> Dict[str, int]:
+        """Retorna {valor: id} de todos os valores, gravando de uma vez os que não existirem."""
+        con = cursor.connection
+        chave = (_banco(con), tabela)
+        pendentes = self._pendentes(con).setdefault(chave, {})
+        valores = list(dict.fromkeys(valores))
+
+        ids = {}
+        with self._trava:
+            if chave not in self._ids:
+                self._ids[chave] = OrderedDict()
+                if tabela not in TABELAS_LRU:
+                    cursor.execute(f'SELECT {coluna}, id FROM {tabela}')
+                    self._ids[chave].update(cursor.fetchall())
+            confirmados = self._ids[chave]
+            for valor in valores:
+                if valor in pendentes:
+                    ids[valor] = pendentes[valor]
+                elif valor in confirmados:
+                    confirmados.move_to_end(valor)
+                    ids[valor] = confirmados[valor]
+
+        faltando = [valor for valor in valores if valor not in ids]
+        if not faltando:
+            return ids
+
+        # Em tabelas com LRU o nome pode existir no banco e só ter saído do cache
+        encontrados = {}
+        if tabela in TABELAS_LRU:
+            for inicio in range(0, len(faltando), TAMANHO_FATIA):
+                fatia = faltando[inicio:inicio + TAMANHO_FATIA]
+                cursor.execute(f'SELECT {coluna}, id FROM {tabela} WHERE {coluna} IN ({", ".join("?" * len(fatia))})',
+                               fatia)
+                encontrados.update(cursor.fetchall())
+
+        gravados = {}
+        for valor in faltando:
+            if valor in encontrados:
+                continue
+            cursor.execute(f'INSERT INTO {tabela} ({coluna}) VALUES (?) ON CONFLICT ({coluna}) DO NOTHING RETURNING id',
+                           (valor,))
+            linha = cursor.fetchone()
+            if linha is None:
+                # Gravado por outra conexão depois da carga do cache
+                cursor.execute(f'SELECT id FROM {tabela} WHERE {coluna} = ?', (valor,))
+                encontrados[valor] = cursor.fetchone()[0]
+            else:
+                gravados[valor] = linha[0]
+
+        ids.update(encontrados)
+        ids.update(gravados)
+        with self._trava:
+            self._guardar(chave, encontrados)
+            if self._em_transacao(con):
+                pendentes.update(gravados)
+            elif not con.in_transaction:
+                self._guardar(chave, gravados)
+        return ids
+
+    @contextmanager
+    def transacao(self, con):
+        """
+        Equivale a `with con:`, mas confirma no cache os ids gravados na transação
+        só depois do commit e os descarta no rollback.
+        """
+        transacoes = self._transacoes()
+        transacoes[id(con)] = {}
+        try:
+            with con:
+                yield con
+        except BaseException:
+            transacoes.pop(id(con), None)
+            raise
+        else:
+            pendentes = transacoes.pop(id(con), {})
+            with self._trava:
+                for chave, ids in pendentes.items():
+                    if chave in self._ids:
+                        self._guardar(chave, ids)
+
+    def limpar(self):
+        """Esvazia o cache; o próximo uso de cada tabela a carrega de novo."""
+        with self._trava:
+            self._ids.clear()
+
+    # Métodos auxiliares
+    def _transacoes(self) -> Dict[int, Dict[tuple, Dict[str, int]]]:
+        if not hasattr(self._local, 'transacoes'):
+            self._local.transacoes = {}
+        return self._local.transacoes
+
+    def _em_transacao(self, con) -> bool:
+        return id(con) in self._transacoes()
+
+    def _pendentes(self, con) -> Dict[tuple, Dict[str, int]]:
+        """Ids gravados na transacao() em andamento da conexão ({} descartável se não houver)."""
+        return self._transacoes().get(id(con), {})
+
+    def _guardar(self, chave: tuple, ids: Dict[str, int]):
+        confirmados = self._ids.get(chave)
+        if confirmados is None:
+            return
+        confirmados.update(ids)
+        if chave[1] in TABELAS_LRU:
+            for valor in ids:
+                confirmados.move_to_end(valor)
+            while len(confirmados) > self.maximo_lru:
+                confirmados.popitem(last=False)
+
+
+# Instância única do processo, usada por todos os repositórios e pelo importador
+cache_ids = CacheIds()
+transacao = cache_ids.transacao
@@ -0,0 +1,118 @@
+import sqlite3
+
+# Tamanho dos blocos lidos do BLOB a cada chamada de Blob.read
+TAMANHO_BLOCO = 64 * 1024
+
+
+class CapaLazy:
+    """
+    Referência à capa de um filme que só é lida do banco quando usada.
+    A leitura usa a E/S incremental de BLOBs do SQLite (Connection.blobopen),
+    sem carregar a coluna capa junto com a listagem. O BLOB é aberto na conexão
+    de leitura da thread que usa a capa, então a referência pode ser passada
+    para outras threads (por exemplo, as que geram miniaturas).
+    """
+    __slots__ = ('_banco', 'filme_id', '_tamanho')
+
+    def __init__(self, banco, filme_id: int):
+        # banco: GerenciadorConexoes de cinefilmesdb
+        self._banco = banco
+        self.filme_id = filme_id
+        self._tamanho = None
+
+    def abrir(self) -> sqlite3.Blob:
+        """
+        Abre a capa como um objeto de arquivo somente leitura (read/seek/tell).
+        Pode ser passado direto para Image.open; use com `with` para fechá-lo.
+        """
+        return self._banco.conexao_leitura().blobopen('filmes', 'capa', self.filme_id, readonly=True)
+
+    def tamanho(self) -> int:
+        """Retorna o tamanho da capa em bytes."""
+        if self._tamanho is None:
+            with self.abrir() as blob:
+                self._tamanho = len(blob)
+        return self._tamanho
+
+    def ler_em(self, destino) -> int:
+        """
+        Copia a capa para um buffer gravável já alocado (bytearray, memoryview...),
+        bloco a bloco, e retorna quantos bytes foram escritos.
+        Permite reaproveitar o mesmo buffer para várias capas.
+        """
+        janela = memoryview(destino).cast('B')
+        with self.abrir() as blob:
+            total = len(blob)
+            if total > len(janela):
+                raise ValueError(f'Buffer de {len(janela)} bytes menor que a capa ({total} bytes).')
+            posicao = 0
+            while posicao < total:
+                bloco = blob.read(min(TAMANHO_BLOCO, total - posicao))
+                janela[posicao:posicao + len(bloco)] = bloco
+                posicao += len(bloco)
+        self._tamanho = total
+        return total
+
+    def ler(self) -> memoryview:
+        """Lê a capa inteira para um buffer novo e o retorna como memoryview."""
+        buffer = bytearray(self.tamanho())
+        tamanho = self.ler_em(buffer)
+        return memoryview(buffer)[:tamanho]
+
+    def e_do_filme(self, banco, filme_id: int) -> bool:
+        """Indica se a referência é a capa do filme `filme_id` no banco informado."""
+        return self._banco is banco and self.filme_id == filme_id
+
+    def __repr__(self) -> str:
+        return f'CapaLazy(filme_id={self.filme_id})'
+
+
+class CapaEmDisco:
+    """
+    Referência a uma capa guardada no ArmazenamentoCapas, com a mesma interface
+    de CapaLazy. A leitura é feita por mmap, sem copiar o arquivo para a memória.
+    """
+    __slots__ = ('_armazenamento', 'digest')
+
+    def __init__(self, armazenamento, digest: str):
+        self._armazenamento = armazenamento
+        self.digest = digest
+
+    def abrir(self):
+        """Retorna o mmap da capa (read/seek/tell); use com `with` para fechá-lo."""
+        return self._armazenamento.abrir(self.digest)
+
+    def tamanho(self) -> int:
+        return self._armazenamento.tamanho(self.digest)
+
+    def ler_em(self, destino) -> int:
+        """Copia a capa para um buffer gravável já alocado e retorna o tamanho."""
+        janela = memoryview(destino).cast('B')
+        with self.abrir() as mapa:
+            total = len(mapa)
+            if total > len(janela):
+                raise ValueError(f'Buffer de {len(janela)} bytes menor que a capa ({total} bytes).')
+            with memoryview(mapa) as origem:
+                janela[:total] = origem
+        return total
+
+    def ler(self) -> memoryview:
+        """
+        Retorna uma memoryview sobre o mmap da capa, sem cópia.
+        O mapeamento fica aberto enquanto a memoryview estiver em uso.
+        """
+        return memoryview(self.abrir())
+
+    def __repr__(self) -> str:
+        return f'CapaEmDisco(digest={self.digest!r})'
+
+
+def resolver_capa(capa):
+    """
+    Retorna os bytes de uma referência CapaLazy ou CapaEmDisco (por exemplo, a
+    de um dicionário vindo de listar_todos); outros valores voltam como estão.
+    """
+    if isinstance(capa, (CapaLazy, CapaEmDisco)):
+        with capa.abrir() as arquivo:
+            return arquivo.read()
+    return capa
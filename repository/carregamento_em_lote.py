@@ -0,0 +1,86 @@
+from typing import List, Dict, Any, Iterable
+
+# Quantidade máxima de ids enviados em um único IN (...), abaixo do limite
+# de variáveis do SQLite
+TAMANHO_LOTE_IDS = 500
+
+
+def _em_lotes(ids: List[int], tamanho: int = TAMANHO_LOTE_IDS) -> Iterable[List[int]]:
+    """Divide a lista de ids em fatias de no máximo `tamanho` elementos."""
+    for inicio in range(0, len(ids), tamanho):
+        yield ids[inicio:inicio + tamanho]
+
+
+def _agrupar(cursor, sql: str, filme_ids: List[int], destino: Dict[int, list], montar):
+    """Executa a consulta para cada fatia de ids e agrupa as linhas por filme."""
+    for lote in _em_lotes(filme_ids):
+        marcadores = ', '.join('?' * len(lote))
+        cursor.execute(sql.format(marcadores=marcadores), lote)
+        for linha in cursor.fetchall():
+            destino[linha[0]].append(montar(linha))
+
+
+def buscar_relacionamentos_em_lote(cursor, filme_ids: List[int]) -> Dict[int, Dict[str, list]]:
+    """
+    Busca gêneros, dublagens, legendas e elenco de vários filmes de uma vez.
+    Executa uma consulta por relacionamento para cada lote de ids, em vez de
+    quatro consultas por filme, e devolve {filme_id: {'generos': [...], ...}}.
+    """
+    generos = {filme_id: [] for filme_id in filme_ids}
+    dublagens = {filme_id: [] for filme_id in filme_ids}
+    legendas = {filme_id: [] for filme_id in filme_ids}
+    elenco = {filme_id: [] for filme_id in filme_ids}
+
+    _agrupar(cursor, '''
+        SELECT fg.filme_id, g.nome FROM generos g
+        JOIN filmes_generos fg ON g.id = fg.genero_id
+        WHERE fg.filme_id IN ({marcadores})
+    ''', filme_ids, generos, lambda linha: linha[1])
+
+    _agrupar(cursor, '''
+        SELECT fd.filme_id, d.idioma FROM dublagens d
+        JOIN filmes_dublagens fd ON d.id = fd.dublagem_id
+        WHERE fd.filme_id IN ({marcadores})
+    ''', filme_ids, dublagens, lambda linha: linha[1])
+
+    _agrupar(cursor, '''
+        SELECT fl.filme_id, l.idioma FROM legendas_disponiveis l
+        JOIN filmes_legendas_disponiveis fl ON l.id = fl.legendas_disponiveis_id
+        WHERE fl.filme_id IN ({marcadores})
+    ''', filme_ids, legendas, lambda linha: linha[1])
+
+    _agrupar(cursor, '''
+        SELECT e.filme_id, a.nome, e.papel FROM atores a
+        JOIN elenco e ON a.id = e.ator_id
+        WHERE e.filme_id IN ({marcadores})
+    ''', filme_ids, elenco, lambda linha: {'ator': linha[1], 'papel': linha[2]})
+
+    return {
+        filme_id: {
+            'generos': generos[filme_id],
+            'dublagens': dublagens[filme_id],
+            'legendas': legendas[filme_id],
+            'elenco': elenco[filme_id]
+        }
+        for filme_id in filme_ids
+    }
+
+
+def montar_filmes_em_lote(cursor, filmes: List[tuple]) -> List[Dict[str, Any]]:
+    """Monta os dicionários completos de uma página de linhas da tabela filmes."""
+    relacionamentos = buscar_relacionamentos_em_lote(cursor, [filme[0] for filme in filmes])
+    lista_filmes = []
+    for filme in filmes:
+        dados_filme = {
+            'id': filme[0],
+            'titulo': filme[1],
+            'resumo': filme[2],
+            'classificacao_indicativa': filme[3],
+            'classificacao_IMDB': filme[4],
+            'duracao_minutos': filme[5],
+            'data_de_lancamento': filme[6],
+            'capa': filme[7]
+        }
+        dados_filme.update(relacionamentos[filme[0]])
+        lista_filmes.append(dados_filme)
+    return lista_filmes
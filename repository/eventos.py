@@ -0,0 +1,38 @@
+import threading
+from typing import Callable, FrozenSet, List, Optional
+
+# Eventos publicados pelos caminhos de escrita do catálogo
+CRIADO = 'criado'
+ATUALIZADO = 'atualizado'
+DELETADO = 'deletado'
+
+# Observador: função(evento, filme_id, campos alterados); filme_id é None
+# quando vários filmes mudaram de uma vez (importação e operações em lote)
+Observador = Callable[[str, Optional[int], FrozenSet[str]], None]
+
+_observadores: List[Observador] = []
+_trava = threading.Lock()
+
+
+def inscrever(observador: Observador):
+    """
+    Registra um observador das alterações de filmes (padrão Observer).
+    Caches e telas usam isso para se invalidar quando um filme muda.
+    """
+    with _trava:
+        if observador not in _observadores:
+            _observadores.append(observador)
+
+
+def cancelar_inscricao(observador: Observador):
+    with _trava:
+        if observador in _observadores:
+            _observadores.remove(observador)
+
+
+def publicar(evento: str, filme_id: Optional[int], campos: FrozenSet[str] = frozenset()):
+    """Notifica todos os observadores; deve ser chamado depois do commit."""
+    with _trava:
+        observadores = list(_observadores)
+    for observador in observadores:
+        observador(evento, filme_id, campos)
@@ -0,0 +1,167 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Facetas de filtro: (tabela de valores, coluna do nome, tabela de junção, coluna do valor)
+FACETAS = {
+    'generos': ('generos', 'nome', 'filmes_generos', 'genero_id'),
+    'dublagens': ('dublagens', 'idioma', 'filmes_dublagens', 'dublagem_id'),
+    'legendas': ('legendas_disponiveis', 'idioma', 'filmes_legendas_disponiveis', 'legendas_disponiveis_id'),
+    'atores': ('atores', 'nome', 'elenco', 'ator_id'),
+}
+
+# Faceta da contagem_facetas com a parte inteira da nota do IMDB como valor
+FACETA_IMDB = 'imdb'
+
+# Contagem real de filmes por valor de faceta, no formato da tabela contagem_facetas
+CONTAGEM_REAL_SQL = f'''
+    SELECT 'generos', genero_id, COUNT(*) FROM filmes_generos GROUP BY genero_id
+    UNION ALL
+    SELECT 'dublagens', dublagem_id, COUNT(*) FROM filmes_dublagens GROUP BY dublagem_id
+    UNION ALL
+    SELECT 'legendas', legendas_disponiveis_id, COUNT(*)
+    FROM filmes_legendas_disponiveis GROUP BY legendas_disponiveis_id
+    UNION ALL
+    SELECT '{FACETA_IMDB}', CAST(classificacao_IMDB AS INTEGER), COUNT(*)
+    FROM filmes WHERE classificacao_IMDB IS NOT NULL GROUP BY 2
+'''
+
+# Ids da lista mais curta conferidos por vez nas demais listas
+TAMANHO_BLOCO_INTERSECAO = 500
+
+
+def _marcadores(valores) -> str:
+    return ', '.join('?' * len(valores))
+
+
+def resolver_valores(cursor, faceta: str, nomes: Sequence[str]) -> Optional[List[int]]:
+    """Converte os nomes de uma faceta em ids; retorna None se algum não existir."""
+    tabela, coluna, _, _ = FACETAS[faceta]
+    nomes = list(dict.fromkeys(nomes))
+    cursor.execute(f'SELECT id FROM {tabela} WHERE {coluna} IN ({_marcadores(nomes)})', nomes)
+    ids = [linha[0] for linha in cursor.fetchall()]
+    return ids if len(ids) == len(nomes) else None
+
+
+def _condicoes_faixas(faixas: Dict[str, Tuple[Optional[float], Optional[float]]]) -> Tuple[str, list]:
+    """Monta as condições SQL das faixas {coluna: (mínimo, máximo)}."""
+    condicoes, parametros = [], []
+    for coluna, (minimo, maximo) in faixas.items():
+        if minimo is not None:
+            condicoes.append(f'{coluna} >= ?')
+            parametros.append(minimo)
+        if maximo is not None:
+            condicoes.append(f'{coluna} <= ?')
+            parametros.append(maximo)
+    return ' AND '.join(condicoes), parametros
+
+
+def buscar_ids(cursor, listas: List[Tuple[str, str, int]],
+               faixas: Dict[str, Tuple[Optional[float], Optional[float]]],
+               limite: int, apos_id: int = 0) -> List[int]:
+    """
+    Retorna até `limite` ids de filmes, em ordem crescente e maiores que apos_id,
+    presentes em todas as listas (tabela de junção, coluna, valor) e dentro das faixas.
+
+    Cada lista é lida pelo índice reverso (valor, filme_id), já ordenada por filme_id.
+    A mais curta conduz a interseção: seus ids são conferidos em blocos nas demais
+    listas por busca no índice, e a leitura para assim que `limite` ids passam em
+    todos os critérios. O custo acompanha o tamanho do resultado e da menor lista,
+    não o do catálogo.
+    """
+    condicoes_faixas, parametros_faixas = _condicoes_faixas(faixas)
+
+    if not listas:
+        where = f'WHERE id > ?{" AND " + condicoes_faixas if condicoes_faixas else ""}'
+        cursor.execute(f'SELECT id FROM filmes {where} ORDER BY id LIMIT ?',
+                       (apos_id, *parametros_faixas, limite))
+        return [linha[0] for linha in cursor.fetchall()]
+
+    # Tamanho de cada lista, lido só do índice reverso
+    tamanhos = []
+    for tabela, coluna, valor in listas:
+        cursor.execute(f'SELECT COUNT(*) FROM {tabela} WHERE {coluna} = ? AND filme_id > ?',
+                       (valor, apos_id))
+        tamanhos.append(cursor.fetchone()[0])
+    ordem = sorted(range(len(listas)), key=lambda i: tamanhos[i])
+    if tamanhos[ordem[0]] == 0:
+        return []
+    condutora, demais = listas[ordem[0]], [listas[i] for i in ordem[1:]]
+
+    resultado = []
+    ultimo_id = apos_id
+    while len(resultado) < limite:
+        tabela, coluna, valor = condutora
+        cursor.execute(f'''
+            SELECT filme_id FROM {tabela}
+            WHERE {coluna} = ? AND filme_id > ?
+            ORDER BY filme_id LIMIT ?
+        ''', (valor, ultimo_id, TAMANHO_BLOCO_INTERSECAO))
+        bloco = [linha[0] for linha in cursor.fetchall()]
+        if not bloco:
+            break
+        ultimo_id = bloco[-1]
+
+        # Interseção com as outras listas, da mais curta para a mais longa
+        for tabela, coluna, valor in demais:
+            if not bloco:
+                break
+            cursor.execute(f'''
+                SELECT filme_id FROM {tabela}
+                WHERE {coluna} = ? AND filme_id IN ({_marcadores(bloco)})
+                ORDER BY filme_id
+            ''', (valor, *bloco))
+            bloco = [linha[0] for linha in cursor.fetchall()]
+
+        if bloco and condicoes_faixas:
+            cursor.execute(f'''
+                SELECT id FROM filmes
+                WHERE id IN ({_marcadores(bloco)}) AND {condicoes_faixas}
+                ORDER BY id
+            ''', (*bloco, *parametros_faixas))
+            bloco = [linha[0] for linha in cursor.fetchall()]
+
+        resultado.extend(bloco)
+
+    return resultado[:limite]
+
+
+def contar_facetas(cursor) -> Dict[str, Dict[Any, int]]:
+    """
+    Lê a contagem de filmes de todas as facetas em uma única consulta:
+    {'generos': {'Drama': 4210}, 'dublagens': {...}, 'legendas': {...}, 'imdb': {7: 980}}.
+    """
+    cursor.execute(f'''
+        SELECT c.faceta, c.valor_id, COALESCE(g.nome, d.idioma, l.idioma), c.total
+        FROM contagem_facetas c
+        LEFT JOIN generos g ON c.faceta = 'generos' AND g.id = c.valor_id
+        LEFT JOIN dublagens d ON c.faceta = 'dublagens' AND d.id = c.valor_id
+        LEFT JOIN legendas_disponiveis l ON c.faceta = 'legendas' AND l.id = c.valor_id
+        WHERE c.total > 0
+    ''')
+    contagem = {'generos': {}, 'dublagens': {}, 'legendas': {}, FACETA_IMDB: {}}
+    for faceta, valor_id, nome, total in cursor.fetchall():
+        contagem[faceta][valor_id if faceta == FACETA_IMDB else nome] = total
+    return contagem
+
+
+def verificar_contagem_facetas(cursor) -> List[Tuple[str, int, int, int]]:
+    """
+    Compara a contagem_facetas com a contagem real das tabelas de junção.
+    Retorna [(faceta, valor_id, total gravado, total real)] das divergências.
+    """
+    cursor.execute(CONTAGEM_REAL_SQL)
+    reais = {(faceta, valor_id): total for faceta, valor_id, total in cursor.fetchall()}
+    cursor.execute('SELECT faceta, valor_id, total FROM contagem_facetas')
+    gravados = {(faceta, valor_id): total for faceta, valor_id, total in cursor.fetchall()}
+
+    divergencias = []
+    for chave in sorted(reais.keys() | gravados.keys()):
+        gravado, real = gravados.get(chave, 0), reais.get(chave, 0)
+        if gravado != real:
+            divergencias.append((*chave, gravado, real))
+    return divergencias
+
+
+def reconstruir_contagem_facetas(cursor):
+    """Refaz a contagem_facetas a partir das tabelas de junção."""
+    cursor.execute('DELETE FROM contagem_facetas')
+    cursor.execute(f'INSERT INTO contagem_facetas (faceta, valor_id, total) {CONTAGEM_REAL_SQL}')
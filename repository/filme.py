@@ -0,0 +1,135 @@
+import weakref
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from repository.carregamento_em_lote import _em_lotes
+
+# Campos da tabela filmes guardados no registro, na ordem do SELECT do repositório
+CAMPOS_BASE = ('id', 'titulo', 'resumo', 'classificacao_indicativa', 'classificacao_IMDB',
+               'duracao_minutos', 'data_de_lancamento', 'capa')
+# Relacionamentos carregados sob demanda
+CAMPOS_RELACIONAMENTO = ('generos', 'dublagens', 'legendas', 'elenco')
+
+
+class MembroElenco(NamedTuple):
+    ator: str
+    papel: Optional[str]
+
+
+_membro = MembroElenco._make
+
+# Consultas dos relacionamentos de uma fatia de filmes: gêneros, dublagens e legendas
+SQL_LISTAS = (
+    'SELECT fg.filme_id, g.nome FROM generos g JOIN filmes_generos fg ON g.id = fg.genero_id '
+    'WHERE fg.filme_id IN ({marcadores})',
+    'SELECT fd.filme_id, d.idioma FROM dublagens d JOIN filmes_dublagens fd ON d.id = fd.dublagem_id '
+    'WHERE fd.filme_id IN ({marcadores})',
+    'SELECT fl.filme_id, l.idioma FROM legendas_disponiveis l '
+    'JOIN filmes_legendas_disponiveis fl ON l.id = fl.legendas_disponiveis_id WHERE fl.filme_id IN ({marcadores})',
+)
+SQL_ELENCO = ('SELECT e.filme_id, a.nome, e.papel FROM atores a JOIN elenco e ON a.id = e.ator_id '
+              'WHERE e.filme_id IN ({marcadores})')
+
+
+class Filme:
+    """
+    Registro compacto e imutável de um filme, alternativa ao dicionário de
+    FilmeRepository.listar_todos. Os relacionamentos (tuplas) são lidos no
+    primeiro acesso, de uma vez para todos os filmes do mesmo resultado
+    (GrupoFilmes); filme['titulo'] também funciona, e para_dict() devolve o
+    dicionário no formato antigo.
+    """
+    __slots__ = CAMPOS_BASE + ('_relacionamentos', '_grupo', '__weakref__')
+
+    def __init__(self, *valores):
+        for campo, valor in zip(CAMPOS_BASE, valores):
+            object.__setattr__(self, campo, valor)
+        object.__setattr__(self, '_relacionamentos', None)
+        object.__setattr__(self, '_grupo', None)
+
+    def __setattr__(self, campo, valor):
+        raise AttributeError('Filme é imutável; use FilmeRepository.atualizar_parcial.')
+
+    @property
+    def generos(self) -> Tuple[str, ...]:
+        return self._carregados()[0]
+
+    @property
+    def dublagens(self) -> Tuple[str, ...]:
+        return self._carregados()[1]
+
+    @property
+    def legendas(self) -> Tuple[str, ...]:
+        return self._carregados()[2]
+
+    @property
+    def elenco(self) -> Tuple[MembroElenco, ...]:
+        return self._carregados()[3]
+
+    def __getitem__(self, campo: str):
+        if campo not in CAMPOS_BASE and campo not in CAMPOS_RELACIONAMENTO:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+    def para_dict(self) -> Dict[str, Any]:
+        """Dicionário no formato de listar_todos, com listas e elenco [{'ator', 'papel'}]."""
+        generos, dublagens, legendas, elenco = self._carregados()
+        dados = {campo: getattr(self, campo) for campo in CAMPOS_BASE}
+        dados.update({
+            'generos': list(generos),
+            'dublagens': list(dublagens),
+            'legendas': list(legendas),
+            'elenco': [membro._asdict() for membro in elenco],
+        })
+        return dados
+
+    def __repr__(self) -> str:
+        return f'Filme(id={self.id!r}, titulo={self.titulo!r})'
+
+    def _carregados(self) -> tuple:
+        if self._relacionamentos is None:
+            if self._grupo is None:
+                raise RuntimeError('Filme sem grupo de carregamento dos relacionamentos.')
+            self._grupo.carregar()
+        return self._relacionamentos
+
+
+class GrupoFilmes:
+    """
+    Filmes de um mesmo resultado, cujos relacionamentos são lidos juntos
+    (quatro consultas por fatia de ids) no primeiro acesso a qualquer um deles.
+    Guarda só referências fracas: um filme descartado não prende o resultado
+    inteiro na memória. Textos repetidos (gêneros, idiomas, atores) são
+    compartilhados entre os filmes.
+    """
+
+    def __init__(self, banco, filmes: List[Filme]):
+        # banco: GerenciadorConexoes de cinefilmesdb
+        self._banco = banco
+        self._filmes = [weakref.ref(filme) for filme in filmes]
+        for filme in filmes:
+            object.__setattr__(filme, '_grupo', self)
+
+    def carregar(self):
+        filmes = [filme for filme in (ref() for ref in self._filmes) if filme is not None]
+        ids = [filme.id for filme in filmes]
+        relacionamentos = [{filme_id: [] for filme_id in ids} for _ in CAMPOS_RELACIONAMENTO]
+        textos: Dict[Optional[str], Optional[str]] = {}
+        compartilhar = textos.setdefault
+
+        with self._banco.leitura() as con:
+            cursor = con.cursor()
+            for destino, sql in zip(relacionamentos[:3], SQL_LISTAS):
+                for fatia in _em_lotes(ids):
+                    cursor.execute(sql.format(marcadores=', '.join('?' * len(fatia))), fatia)
+                    for filme_id, valor in cursor.fetchall():
+                        destino[filme_id].append(compartilhar(valor, valor))
+            destino = relacionamentos[3]
+            for fatia in _em_lotes(ids):
+                cursor.execute(SQL_ELENCO.format(marcadores=', '.join('?' * len(fatia))), fatia)
+                for filme_id, ator, papel in cursor.fetchall():
+                    destino[filme_id].append(_membro((compartilhar(ator, ator), compartilhar(papel, papel))))
+
+        self._filmes = []
+        for filme in filmes:
+            object.__setattr__(filme, '_relacionamentos',
+                               tuple(tuple(destino[filme.id]) for destino in relacionamentos))
+            object.__setattr__(filme, '_grupo', None)
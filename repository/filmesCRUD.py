@@ -1,5 +1,38 @@
-from typing import List, Dict, Any, Optional
-from cinefilmesdb import conecta
+import hashlib
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple, Union
+from cinefilmesdb import gerenciador, GerenciadorConexoes
+from repository.carregamento_em_lote import montar_filmes_em_lote, TAMANHO_LOTE_IDS
+from repository.capa import CapaLazy, CapaEmDisco, resolver_capa
+from repository.filme import Filme, GrupoFilmes
+from repository.armazenamento_capas import ArmazenamentoCapas
+from repository import eventos
+from repository.cache_ids import cache_ids
+from repository.busca import montar_consulta_fts, buscar_similares, indexar_trigramas, remover_trigramas
+from repository.gravacao_em_lote import (FILMES_POR_TRANSACAO, gravar_lote, montar_lote,
+                                         atualizar_lote, remover_filmes)
+from repository.facetas import (FACETAS, resolver_valores, buscar_ids, contar_facetas,
+                                 verificar_contagem_facetas, reconstruir_contagem_facetas)
+
+# Colunas aceitas como chave de ordenação em iterar (todas indexadas)
+COLUNAS_ORDENACAO = ('id', 'classificacao_IMDB', 'data_de_lancamento')
+
+# Colunas de filmes na ordem esperada por _montar_filme_completo; nas listagens
+# a capa é trocada por um indicador de existência e lida depois sob demanda.
+# A última coluna é o hash da capa quando ela está no ArmazenamentoCapas.
+COLUNAS_FILME = ('id, titulo, resumo, classificacao_indicativa, classificacao_IMDB, '
+                 'duracao_minutos, data_de_lancamento')
+SELECT_FILME_COM_CAPA = f'SELECT {COLUNAS_FILME}, capa, capa_hash FROM filmes'
+SELECT_FILME_SEM_CAPA = f'SELECT {COLUNAS_FILME}, capa IS NOT NULL, capa_hash FROM filmes'
+
+# Pesos de titulo e resumo no bm25 da busca textual
+PESOS_BM25 = (10.0, 1.0)
+
+# Campos do dicionário de filme que podem ser alterados por atualizar
+CAMPOS_FILME = frozenset((
+    'titulo', 'resumo', 'classificacao_indicativa', 'classificacao_IMDB', 'duracao_minutos',
+    'data_de_lancamento', 'capa', 'generos', 'dublagens', 'legendas', 'elenco'
+))
 
 class FilmeRepository:
     """
@@ -7,36 +40,251 @@ class FilmeRepository:
     Implementa o padrão Repository para isolar a camada de dados.
     """
     
-    def __init__(self):
-        self.conecta_banco = conecta()
+    def __init__(self, armazenamento_capas: Optional[ArmazenamentoCapas] = None,
+                 banco: Optional[GerenciadorConexoes] = None):
+        # Leituras usam a conexão da thread atual; escritas, a conexão de escrita compartilhada
+        self.banco = banco or gerenciador()
+        # Se informado, as capas gravadas vão para o disco e o banco guarda só o hash
+        self.armazenamento_capas = armazenamento_capas
 
-    def listar_todos(self) -> List[Dict[str, Any]]:
-        """Lista todos os filmes com seus relacionamentos."""
-        with self.conecta_banco as con:
+    def listar_todos(self, em_lote: bool = True, tamanho_pagina: int = TAMANHO_LOTE_IDS,
+                     incluir_capa: bool = False, como_registro: bool = False) -> List[Dict[str, Any]]:
+        """
+        Lista todos os filmes com seus relacionamentos.
+        Com em_lote=True os relacionamentos são carregados por página de filmes
+        (quatro consultas por página); com em_lote=False, filme a filme.
+        Sem incluir_capa, 'capa' é um CapaLazy (ou None) em vez dos bytes.
+        Com como_registro, retorna registros Filme (bem menores que os
+        dicionários), com os relacionamentos lidos no primeiro acesso.
+        """
+        with self.banco.leitura() as con:
             cursor = con.cursor()
-            cursor.execute('SELECT * FROM filmes')
-            filmes = cursor.fetchall()
-            
-            return [self._montar_filme_completo(cursor, filme) for filme in filmes]
+            if como_registro:
+                cursor.row_factory = self._fabrica_registro(incluir_capa)
+            cursor.execute(self._select_filme(incluir_capa))
+
+            if como_registro:
+                filmes = cursor.fetchall()
+                GrupoFilmes(self.banco, filmes)
+                return filmes
+
+            if not em_lote:
+                filmes = self._preparar_capas(cursor.fetchall(), incluir_capa)
+                return [self._montar_filme_completo(cursor, filme) for filme in filmes]
+
+            cursor_relacionamentos = con.cursor()
+            lista_filmes = []
+            while True:
+                pagina = cursor.fetchmany(tamanho_pagina)
+                if not pagina:
+                    break
+                pagina = self._preparar_capas(pagina, incluir_capa)
+                lista_filmes.extend(montar_filmes_em_lote(cursor_relacionamentos, pagina))
+
+            return lista_filmes
+
+    def iterar(self, tamanho_pagina: int = TAMANHO_LOTE_IDS, apos_id: Optional[int] = None,
+               ordenar_por: str = 'id', decrescente: bool = False,
+               incluir_capa: bool = False, como_registro: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre o catálogo sob demanda, uma página por vez.
+        Usa paginação por chave (ordenar_por, id), então cada página custa o mesmo
+        independentemente da posição e só uma página fica em memória.
+        Com apos_id, continua a partir do filme com esse id na ordem pedida.
+        Sem incluir_capa, 'capa' é um CapaLazy (ou None) em vez dos bytes.
+        Com como_registro, produz registros Filme, com os relacionamentos de
+        cada página lidos juntos no primeiro acesso.
+        """
+        if ordenar_por not in COLUNAS_ORDENACAO:
+            raise ValueError(f'Ordenação por "{ordenar_por}" não suportada.')
 
-    def buscar_por_id(self, filme_id: int) -> Optional[Dict[str, Any]]:
-        """Busca um filme específico com todos seus relacionamentos."""
-        with self.conecta_banco as con:
+        # Em ordem crescente o SQLite coloca NULL antes dos valores; em decrescente, depois
+        fases = ['valores'] if ordenar_por == 'id' else ['nulos', 'valores']
+        if decrescente:
+            fases.reverse()
+
+        posicao = None
+        if apos_id is not None:
+            if ordenar_por == 'id':
+                posicao = (apos_id, apos_id)
+            else:
+                posicao = self._posicao_keyset(ordenar_por, apos_id)
+            if posicao[0] is None:
+                fases = fases[fases.index('nulos'):]
+            else:
+                fases = fases[fases.index('valores'):]
+
+        for fase in fases:
+            while True:
+                with self.banco.leitura() as con:
+                    cursor = con.cursor()
+                    pagina = self._buscar_pagina(cursor, fase, ordenar_por, decrescente,
+                                                 posicao, tamanho_pagina, incluir_capa)
+                    if not pagina:
+                        break
+                    if como_registro:
+                        filmes = [Filme(*filme) for filme in self._preparar_capas(pagina, incluir_capa)]
+                        GrupoFilmes(self.banco, filmes)
+                    else:
+                        filmes = montar_filmes_em_lote(cursor, self._preparar_capas(pagina, incluir_capa))
+
+                yield from filmes
+
+                ultimo = pagina[-1]
+                posicao = (self._valor_ordenacao(ultimo, ordenar_por), ultimo[0])
+                if len(pagina) < tamanho_pagina:
+                    break
+            # A posição só vale dentro da fase em que foi obtida
+            posicao = None
+
+    def buscar_texto(self, termo: str, pagina: int = 0, tamanho_pagina: int = 20,
+                     incluir_capa: bool = False) -> List[Dict[str, Any]]:
+        """
+        Busca filmes por palavras do título e do resumo no índice FTS5,
+        ignorando acentos e maiúsculas, ordenados por relevância (bm25).
+        A última palavra é buscada como prefixo; `pagina` começa em 0.
+        """
+        consulta = montar_consulta_fts(termo)
+        if not consulta:
+            return []
+
+        with self.banco.leitura() as con:
             cursor = con.cursor()
-            cursor.execute('SELECT * FROM filmes WHERE id = ?', (filme_id,))
+            cursor.execute(f'''
+                {self._select_filme(incluir_capa)}
+                JOIN (
+                    SELECT rowid AS fts_id, bm25(filmes_fts, ?, ?) AS relevancia
+                    FROM filmes_fts
+                    WHERE filmes_fts MATCH ?
+                    ORDER BY relevancia
+                    LIMIT ? OFFSET ?
+                ) ON id = fts_id
+                ORDER BY relevancia
+            ''', (*PESOS_BM25, consulta, tamanho_pagina, pagina * tamanho_pagina))
+            filmes = self._preparar_capas(cursor.fetchall(), incluir_capa)
+            return montar_filmes_em_lote(cursor, filmes)
+
+    def buscar_titulo_aproximado(self, termo: str, limite: int = 10,
+                                 similaridade_minima: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Busca filmes cujo título se parece com o termo, tolerando erros de digitação.
+        Usa o índice de trigramas (sem varrer a tabela filmes) e ordena pela
+        similaridade de Jaccard entre os trigramas do termo e os do título.
+        Cada filme retornado tem a chave extra 'similaridade'.
+        """
+        with self.banco.leitura() as con:
+            cursor = con.cursor()
+            similaridades = dict(buscar_similares(cursor, termo, limite, similaridade_minima))
+            if not similaridades:
+                return []
+
+            cursor.execute(
+                f'{SELECT_FILME_SEM_CAPA} WHERE id IN ({", ".join("?" * len(similaridades))})',
+                list(similaridades)
+            )
+            filmes = montar_filmes_em_lote(cursor, self._preparar_capas(cursor.fetchall(), False))
+
+        for filme in filmes:
+            filme['similaridade'] = similaridades[filme['id']]
+        filmes.sort(key=lambda filme: (-filme['similaridade'], filme['id']))
+        return filmes
+
+    def filtrar(self, generos: Optional[List[str]] = None, dublagens: Optional[List[str]] = None,
+                legendas: Optional[List[str]] = None, atores: Optional[List[str]] = None,
+                imdb_min: Optional[float] = None, imdb_max: Optional[float] = None,
+                duracao_min: Optional[int] = None, duracao_max: Optional[int] = None,
+                limite: int = 50, apos_id: Optional[int] = None,
+                incluir_capa: bool = False) -> List[Dict[str, Any]]:
+        """
+        Filtra o catálogo por facetas, em ordem de id. Todos os critérios são
+        combinados com E, inclusive os vários valores de uma mesma faceta
+        (generos=['Terror', 'Comédia'] traz os filmes com os dois gêneros).
+        As faixas de IMDB e duração incluem os extremos.
+        Para a próxima página, passe em apos_id o id do último filme retornado.
+        """
+        faixas = {}
+        if imdb_min is not None or imdb_max is not None:
+            faixas['classificacao_IMDB'] = (imdb_min, imdb_max)
+        if duracao_min is not None or duracao_max is not None:
+            faixas['duracao_minutos'] = (duracao_min, duracao_max)
+
+        with self.banco.leitura() as con:
+            cursor = con.cursor()
+            listas = []
+            for faceta, nomes in (('generos', generos), ('dublagens', dublagens),
+                                  ('legendas', legendas), ('atores', atores)):
+                if not nomes:
+                    continue
+                valores = resolver_valores(cursor, faceta, nomes)
+                if valores is None:
+                    return []
+                _, _, tabela, coluna = FACETAS[faceta]
+                listas.extend((tabela, coluna, valor) for valor in valores)
+
+            ids = buscar_ids(cursor, listas, faixas, limite, apos_id or 0)
+            if not ids:
+                return []
+
+            cursor.execute(
+                f'{self._select_filme(incluir_capa)} WHERE id IN ({", ".join("?" * len(ids))}) ORDER BY id',
+                ids
+            )
+            return montar_filmes_em_lote(cursor, self._preparar_capas(cursor.fetchall(), incluir_capa))
+
+    def contar_facetas(self) -> Dict[str, Dict[Any, int]]:
+        """
+        Retorna quantos filmes há por gênero, dublagem, legenda e faixa do IMDB
+        (parte inteira da nota), lidos da tabela contagem_facetas mantida por gatilhos.
+        """
+        with self.banco.leitura() as con:
+            return contar_facetas(con.cursor())
+
+    def verificar_contagem_facetas(self, reconstruir: bool = False) -> List[tuple]:
+        """
+        Confere a contagem_facetas contra as tabelas de junção e retorna as
+        divergências (faceta, valor_id, total gravado, total real).
+        Com reconstruir=True, refaz a tabela quando houver divergência.
+        """
+        contexto = self.banco.escrita() if reconstruir else self.banco.leitura()
+        with contexto as con:
+            cursor = con.cursor()
+            divergencias = verificar_contagem_facetas(cursor)
+            if divergencias and reconstruir:
+                reconstruir_contagem_facetas(cursor)
+            return divergencias
+
+    def buscar_por_id(self, filme_id: int, incluir_capa: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Busca um filme específico com todos seus relacionamentos.
+        Sem incluir_capa, 'capa' é um CapaLazy (ou None) em vez dos bytes.
+        """
+        with self.banco.leitura() as con:
+            cursor = con.cursor()
+            cursor.execute(f'{self._select_filme(incluir_capa)} WHERE id = ?', (filme_id,))
             filme = cursor.fetchone()
             
             if not filme:
                 return None
                 
+            filme = self._preparar_capas([filme], incluir_capa)[0]
             return self._montar_filme_completo(cursor, filme)
 
+    def obter_capa(self, filme_id: int):
+        """Retorna a referência lazy da capa do filme (CapaLazy ou CapaEmDisco) ou None."""
+        with self.banco.leitura() as con:
+            cursor = con.cursor()
+            cursor.execute(f'{SELECT_FILME_SEM_CAPA} WHERE id = ?', (filme_id,))
+            filme = cursor.fetchone()
+        if not filme:
+            return None
+        return self._preparar_capas([filme], incluir_capa=False)[0][7]
+
     def criar(self, filme_dados: Dict[str, Any]) -> Optional[int]:
         """
         Cria um novo filme com todos seus relacionamentos.
         Retorna o ID do filme criado ou None se já existir.
         """
-        with self.conecta_banco as con:
+        with self.banco.escrita() as con:
             cursor = con.cursor()
             
             # Verifica se já existe
@@ -48,46 +296,242 @@ class FilmeRepository:
             
             # Insere relacionamentos
             self._inserir_relacionamentos(cursor, filme_id, filme_dados)
-            
-            return filme_id
+
+            # Indexa o título para a busca aproximada
+            indexar_trigramas(cursor, filme_id, filme_dados['titulo'])
+
+        eventos.publicar(eventos.CRIADO, filme_id)
+        return filme_id
 
     def atualizar(self, filme_id: int, filme_dados: Dict[str, Any]) -> bool:
         """
         Atualiza um filme e seus relacionamentos.
         Retorna True se a atualização foi bem sucedida.
         """
-        with self.conecta_banco as con:
-            cursor = con.cursor()
-            
-            if not self._filme_existe_por_id(cursor, filme_id):
-                return False
+        faltando = CAMPOS_FILME - filme_dados.keys()
+        if faltando:
+            raise KeyError(f'Campos ausentes: {", ".join(sorted(faltando))}')
+        # Chaves que não são campos (o 'id' de um dicionário de listar_todos) são ignoradas
+        return self.atualizar_parcial(filme_id, {campo: filme_dados[campo] for campo in CAMPOS_FILME})
 
-            # Atualiza dados básicos
-            self._atualizar_filme_base(cursor, filme_id, filme_dados)
-            
-            # Atualiza relacionamentos
-            self._remover_relacionamentos(cursor, filme_id)
-            self._inserir_relacionamentos(cursor, filme_id, filme_dados)
-            
-            return True
+    def atualizar_parcial(self, filme_id: int, alteracoes: Dict[str, Any]) -> bool:
+        """
+        Atualiza só os campos informados (qualquer subconjunto de CAMPOS_FILME).
+        Colunas iguais às gravadas não entram no UPDATE e cada relacionamento é
+        comparado com o atual: só as ligações novas são inseridas e só as que
+        saíram são removidas (no elenco, o papel alterado vira um UPDATE).
+        Retorna True se o filme existe.
+        """
+        return self.atualizar_muitos([(filme_id, alteracoes)])[0]
 
     def deletar(self, filme_id: int) -> bool:
         """
         Deleta um filme e seus relacionamentos.
         Retorna True se a deleção foi bem sucedida.
         """
-        with self.conecta_banco as con:
+        with self.banco.escrita() as con:
             cursor = con.cursor()
             
             if not self._filme_existe_por_id(cursor, filme_id):
                 return False
 
             self._remover_relacionamentos(cursor, filme_id)
+            remover_trigramas(cursor, filme_id)
             cursor.execute('DELETE FROM filmes WHERE id = ?', (filme_id,))
-            
-            return True
+
+        eventos.publicar(eventos.DELETADO, filme_id)
+        return True
+
+    def criar_muitos(self, filmes: Iterable[Dict[str, Any]],
+                     tamanho_lote: int = FILMES_POR_TRANSACAO) -> List[Optional[int]]:
+        """
+        Cria vários filmes, em transações de `tamanho_lote` filmes gravados com
+        executemany. Os já cadastrados são reconhecidos com uma consulta por lote.
+        Retorna, na ordem recebida, o ID de cada filme criado ou None se ele já
+        existia (ou se repetia um anterior da mesma chamada).
+        """
+        resultados: List[Optional[int]] = []
+        filmes = iter(filmes)
+        while True:
+            lote_filmes = list(islice(filmes, tamanho_lote))
+            if not lote_filmes:
+                return resultados
+
+            capas = [self._separar_capa(filme['capa']) for filme in lote_filmes]
+            lote = montar_lote([{**filme, 'capa': capa} for filme, (capa, _) in zip(lote_filmes, capas)])
+            with self.banco.escrita() as con:
+                cursor = con.cursor()
+                gravados = gravar_lote(cursor, lote)['ids']
+                cursor.executemany('UPDATE filmes SET capa_hash = ? WHERE id = ?',
+                                   [(capa_hash, gravados[linha]) for linha, (_, capa_hash) in enumerate(capas)
+                                    if capa_hash is not None and linha in gravados])
+
+            resultados.extend(gravados.get(linha) for linha in range(len(lote_filmes)))
+            if gravados:
+                eventos.publicar(eventos.CRIADO, None)
+
+    def atualizar_muitos(self, alteracoes: Union[Dict[int, Dict[str, Any]], Iterable[Tuple[int, Dict[str, Any]]]],
+                         tamanho_lote: int = FILMES_POR_TRANSACAO) -> List[bool]:
+        """
+        Aplica alterações parciais (como atualizar_parcial) a vários filmes, em
+        transações de `tamanho_lote` filmes: as colunas e ligações atuais são lidas
+        com IN (...) e só as diferenças são gravadas, com executemany.
+        Recebe {filme_id: alteracoes} ou pares (filme_id, alteracoes); um filme
+        repetido no mesmo lote recebe as alterações combinadas.
+        Retorna, na ordem recebida, True para cada filme existente.
+        """
+        itens = iter(alteracoes.items() if isinstance(alteracoes, dict) else alteracoes)
+        resultados: List[bool] = []
+        while True:
+            lote = list(islice(itens, tamanho_lote))
+            if not lote:
+                return resultados
+
+            combinadas: Dict[int, Dict[str, Any]] = {}
+            for filme_id, campos in lote:
+                desconhecidos = campos.keys() - CAMPOS_FILME
+                if desconhecidos:
+                    raise ValueError(f'Campos desconhecidos: {", ".join(sorted(desconhecidos))}')
+                combinadas[filme_id] = {**combinadas.get(filme_id, {}), **campos}
+
+            with self.banco.escrita() as con:
+                alterados = atualizar_lote(con.cursor(), combinadas, self._preparar_capa_nova)
+
+            resultados.extend(filme_id in alterados for filme_id, _ in lote)
+            for filme_id, campos in alterados.items():
+                if campos:
+                    eventos.publicar(eventos.ATUALIZADO, filme_id, campos)
+
+    def deletar_muitos(self, filme_ids: Iterable[int], tamanho_lote: int = FILMES_POR_TRANSACAO) -> List[bool]:
+        """
+        Deleta vários filmes e seus relacionamentos, em transações de
+        `tamanho_lote` filmes com DELETE ... WHERE filme_id IN (...).
+        Retorna, na ordem recebida, True para cada filme que existia.
+        """
+        ids = iter(filme_ids)
+        resultados: List[bool] = []
+        while True:
+            lote = list(islice(ids, tamanho_lote))
+            if not lote:
+                return resultados
+
+            with self.banco.escrita() as con:
+                removidos = set(remover_filmes(con.cursor(), lote))
+
+            # Um id repetido só conta como deletado na primeira vez
+            pendentes = set(removidos)
+            for filme_id in lote:
+                resultados.append(filme_id in pendentes)
+                pendentes.discard(filme_id)
+            for filme_id in removidos:
+                eventos.publicar(eventos.DELETADO, filme_id)
 
     # Métodos auxiliares privados
+    def _select_filme(self, incluir_capa: bool) -> str:
+        """Retorna o SELECT da tabela filmes com ou sem os bytes da capa."""
+        return SELECT_FILME_COM_CAPA if incluir_capa else SELECT_FILME_SEM_CAPA
+
+    def _fabrica_registro(self, incluir_capa: bool):
+        """row_factory que monta um Filme (sem relacionamentos) de cada linha do SELECT de filmes."""
+        def fabrica(cursor, linha: tuple) -> Filme:
+            return Filme(*self._preparar_capas([linha], incluir_capa)[0])
+        return fabrica
+
+    def _preparar_capas(self, filmes: List[tuple], incluir_capa: bool) -> List[tuple]:
+        """
+        Resolve a capa de cada linha: bytes com incluir_capa, senão CapaLazy
+        (capa no banco) ou CapaEmDisco (capa no ArmazenamentoCapas).
+        """
+        preparados = []
+        for filme in filmes:
+            capa, digest = filme[7], filme[8]
+            if digest is not None:
+                armazenamento = self.armazenamento_capas or ArmazenamentoCapas(caminho_banco=self.banco.caminho)
+                capa = CapaEmDisco(armazenamento, digest)
+                if incluir_capa:
+                    with capa.abrir() as mapa:
+                        capa = mapa[:]
+            elif not incluir_capa:
+                capa = CapaLazy(self.banco, filme[0]) if capa else None
+            preparados.append(filme[:7] + (capa,))
+        return preparados
+
+    def _capa_alterada(self, cursor, filme_id: int, capa) -> bool:
+        """Compara a capa nova com a gravada, no próprio SQLite ou pelo hash."""
+        # A referência lazy da própria capa (dicionário de listar_todos editado e
+        # salvo) não muda nada; a de outra capa é lida e comparada pelos bytes
+        if isinstance(capa, CapaLazy) and capa.e_do_filme(self.banco, filme_id):
+            return False
+        if isinstance(capa, CapaEmDisco):
+            cursor.execute('SELECT capa_hash FROM filmes WHERE id = ?', (filme_id,))
+            if cursor.fetchone()[0] == capa.digest:
+                return False
+        capa = resolver_capa(capa)
+        cursor.execute('SELECT capa IS ?, capa_hash FROM filmes WHERE id = ?', (capa, filme_id))
+        mesma_capa, capa_hash = cursor.fetchone()
+        if capa_hash is not None:
+            return not capa or hashlib.sha256(capa).hexdigest() != capa_hash
+        return not mesma_capa
+
+    def _preparar_capa_nova(self, cursor, filme_id: int, capa) -> Optional[tuple]:
+        """(capa, capa_hash) a gravar se a capa mudou; None se é a mesma."""
+        if not self._capa_alterada(cursor, filme_id, capa):
+            return None
+        return self._separar_capa(capa)
+
+    def _separar_capa(self, capa) -> tuple:
+        """Retorna (capa, capa_hash) a gravar; com armazenamento em disco, só o hash vai ao banco."""
+        capa = resolver_capa(capa)
+        if self.armazenamento_capas is None or not capa:
+            return capa, None
+        return None, self.armazenamento_capas.gravar(capa)
+
+    def _posicao_keyset(self, ordenar_por: str, filme_id: int) -> tuple:
+        """Retorna (valor da coluna de ordenação, id) do filme usado como cursor."""
+        with self.banco.leitura() as con:
+            cursor = con.cursor()
+            cursor.execute(f'SELECT {ordenar_por}, id FROM filmes WHERE id = ?', (filme_id,))
+            posicao = cursor.fetchone()
+        if posicao is None:
+            raise ValueError(f'Filme {filme_id} não encontrado.')
+        return posicao
+
+    def _valor_ordenacao(self, filme_tuple: tuple, ordenar_por: str):
+        """Lê o valor da coluna de ordenação em uma linha da tabela filmes."""
+        return filme_tuple[{'id': 0, 'classificacao_IMDB': 4, 'data_de_lancamento': 6}[ordenar_por]]
+
+    def _buscar_pagina(self, cursor, fase: str, ordenar_por: str, decrescente: bool,
+                       posicao: Optional[tuple], tamanho_pagina: int,
+                       incluir_capa: bool) -> List[tuple]:
+        """Busca a próxima página de filmes a partir da posição informada."""
+        direcao = 'DESC' if decrescente else 'ASC'
+        comparacao = '<' if decrescente else '>'
+        parametros = []
+
+        if fase == 'nulos':
+            condicoes = [f'{ordenar_por} IS NULL']
+            ordem = f'id {direcao}'
+            if posicao is not None:
+                condicoes.append(f'id {comparacao} ?')
+                parametros.append(posicao[1])
+        elif ordenar_por == 'id':
+            condicoes = []
+            ordem = f'id {direcao}'
+            if posicao is not None:
+                condicoes.append(f'id {comparacao} ?')
+                parametros.append(posicao[1])
+        else:
+            condicoes = [f'{ordenar_por} IS NOT NULL']
+            ordem = f'{ordenar_por} {direcao}, id {direcao}'
+            if posicao is not None:
+                condicoes.append(f'({ordenar_por}, id) {comparacao} (?, ?)')
+                parametros.extend(posicao)
+
+        where = f'WHERE {" AND ".join(condicoes)}' if condicoes else ''
+        cursor.execute(f'{self._select_filme(incluir_capa)} {where} ORDER BY {ordem} LIMIT ?',
+                       (*parametros, tamanho_pagina))
+        return cursor.fetchall()
+
     def _montar_filme_completo(self, cursor, filme_tuple: tuple) -> Dict[str, Any]:
         """Monta um dicionário completo do filme com todos seus relacionamentos."""
         filme_id = filme_tuple[0]
@@ -121,11 +565,12 @@ class FilmeRepository:
 
     def _inserir_filme_base(self, cursor, filme_dados: Dict[str, Any]) -> int:
         """Insere os dados básicos do filme e retorna o ID."""
+        capa, capa_hash = self._separar_capa(filme_dados['capa'])
         cursor.execute('''
             INSERT INTO filmes (
                 titulo, resumo, classificacao_indicativa, classificacao_IMDB,
-                duracao_minutos, data_de_lancamento, capa
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                duracao_minutos, data_de_lancamento, capa, capa_hash
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             filme_dados['titulo'],
             filme_dados['resumo'],
@@ -133,29 +578,11 @@ class FilmeRepository:
             filme_dados['classificacao_IMDB'],
             filme_dados['duracao_minutos'],
             filme_dados['data_de_lancamento'],
-            filme_dados['capa']
+            capa,
+            capa_hash
         ))
         return cursor.lastrowid
 
-    def _atualizar_filme_base(self, cursor, filme_id: int, filme_dados: Dict[str, Any]):
-        """Atualiza os dados básicos do filme."""
-        cursor.execute('''
-            UPDATE filmes SET
-                titulo = ?, resumo = ?, classificacao_indicativa = ?,
-                classificacao_IMDB = ?, duracao_minutos = ?,
-                data_de_lancamento = ?, capa = ?
-            WHERE id = ?
-        ''', (
-            filme_dados['titulo'],
-            filme_dados['resumo'],
-            filme_dados['classificacao_indicativa'],
-            filme_dados['classificacao_IMDB'],
-            filme_dados['duracao_minutos'],
-            filme_dados['data_de_lancamento'],
-            filme_dados['capa'],
-            filme_id
-        ))
-
     def _inserir_relacionamentos(self, cursor, filme_id: int, filme_dados: Dict[str, Any]):
         """Insere todos os relacionamentos de um filme."""
         # Insere gêneros
@@ -199,12 +626,7 @@ class FilmeRepository:
 
     def _verificar_ou_criar_id(self, cursor, tabela: str, coluna: str, valor: str) -> int:
         """Verifica se um registro existe ou cria um novo, retornando o ID."""
-        cursor.execute(f'SELECT id FROM {tabela} WHERE {coluna} = ?', (valor,))
-        resultado = cursor.fetchone()
-        if resultado:
-            return resultado[0]
-        cursor.execute(f'INSERT INTO {tabela} ({coluna}) VALUES (?)', (valor,))
-        return cursor.lastrowid
+        return cache_ids.obter_id(cursor, tabela, coluna, valor)
 
     def _buscar_generos(self, cursor, filme_id: int) -> List[str]:
         """Busca os gêneros de um filme."""
@@ -0,0 +1,252 @@
+import sqlite3
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+from repository.busca import indexar_trigramas_em_lote, remover_trigramas_em_lote
+from repository.cache_ids import cache_ids
+from repository.carregamento_em_lote import _em_lotes
+from repository.facetas import FACETAS
+
+# Filmes gravados por transação nas operações em lote do repositório
+FILMES_POR_TRANSACAO = 1000
+
+# Colunas de filmes gravadas por gravar_lote, na ordem do INSERT
+COLUNAS_FILME = ('titulo', 'resumo', 'classificacao_indicativa', 'classificacao_IMDB',
+                 'duracao_minutos', 'data_de_lancamento', 'capa')
+
+# Colunas de filmes comparadas e gravadas uma a uma por atualizar_lote (a capa é tratada à parte)
+COLUNAS_BASE = COLUNAS_FILME[:-1]
+
+# Tabelas de valores e de junção de cada chave do lote: (tabela, coluna, junção, coluna da junção)
+TABELAS_LISTA = {
+    'generos': FACETAS['generos'],
+    'dublagens': FACETAS['dublagens'],
+    'legendas': FACETAS['legendas'],
+}
+
+# Campos de relacionamento do dicionário de filme, com o elenco
+RELACIONAMENTOS = {**TABELAS_LISTA, 'elenco': FACETAS['atores']}
+
+# Prepara a capa nova de um filme: (capa, capa_hash) a gravar, ou None se não mudou
+PrepararCapa = Callable[[Any, int, Any], Optional[Tuple[Any, Optional[str]]]]
+
+
+def _marcadores(valores) -> str:
+    return ', '.join('?' * len(valores))
+
+
+def _somar_tempo(tempos: Optional[dict], etapa: str, inicio: float) -> float:
+    """Acumula em tempos[etapa] o tempo desde `inicio` e devolve o instante atual."""
+    agora = time.perf_counter()
+    if tempos is not None:
+        tempos[etapa] = tempos.get(etapa, 0.0) + agora - inicio
+    return agora
+
+
+def _filmes_existentes(cursor, filmes: list) -> set:
+    """
+    Retorna as linhas do lote cujo (titulo, data_de_lancamento) já está cadastrado.
+    A comparação é feita pelo SQLite com os valores do lote como parâmetros, como
+    em FilmeRepository.criar, então um date do Python encontra a data gravada como texto.
+    """
+    existentes = set()
+    for fatia in _em_lotes(filmes):
+        cursor.execute(f'''
+            SELECT DISTINCT lote.column1
+            FROM (VALUES {', '.join(['(?, ?, ?)'] * len(fatia))}) AS lote
+            JOIN filmes f ON f.titulo = lote.column2 AND f.data_de_lancamento IS lote.column3
+        ''', [valor for linha, *dados in fatia for valor in (linha, dados[0], dados[5])])
+        existentes.update(linha for linha, in cursor.fetchall())
+    return existentes
+
+
+def _valor_gravado(valor):
+    """O valor como o sqlite3 o envia ao banco (date e datetime viram texto pelos adaptadores)."""
+    adaptador = sqlite3.adapters.get((type(valor), sqlite3.PrepareProtocol))
+    return adaptador(valor) if adaptador else valor
+
+
+def gravar_lote(cursor, lote: dict, tempos: Optional[dict] = None) -> dict:
+    """
+    Grava um lote {'filmes': [(linha, titulo, ..., capa)], 'generos': [(linha, nome)],
+    'dublagens': [...], 'legendas': [...], 'elenco': [(linha, ator, papel)]} usando a
+    transação do cursor; `linha` identifica o filme dentro do lote.
+    Os filmes já cadastrados (mesmo título e data de lançamento) e os repetidos
+    no próprio lote são ignorados. Retorna {'filmes': gravados, 'duplicados': ignorados,
+    'ids': {linha: id gravado}}.
+    Se `tempos` for informado, acumula nele os segundos gastos em 'resolucao'
+    (filmes existentes e ids dos nomes) e em 'insercao'.
+    """
+    inicio = time.perf_counter()
+    existentes = _filmes_existentes(cursor, lote['filmes'])
+    ids = {chave: cache_ids.obter_ids(cursor, tabela, coluna, (nome for _, nome in lote[chave]))
+           for chave, (tabela, coluna, _, _) in TABELAS_LISTA.items()}
+    ids['elenco'] = cache_ids.obter_ids(cursor, 'atores', 'nome', (nome for _, nome, _ in lote['elenco']))
+
+    # Os ids são atribuídos aqui para gravar os relacionamentos sem ler lastrowid filme a filme;
+    # parte do maior id já usado, como faria o AUTOINCREMENT
+    cursor.execute('''
+        SELECT MAX(COALESCE((SELECT MAX(id) FROM filmes), 0),
+                   COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'filmes'), 0))
+    ''')
+    proximo_id = cursor.fetchone()[0] + 1
+
+    filme_por_linha = {}
+    filmes = []
+    repetidos = set()
+    for linha, *dados in lote['filmes']:
+        chave = (dados[0], _valor_gravado(dados[5]))
+        if linha in existentes or chave in repetidos:
+            continue
+        repetidos.add(chave)
+        filme_por_linha[linha] = proximo_id
+        filmes.append((proximo_id, *dados))
+        proximo_id += 1
+    inicio = _somar_tempo(tempos, 'resolucao', inicio)
+
+    cursor.executemany(f'''
+        INSERT INTO filmes (id, {', '.join(COLUNAS_FILME)})
+        VALUES (?, {_marcadores(COLUNAS_FILME)})
+    ''', filmes)
+
+    for chave, (_, _, juncao, coluna_juncao) in TABELAS_LISTA.items():
+        ligacoes = {(filme_por_linha[linha], ids[chave][nome])
+                    for linha, nome in lote[chave] if linha in filme_por_linha}
+        cursor.executemany(f'INSERT INTO {juncao} (filme_id, {coluna_juncao}) VALUES (?, ?)', sorted(ligacoes))
+
+    # Um ator repetido no mesmo filme fica com o primeiro papel informado
+    elenco = {}
+    for linha, nome, papel in lote['elenco']:
+        if linha in filme_por_linha:
+            elenco.setdefault((filme_por_linha[linha], ids['elenco'][nome]), papel)
+    cursor.executemany('INSERT INTO elenco (filme_id, ator_id, papel) VALUES (?, ?, ?)',
+                       [(filme_id, ator_id, papel) for (filme_id, ator_id), papel in elenco.items()])
+
+    indexar_trigramas_em_lote(cursor, [(filme[0], filme[1]) for filme in filmes])
+    _somar_tempo(tempos, 'insercao', inicio)
+    return {'filmes': len(filmes), 'duplicados': len(lote['filmes']) - len(filmes), 'ids': filme_por_linha}
+
+
+def montar_lote(filmes: List[Dict[str, Any]]) -> dict:
+    """Converte dicionários de filme (formato de FilmeRepository.criar) no lote de gravar_lote."""
+    lote = {'filmes': [], 'elenco': [], **{chave: [] for chave in TABELAS_LISTA}}
+    for linha, filme in enumerate(filmes):
+        lote['filmes'].append((linha, *(filme[coluna] for coluna in COLUNAS_FILME)))
+        for chave in TABELAS_LISTA:
+            lote[chave].extend((linha, nome) for nome in filme[chave])
+        lote['elenco'].extend((linha, membro['ator'], membro['papel']) for membro in filme['elenco'])
+    return lote
+
+
+def atualizar_lote(cursor, alteracoes: Dict[int, Dict[str, Any]],
+                   preparar_capa: PrepararCapa) -> Dict[int, FrozenSet[str]]:
+    """
+    Aplica alterações parciais {filme_id: {campo: valor}} a vários filmes na
+    transação do cursor. Lê as colunas e as ligações atuais de todos os filmes
+    com IN (...), grava só o que mudou com um executemany por tipo de comando
+    e retorna {filme_id: campos alterados} dos filmes que existem.
+    """
+    atuais = {}
+    for fatia in _em_lotes(list(alteracoes)):
+        cursor.execute(f'SELECT id, {", ".join(COLUNAS_BASE)} FROM filmes WHERE id IN ({_marcadores(fatia)})',
+                       fatia)
+        atuais.update((linha[0], linha[1:]) for linha in cursor.fetchall())
+
+    alterados = {filme_id: set() for filme_id in atuais}
+    # Um executemany por conjunto de colunas alteradas
+    atualizacoes = defaultdict(list)
+    for filme_id, atual in atuais.items():
+        dados = alteracoes[filme_id]
+        colunas = [coluna for coluna, valor in zip(COLUNAS_BASE, atual) if coluna in dados and dados[coluna] != valor]
+        valores = [dados[coluna] for coluna in colunas]
+        alterados[filme_id].update(colunas)
+        capa = preparar_capa(cursor, filme_id, dados['capa']) if 'capa' in dados else None
+        if capa is not None:
+            colunas += ['capa', 'capa_hash']
+            valores += capa
+            alterados[filme_id].add('capa')
+        if colunas:
+            atualizacoes[tuple(colunas)].append((*valores, filme_id))
+    for colunas, parametros in atualizacoes.items():
+        atribuicoes = ', '.join(f'{coluna} = ?' for coluna in colunas)
+        cursor.executemany(f'UPDATE filmes SET {atribuicoes} WHERE id = ?', parametros)
+
+    for campo in RELACIONAMENTOS:
+        for filme_id in _atualizar_relacionamento(cursor, campo, {
+                filme_id: alteracoes[filme_id][campo] for filme_id in atuais if campo in alteracoes[filme_id]}):
+            alterados[filme_id].add(campo)
+
+    # Reindexa os títulos alterados para a busca aproximada
+    titulos = [(filme_id, alteracoes[filme_id]['titulo']) for filme_id in atuais if 'titulo' in alterados[filme_id]]
+    if titulos:
+        remover_trigramas_em_lote(cursor, [filme_id for filme_id, _ in titulos])
+        indexar_trigramas_em_lote(cursor, titulos)
+
+    return {filme_id: frozenset(campos) for filme_id, campos in alterados.items()}
+
+
+def _atualizar_relacionamento(cursor, campo: str, valores: Dict[int, list]) -> set:
+    """
+    Aplica a um relacionamento só a diferença entre as ligações gravadas e as
+    novas de cada filme (no elenco, o papel alterado vira um UPDATE).
+    Retorna os filmes em que alguma ligação mudou.
+    """
+    if not valores:
+        return set()
+    tabela, coluna, juncao, coluna_juncao = RELACIONAMENTOS[campo]
+    elenco = campo == 'elenco'
+
+    if elenco:
+        ids = cache_ids.obter_ids(cursor, tabela, coluna, (m['ator'] for lista in valores.values() for m in lista))
+        novos = {filme_id: {ids[m['ator']]: m['papel'] for m in lista} for filme_id, lista in valores.items()}
+    else:
+        ids = cache_ids.obter_ids(cursor, tabela, coluna, (nome for lista in valores.values() for nome in lista))
+        novos = {filme_id: dict.fromkeys(ids[nome] for nome in lista) for filme_id, lista in valores.items()}
+
+    gravados: Dict[int, dict] = defaultdict(dict)
+    for fatia in _em_lotes(list(valores)):
+        cursor.execute(f'''
+            SELECT filme_id, {coluna_juncao}, {'papel' if elenco else 'NULL'} FROM {juncao}
+            WHERE filme_id IN ({_marcadores(fatia)})
+        ''', fatia)
+        for filme_id, valor_id, papel in cursor.fetchall():
+            gravados[filme_id][valor_id] = papel
+
+    removidos, adicionados, papeis = [], [], []
+    alterados = set()
+    for filme_id, ligacoes in novos.items():
+        antes = len(removidos) + len(adicionados) + len(papeis)
+        atuais = gravados[filme_id]
+        removidos.extend((filme_id, valor_id) for valor_id in atuais if valor_id not in ligacoes)
+        for valor_id, papel in ligacoes.items():
+            if valor_id not in atuais:
+                adicionados.append((filme_id, valor_id, papel) if elenco else (filme_id, valor_id))
+            elif elenco and atuais[valor_id] != papel:
+                papeis.append((papel, filme_id, valor_id))
+        if len(removidos) + len(adicionados) + len(papeis) > antes:
+            alterados.add(filme_id)
+
+    cursor.executemany(f'DELETE FROM {juncao} WHERE filme_id = ? AND {coluna_juncao} = ?', removidos)
+    if elenco:
+        cursor.executemany('INSERT INTO elenco (filme_id, ator_id, papel) VALUES (?, ?, ?)', adicionados)
+        cursor.executemany('UPDATE elenco SET papel = ? WHERE filme_id = ? AND ator_id = ?', papeis)
+    else:
+        cursor.executemany(f'INSERT INTO {juncao} (filme_id, {coluna_juncao}) VALUES (?, ?)', adicionados)
+    return alterados
+
+
+def remover_filmes(cursor, filme_ids: List[int]) -> List[int]:
+    """Remove os filmes, suas ligações e seus títulos do índice de busca; retorna os ids que existiam."""
+    removidos = []
+    for fatia in _em_lotes(list(dict.fromkeys(filme_ids))):
+        cursor.execute(f'SELECT id FROM filmes WHERE id IN ({_marcadores(fatia)})', fatia)
+        existentes = [linha[0] for linha in cursor.fetchall()]
+        if not existentes:
+            continue
+        marcadores = _marcadores(existentes)
+        for _, _, juncao, _ in RELACIONAMENTOS.values():
+            cursor.execute(f'DELETE FROM {juncao} WHERE filme_id IN ({marcadores})', existentes)
+        remover_trigramas_em_lote(cursor, existentes)
+        cursor.execute(f'DELETE FROM filmes WHERE id IN ({marcadores})', existentes)
+        removidos.extend(existentes)
+    return removidos
@@ -0,0 +1,34 @@
+import os
+import sys
+import pytest
+
+# Caminho para acessar os módulos da raiz do projeto
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cinefilmesdb import gerenciador
+from repository.filmesCRUD import FilmeRepository
+
+
+@pytest.fixture
+def banco(tmp_path):
+    """Gerenciador de conexões de um cine_filmes.db novo em um diretório temporário."""
+    gerenciador_banco = gerenciador(str(tmp_path / 'cine_filmes.db'))
+    yield gerenciador_banco
+    gerenciador_banco.fechar()
+
+
+@pytest.fixture
+def repositorio(banco):
+    return FilmeRepository(banco=banco)
+
+
+def novo_filme(titulo: str = 'Matrix', **campos) -> dict:
+    filme = {
+        'titulo': titulo, 'resumo': 'Um hacker descobre a verdade sobre a realidade.',
+        'classificacao_indicativa': 14, 'classificacao_IMDB': 8.7, 'duracao_minutos': 136,
+        'data_de_lancamento': '1999-03-31', 'capa': None, 'generos': ['Ação', 'Ficção científica'],
+        'dublagens': ['Português'], 'legendas': ['Inglês'],
+        'elenco': [{'ator': 'Keanu Reeves', 'papel': 'Neo'}],
+    }
+    filme.update(campos)
+    return filme
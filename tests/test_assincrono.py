@@ -0,0 +1,20 @@
+import pandas as pd
+from repository.assincrono import RepositorioAssincrono
+
+
+def test_importar_arquivo_usa_o_banco_do_repositorio(repositorio, tmp_path, monkeypatch):
+    arquivo = tmp_path / 'filmes.csv'
+    pd.DataFrame({'titulo': ['Matrix'], 'resumo': ['Um hacker'], 'data_de_lancamento': ['1999-03-31'],
+                  'generos': ['Ação'], 'elenco': ['Keanu Reeves - Neo']}).to_csv(arquivo, index=False)
+    # Roda em outro diretório, onde ficaria o cine_filmes.db padrão
+    outro_diretorio = tmp_path / 'outro'
+    outro_diretorio.mkdir()
+    monkeypatch.chdir(outro_diretorio)
+
+    assincrono = RepositorioAssincrono(repositorio)
+    try:
+        assincrono.importar_arquivo(str(arquivo)).result()
+    finally:
+        assincrono.fechar()
+    assert [filme['titulo'] for filme in repositorio.listar_todos()] == ['Matrix']
+    assert not (outro_diretorio / 'cine_filmes.db').exists()
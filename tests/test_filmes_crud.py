@@ -0,0 +1,56 @@
+from datetime import date
+from conftest import novo_filme
+from repository.armazenamento_capas import ArmazenamentoCapas
+from repository.capa import CapaLazy, CapaEmDisco
+from repository.filmesCRUD import FilmeRepository
+
+
+def test_atualizar_com_dicionario_de_listar_todos_mantem_a_capa(repositorio):
+    filme_id = repositorio.criar(novo_filme(capa=b'capa original'))
+    filme = repositorio.listar_todos()[0]
+    assert isinstance(filme['capa'], CapaLazy)
+
+    filme['titulo'] = 'Matrix (versão estendida)'
+    assert repositorio.atualizar(filme_id, filme)
+
+    salvo = repositorio.buscar_por_id(filme_id)
+    assert salvo['titulo'] == 'Matrix (versão estendida)'
+    assert salvo['capa'] == b'capa original'
+
+
+def test_capa_lazy_de_outro_filme_e_copiada(repositorio):
+    origem = repositorio.criar(novo_filme(capa=b'capa compartilhada'))
+    destino = repositorio.criar(novo_filme('Matrix Reloaded', data_de_lancamento='2003-05-15'))
+    capa = next(filme['capa'] for filme in repositorio.listar_todos() if filme['id'] == origem)
+
+    assert repositorio.atualizar_parcial(destino, {'capa': capa})
+    assert repositorio.buscar_por_id(destino)['capa'] == b'capa compartilhada'
+
+    copia = repositorio.criar(novo_filme('Matrix Revolutions', data_de_lancamento='2003-11-05', capa=capa))
+    assert repositorio.buscar_por_id(copia)['capa'] == b'capa compartilhada'
+
+
+def test_atualizar_com_capa_em_disco_de_listar_todos(banco, tmp_path):
+    repositorio = FilmeRepository(ArmazenamentoCapas(str(tmp_path / 'capas')), banco)
+    filme_id = repositorio.criar(novo_filme(capa=b'capa em disco'))
+    filme = repositorio.listar_todos()[0]
+    assert isinstance(filme['capa'], CapaEmDisco)
+
+    filme['duracao_minutos'] = 150
+    assert repositorio.atualizar(filme_id, filme)
+    assert bytes(repositorio.buscar_por_id(filme_id)['capa']) == b'capa em disco'
+
+
+def test_criar_muitos_reconhece_duplicados_com_datas_date(repositorio):
+    assert repositorio.criar(novo_filme(data_de_lancamento=date(1999, 3, 31))) is not None
+    assert repositorio.criar(novo_filme(data_de_lancamento=date(1999, 3, 31))) is None
+
+    resultados = repositorio.criar_muitos([
+        novo_filme(data_de_lancamento=date(1999, 3, 31)),
+        novo_filme(data_de_lancamento='1999-03-31'),
+        novo_filme('Matrix Reloaded', data_de_lancamento=date(2003, 5, 15)),
+        novo_filme('Matrix Reloaded', data_de_lancamento='2003-05-15'),
+    ])
+    assert resultados[:2] == [None, None]
+    assert resultados[2] is not None and resultados[3] is None
+    assert sorted(filme['titulo'] for filme in repositorio.listar_todos()) == ['Matrix', 'Matrix Reloaded']
@@ -0,0 +1,34 @@
+import time
+import pandas as pd
+from importar_filmes import preparar_em_paralelo
+
+
+def _blocos_lidos(processos: int, fila_maxima: int) -> int:
+    """Quantos blocos a leitura consegue adiantar enquanto o gravador ainda não consumiu o primeiro lote."""
+    lidos = []
+
+    def blocos():
+        for numero in range(100):
+            lidos.append(numero)
+            yield pd.DataFrame({'titulo': [f'Filme {numero}'], 'resumo': ['Resumo']}, index=[numero])
+
+    lotes = preparar_em_paralelo(blocos(), processos, fila_maxima)
+    try:
+        next(lotes)
+        # Espera a leitura parar, bloqueada pela fila cheia
+        anterior = -1
+        while anterior != len(lidos):
+            anterior = len(lidos)
+            time.sleep(0.5)
+        return len(lidos)
+    finally:
+        lotes.close()
+
+
+def test_blocos_em_andamento_crescem_com_os_processos():
+    fila_maxima = 1
+    poucos = _blocos_lidos(2, fila_maxima)
+    muitos = _blocos_lidos(8, fila_maxima)
+    assert poucos >= 2 + fila_maxima
+    assert muitos >= 8 + fila_maxima
+    assert muitos > poucos